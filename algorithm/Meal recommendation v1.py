@@ -10,6 +10,11 @@ import numpy as np
 from ortools.linear_solver import pywraplp
 from typing import Dict, List, Tuple, Optional
 import warnings
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from nutrient_index import NutrientIndex
 warnings.filterwarnings('ignore')
 
 
@@ -52,6 +57,17 @@ class MealRecommendationEngine:
         self.CALORIE_TOLERANCE = 0.1  # ±10%
         self.MAX_ITEMS = 4  # 최대 4개 메뉴
         self.MIN_ITEMS = 2  # 최소 2개 메뉴
+        
+        # 목표별 목적함수 가중치 (단백질 효율, 칼로리 효율, 나트륨 페널티)
+        self.objective_weights = {
+            '다이어트': (5, 2, 1),   # 단백질 효율을 가장 중시
+            '균형': (3, 3, 1),       # 균형잡힌 영양
+            '벌크업': (4, 4, 0.5),   # 칼로리와 단백질 모두 중시
+        }
+        
+        # 캐시: 브랜드별 계수 배열, (브랜드, 목표)별 모델 골격
+        self._brand_arrays: Dict[str, Dict] = {}
+        self._model_cache: Dict[Tuple[str, str], Dict] = {}
     
     def _preprocess_data(self):
         """
@@ -115,8 +131,8 @@ class MealRecommendationEngine:
         print(f"📍 조건: {brand} | 예산 {budget:,}원 | 목표 {goal}")
         print(f"{'='*80}\n")
         
-        # 해당 브랜드 상품만 필터링
-        brand_df = self.df[self.df['brand_name'] == brand].reset_index(drop=True)
+        # 해당 브랜드 상품만 필터링 (계수 배열과 함께 캐시)
+        brand_df = self._get_brand_arrays(brand)['df']
         
         if len(brand_df) == 0:
             print(f"❌ {brand}에서 상품을 찾을 수 없습니다.")
@@ -138,7 +154,7 @@ class MealRecommendationEngine:
         
         # 선형 계획법 실행
         result = self._solve_with_linear_programming(
-            brand_df, 
+            brand, 
             budget, 
             calorie_range, 
             min_protein,
@@ -147,122 +163,216 @@ class MealRecommendationEngine:
         
         return result
     
-    def _solve_with_linear_programming(self,
-                                       brand_df: pd.DataFrame,
-                                       budget: int,
-                                       calorie_range: Tuple[float, float],
-                                       min_protein: float,
-                                       goal: str) -> Optional[Dict]:
+    def recommend_sweep(self,
+                        goal: str,
+                        brand: str,
+                        budgets: List[int],
+                        calorie_tolerances: Optional[List[float]] = None) -> List[Dict]:
         """
-        선형 계획법으로 최적 조합 탐색
+        예산(및 칼로리 허용 오차) 스윕: 같은 브랜드/목표 모델 하나로 여러 조건을 연속으로 풀이
         
-        목적함수: 영양 만족도 최대화
-        제약조건:
-        - 가격 ≤ 예산
-        - 칼로리 범위 내
-        - 나트륨 ≤ 2000mg
-        - 단백질 ≥ 기준
-        - 2~4개 메뉴 선택
+        조건이 느슨해지는 순서(허용 오차 → 예산 오름차순)로 풀기 때문에 직전 해가
+        다음 조건에서도 대부분 그대로 실행 가능해 힌트(웜 스타트)로 쓰인다.
+        
+        Args:
+            goal: 목표 ('다이어트' / '균형' / '벌크업')
+            brand: 브랜드명
+            budgets: 예산 목록 (원), 예: [5000, 6000, 7000]
+            calorie_tolerances: 칼로리 허용 오차 목록 (기본: [CALORIE_TOLERANCE])
+        
+        Returns:
+            [{'budget', 'calorie_tolerance', 'result'}] (입력 순서, 해가 없으면 result=None)
+        """
+        if goal not in self.calorie_targets:
+            print(f"❌ 목표 오류: {goal}은(는) 지원하지 않습니다.")
+            return []
+        
+        brand_df = self._get_brand_arrays(brand)['df']
+        if len(brand_df) == 0:
+            print(f"❌ {brand}에서 상품을 찾을 수 없습니다.")
+            return []
+        
+        tolerances = calorie_tolerances or [self.CALORIE_TOLERANCE]
+        target_calorie = self.calorie_targets[goal]
+        min_protein = self.protein_minimums[goal]
+        
+        grid = [(budget, tol) for tol in tolerances for budget in budgets]
+        solved = {}
+        for budget, tol in sorted(set(grid), key=lambda p: (p[1], p[0])):
+            self.recommendations_budget = budget  # _format_result 가격 검증용
+            calorie_range = (target_calorie * (1 - tol), target_calorie * (1 + tol))
+            solved[(budget, tol)] = self._solve_with_linear_programming(
+                brand, budget, calorie_range, min_protein, goal, verbose=False
+            )
+        
+        sweep = [{'budget': b, 'calorie_tolerance': t, 'result': solved[(b, t)]} for b, t in grid]
+        
+        print(f"\n📈 {brand} | {goal} 스윕 결과")
+        print(f"{'-'*80}")
+        for row in sweep:
+            result = row['result']
+            if result is None:
+                print(f"   예산 {row['budget']:>7,}원 | 허용 ±{row['calorie_tolerance']:.0%} | ❌ 해 없음")
+            else:
+                summary = result['summary']
+                print(f"   예산 {row['budget']:>7,}원 | 허용 ±{row['calorie_tolerance']:.0%} | "
+                      f"{summary['total_price']:,}원 | {summary['total_calories']:.0f}kcal | "
+                      f"단백질 {summary['total_protein']:.1f}g | {summary['item_count']}개")
+        
+        return sweep
+    
+    def _get_brand_arrays(self, brand: str) -> Dict:
+        """
+        브랜드별 계수 배열 (최초 1회 계산 후 캐시)
+        
+        Returns:
+            {'df': 브랜드 DataFrame, 'price'/'calorie'/'protein'/'carb'/'fat'/'sodium': np.ndarray,
+             'index': (칼로리, 단백질, 지방, 나트륨) NutrientIndex}
+        """
+        arrays = self._brand_arrays.get(brand)
+        if arrays is not None:
+            return arrays
+        
+        brand_df = self.df[self.df['brand_name'] == brand].reset_index(drop=True)
+        arrays = {'df': brand_df}
+        for key, col in [('price', 'price'), ('calorie', '에너지(kcal)'), ('protein', '단백질(g)'),
+                         ('carb', '탄수화물(g)'), ('fat', '지방(g)'), ('sodium', '나트륨(mg)')]:
+            arrays[key] = brand_df[col].to_numpy(dtype=np.float64)
+        arrays['index'] = NutrientIndex(np.column_stack([arrays['calorie'], arrays['protein'], arrays['fat'], arrays['sodium']]))
+        self._brand_arrays[brand] = arrays
+        return arrays
+    
+    def _objective_scores(self, arrays: Dict, goal: str) -> np.ndarray:
+        """
+        상품별 영양 스코어 (목적함수 계수) 일괄 계산
+        
+        - 단백질 효율 (가격당 단백질): 높을수록 좋음
+        - 칼로리 효율 (가격당 칼로리): 합리적 범위가 좋음
+        - 나트륨 효율 (낮을수록 좋음)
         """
+        price = arrays['price']
+        safe_price = np.where(price > 0, price, 1.0)
+        protein_efficiency = np.where(price > 0, arrays['protein'] / safe_price, 0.0)  # g/원
+        calorie_efficiency = np.where(price > 0, arrays['calorie'] / safe_price, 0.0)  # kcal/원
+        sodium_penalty = 1 / (1 + arrays['sodium'] / 100)                              # 정규화된 페널티
+        
+        w_protein, w_calorie, w_sodium = self.objective_weights.get(goal, self.objective_weights['벌크업'])
+        return protein_efficiency * w_protein + calorie_efficiency * w_calorie + sodium_penalty * w_sodium
+    
+    def _build_model(self, brand: str, goal: str) -> Optional[Dict]:
+        """
+        (브랜드, 목표)별 모델 골격 생성
         
-        # 솔버 생성
-        solver = pywraplp.Solver.CreateSolver('GLOP')
+        계수는 모두 브랜드 배열에서 한 번에 설정하고, 요청마다 바뀌는
+        우변(예산, 칼로리 범위)은 0으로 열어 두었다가 _solve 시점에 SetBounds로 채운다.
+        """
+        # 솔버 생성 (GLOP은 순수 LP라 IntVar의 0/1 조건이 완화됨 -> MIP 솔버 사용)
+        solver = pywraplp.Solver.CreateSolver('SCIP') or pywraplp.Solver.CreateSolver('CBC')
         if not solver:
             print("❌ 솔버 생성 실패")
             return None
         
-        n = len(brand_df)
+        arrays = self._get_brand_arrays(brand)
+        n = len(arrays['df'])
         
         # 의사결정 변수: x_i (각 상품의 선택 여부, 0 또는 1)
         x = [solver.IntVar(0, 1, f'item_{i}') for i in range(n)]
         
-        # ============ 제약조건 ============
-        
-        # 1. 가격 제약: Σ(price_i * x_i) ≤ budget
-        price_constraint = solver.Constraint(0, float(budget), 'price_limit')
-        for i in range(n):
-            price_constraint.SetCoefficient(x[i], float(brand_df.iloc[i]['price']))
-        
-        # 2. 칼로리 범위 제약: calorie_min ≤ Σ(cal_i * x_i) ≤ calorie_max
-        calorie_constraint_min = solver.Constraint(calorie_range[0], float('inf'), 'calorie_min')
-        calorie_constraint_max = solver.Constraint(0, calorie_range[1], 'calorie_max')
-        for i in range(n):
-            cal = float(brand_df.iloc[i]['에너지(kcal)'])
-            calorie_constraint_min.SetCoefficient(x[i], cal)
-            calorie_constraint_max.SetCoefficient(x[i], cal)
+        def add_constraint(lb: float, ub: float, name: str, coefs: Optional[np.ndarray]):
+            constraint = solver.Constraint(lb, ub, name)
+            values = coefs.tolist() if coefs is not None else [1.0] * n
+            for var, coef in zip(x, values):
+                constraint.SetCoefficient(var, coef)
+            return constraint
         
+        # ============ 제약조건 ============
+        # 1. 가격 제약: Σ(price_i * x_i) ≤ budget            (우변은 요청마다 갱신)
+        # 2. 칼로리 범위 제약: calorie_min ≤ Σ(cal_i * x_i) ≤ calorie_max (우변은 요청마다 갱신)
         # 3. 나트륨 제약: Σ(sodium_i * x_i) ≤ SODIUM_LIMIT
-        sodium_constraint = solver.Constraint(0, float(self.SODIUM_LIMIT), 'sodium_limit')
-        for i in range(n):
-            sodium_constraint.SetCoefficient(x[i], float(brand_df.iloc[i]['나트륨(mg)']))
-        
-        # 4. 단백질 제약: Σ(protein_i * x_i) ≥ min_protein
-        protein_constraint = solver.Constraint(float(min_protein), float('inf'), 'protein_min')
-        for i in range(n):
-            protein_constraint.SetCoefficient(x[i], float(brand_df.iloc[i]['단백질(g)']))
-        
+        # 4. 단백질 제약: Σ(protein_i * x_i) ≥ min_protein   (우변은 요청마다 갱신)
         # 5. 메뉴 개수 제약: MIN_ITEMS ≤ Σ(x_i) ≤ MAX_ITEMS
-        count_constraint_min = solver.Constraint(self.MIN_ITEMS, float('inf'), 'min_items')
-        count_constraint_max = solver.Constraint(0, self.MAX_ITEMS, 'max_items')
-        for i in range(n):
-            count_constraint_min.SetCoefficient(x[i], 1)
-            count_constraint_max.SetCoefficient(x[i], 1)
+        constraints = {
+            'price': add_constraint(0, 0, 'price_limit', arrays['price']),
+            'calorie': add_constraint(0, 0, 'calorie_range', arrays['calorie']),
+            'sodium': add_constraint(0, float(self.SODIUM_LIMIT), 'sodium_limit', arrays['sodium']),
+            'protein': add_constraint(0, solver.infinity(), 'protein_min', arrays['protein']),
+            'count': add_constraint(self.MIN_ITEMS, self.MAX_ITEMS, 'item_count', None),
+        }
         
         # ============ 목적함수 ============
-        
         objective = solver.Objective()
-        
-        for i in range(n):
-            row = brand_df.iloc[i]
-            protein = float(row['단백질(g)'])
-            carb = float(row['탄수화물(g)'])
-            fat = float(row['지방(g)'])
-            cal = float(row['에너지(kcal)'])
-            price = float(row['price'])
-            
-            # 영양 스코어 계산 (가중치는 나중에 튜닝)
-            # 기본 가중치:
-            # - 단백질 효율 (가격당 단백질): 높을수록 좋음
-            # - 칼로리 효율 (가격당 칼로리): 합리적 범위가 좋음
-            # - 나트륨 효율 (낮을수록 좋음)
-            
-            protein_efficiency = protein / price if price > 0 else 0  # g/원
-            calorie_efficiency = cal / price if price > 0 else 0      # kcal/원
-            sodium_penalty = 1 / (1 + float(row['나트륨(mg)']) / 100)         # 정규화된 페널티
-            
-            # 목표에 따른 가중치 조정
-            if goal == '다이어트':
-                # 단백질 효율을 가장 중시
-                score = (protein_efficiency * 5 + 
-                        calorie_efficiency * 2 + 
-                        sodium_penalty * 1)
-            elif goal == '균형':
-                # 균형잡힌 영양
-                score = (protein_efficiency * 3 + 
-                        calorie_efficiency * 3 + 
-                        sodium_penalty * 1)
-            else:  # 벌크업
-                # 칼로리와 단백질 모두 중시
-                score = (protein_efficiency * 4 + 
-                        calorie_efficiency * 4 + 
-                        sodium_penalty * 0.5)
-            
-            objective.SetCoefficient(x[i], float(score))
+        for var, score in zip(x, self._objective_scores(arrays, goal).tolist()):
+            objective.SetCoefficient(var, score)
         
         # 목적함수 최대화
         objective.SetMaximization()
         
+        return {'solver': solver, 'x': x, 'constraints': constraints}
+    
+    def _solve_with_linear_programming(self,
+                                       brand: str,
+                                       budget: int,
+                                       calorie_range: Tuple[float, float],
+                                       min_protein: float,
+                                       goal: str,
+                                       verbose: bool = True) -> Optional[Dict]:
+        """
+        선형 계획법으로 최적 조합 탐색
+        
+        목적함수: 영양 만족도 최대화
+        제약조건:
+        - 가격 ≤ 예산
+        - 칼로리 범위 내
+        - 나트륨 ≤ 2000mg
+        - 단백질 ≥ 기준
+        - 2~4개 메뉴 선택
+        
+        모델은 (브랜드, 목표)별로 한 번만 만들고, 요청마다 우변만 바꿔 다시 푼다.
+        같은 모델의 직전 해는 힌트로 넣어 다음 풀이를 웜 스타트한다.
+        모델 변수는 _get_brand_arrays(brand)['df'] 행 순서를 따르므로 결과도 같은 캐시 DataFrame으로 만든다.
+        """
+        key = (brand, goal)
+        model = self._model_cache.get(key)
+        if model is None:
+            model = self._build_model(brand, goal)
+            if model is None:
+                return None
+            self._model_cache[key] = model
+        
+        solver, x, constraints = model['solver'], model['x'], model['constraints']
+        constraints['price'].SetBounds(0, float(budget))
+        constraints['calorie'].SetBounds(float(calorie_range[0]), float(calorie_range[1]))
+        constraints['protein'].SetBounds(float(min_protein), solver.infinity())
+        
+        # 후보 가지치기: 단품만으로 칼로리 상한·나트륨 상한·예산을 넘는 상품은 어떤 해에도 못 들어가므로 변수를 0으로 고정
+        arrays = self._get_brand_arrays(brand)
+        brand_df = arrays['df']
+        usable = arrays['index'].mask(hi=(calorie_range[1], None, None, self.SODIUM_LIMIT)) & (arrays['price'] <= budget)
+        usable = usable.tolist()
+        for var, ok in zip(x, usable):
+            var.SetUb(1 if ok else 0)
+        if model.get('last_solution') is not None:
+            solver.SetHint(x, [v if ok else 0 for v, ok in zip(model['last_solution'], usable)])
+        
         # ============ 솔버 실행 ============
         
         status = solver.Solve()
         
+        if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            model['last_solution'] = [round(var.solution_value()) for var in x]
+        
+        if not verbose:
+            if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+                return self._format_result(brand_df, x, solver, goal, verbose=False, calorie_range=calorie_range)
+            return None
+        
         if status == pywraplp.Solver.OPTIMAL:
             print("✅ 최적해 찾음!\n")
-            return self._format_result(brand_df, x, solver, goal)
+            return self._format_result(brand_df, x, solver, goal, calorie_range=calorie_range)
         
         elif status == pywraplp.Solver.FEASIBLE:
             print("⚠️  실행 가능한 해 찾음 (최적해 아님)\n")
-            return self._format_result(brand_df, x, solver, goal)
+            return self._format_result(brand_df, x, solver, goal, calorie_range=calorie_range)
         
         else:
             print("❌ 해를 찾을 수 없습니다.")
@@ -277,9 +387,14 @@ class MealRecommendationEngine:
                        brand_df: pd.DataFrame, 
                        x: List, 
                        solver,
-                       goal: str) -> Dict:
+                       goal: str,
+                       verbose: bool = True,
+                       calorie_range: Optional[Tuple[float, float]] = None) -> Dict:
         """
         결과 포맷팅 및 검증
+        
+        Args:
+            calorie_range: 이번 풀이에 쓴 칼로리 범위 (recommend_sweep의 허용 오차별 검증용, 기본: CALORIE_TOLERANCE)
         """
         
         selected_indices = [i for i in range(len(x)) if x[i].solution_value() > 0.5]
@@ -300,8 +415,9 @@ class MealRecommendationEngine:
         
         # 검증
         target_cal = self.calorie_targets[goal]
-        cal_tolerance = target_cal * self.CALORIE_TOLERANCE
-        cal_check = abs(total_calories - target_cal) <= cal_tolerance
+        if calorie_range is None:
+            calorie_range = (target_cal * (1 - self.CALORIE_TOLERANCE), target_cal * (1 + self.CALORIE_TOLERANCE))
+        cal_check = calorie_range[0] - 1e-6 <= total_calories <= calorie_range[1] + 1e-6  # 솔버 해의 경계 반올림 오차 허용
         
         price_check = total_price <= self.recommendations_budget  # 나중에 사용할 변수
         protein_check = total_protein >= self.protein_minimums[goal]
@@ -335,7 +451,8 @@ class MealRecommendationEngine:
             }
         }
         
-        self._print_result(result)
+        if verbose:
+            self._print_result(result)
         
         return result
     
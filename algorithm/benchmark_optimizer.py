@@ -0,0 +1,253 @@
+"""
+옵티마이저 벤치마크 (합성 메뉴 DB + 고정 시드 사용자 코호트)
+- 메뉴 크기(기본 1k/10k/100k)와 브랜드 수를 바꿔 가며 같은 사용자 코호트로 plan_day를 실행
+- 측정: 메뉴 빌드 시간, 끼니 탐색 1회 지연 p50/p95, 사용자 하루 식단 지연 p50/p95,
+  코어당 처리량(하루 식단/초, 단일 프로세스), 성공률, 최대 RSS, 메뉴 배열 크기
+- 크기마다 새 프로세스에서 실행해 최대 RSS가 이전 크기의 영향을 받지 않게 한다
+  (프로세스가 죽으면(OOM 등) 그 크기를 실패로 보고하고 다음 크기로 넘어감, 종료 코드 1)
+
+실행:
+    python algorithm/benchmark_optimizer.py
+    python algorithm/benchmark_optimizer.py --items 1000 10000 --brands 8 --users 100 --planner tiered
+    python algorithm/benchmark_optimizer.py --items 1000 --engine table --json bench.json  (조합 표 빌드가 세제곱으로 늘어 수천 개 이하에서만)
+    python algorithm/benchmark_optimizer.py --items 10000 --profile   (단계별 시간/탈락 비율 추가 출력)
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))  # 경로로 실행/로드해도 같은 폴더 모듈을 찾도록
+from diet_recommendation_server import load_optimizer_module
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_ITEM_COUNTS = (1000, 10000, 100000)
+DEFAULT_BRANDS = 8
+DEFAULT_USERS = 50
+DEFAULT_SEED = 42
+WARMUP_USERS = 3
+
+# 합성 메뉴: 카테고리 비율, (칼로리, 단백질) 범위, 가격 범위(원)
+SYNTHETIC_CATEGORIES = {
+    'MAIN': (0.35, (350, 800), (10, 40), (2500, 8000)),
+    'SIDE': (0.35, (80, 350), (3, 30), (1000, 4000)),
+    'DRINK': (0.20, (0, 200), (0, 10), (800, 3000)),
+    'SNACK': (0.10, (100, 500), (1, 10), (1000, 3000)),
+}
+CSV_COLUMNS = ['store_name', 'menu_name', 'price', 'calories', 'protein', 'carbs', 'fat', 'sodium',
+               'saturated_fat', 'sugars', 'allergens_scraped', 'FOOD_CODE']
+
+
+def generate_menu_csv(path, n_items, n_brands, module, seed=DEFAULT_SEED):
+    """
+    final_nutrition_db.csv 형식의 합성 메뉴 CSV 생성
+    메뉴명은 FoodCategorizer 키워드(+ 가끔 재료 키워드)로 만들어 실제 분류/재료 중복 검사 경로를 그대로 탄다.
+    """
+    rng = np.random.default_rng(seed)
+    keywords = module.FoodCategorizer().keywords
+    ingredients = [''] * len(module.INGREDIENT_VOCAB) + list(module.INGREDIENT_VOCAB)  # 약 절반은 재료 키워드 없음
+    allergens = module.ALLERGEN_VOCAB
+
+    cats = list(SYNTHETIC_CATEGORIES)
+    cat_idx = rng.choice(len(cats), n_items, p=[SYNTHETIC_CATEGORIES[c][0] for c in cats])
+    brand_idx = rng.integers(0, n_brands, n_items)
+    cal = np.empty(n_items)
+    prot = np.empty(n_items)
+    price = np.empty(n_items, dtype=np.int64)
+    for c, cat in enumerate(cats):
+        rows = cat_idx == c
+        _, cal_range, prot_range, price_range = SYNTHETIC_CATEGORIES[cat]
+        cal[rows] = rng.uniform(*cal_range, rows.sum())
+        prot[rows] = rng.uniform(*prot_range, rows.sum())
+        price[rows] = rng.integers(price_range[0] // 100, price_range[1] // 100 + 1, rows.sum()) * 100
+    carbs = cal * rng.uniform(0.35, 0.65, n_items) / 4
+    fat = cal * rng.uniform(0.15, 0.40, n_items) / 9
+    sodium = rng.integers(30, 1300, n_items)
+    sat_fat = fat * rng.uniform(0.1, 0.4, n_items)
+    sugars = carbs * rng.uniform(0.0, 0.3, n_items)
+    n_allergens = rng.choice(4, n_items, p=[0.4, 0.3, 0.2, 0.1])
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for i in range(n_items):
+            cat = cats[cat_idx[i]]
+            name = f"{ingredients[rng.integers(len(ingredients))]}{keywords[cat][rng.integers(len(keywords[cat]))]} {i}"
+            item_allergens = ','.join(rng.choice(allergens, n_allergens[i], replace=False)) if n_allergens[i] else ''
+            writer.writerow([
+                f'Brand{brand_idx[i]:02d}', name, price[i], round(cal[i], 1), round(prot[i], 1), round(carbs[i], 1),
+                round(fat[i], 1), sodium[i], round(sat_fat[i], 1), round(sugars[i], 1), item_allergens, f'S{i:07d}',
+            ])
+
+
+def percentile_ms(values, q):
+    return float(np.percentile(values, q) * 1000) if values else None
+
+
+def peak_rss_mb():
+    if resource is None: return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+
+
+def timed_searches(optimizer, latencies):
+    """
+    끼니 탐색 메서드를 인스턴스 단위로 감싸 호출마다 지연을 기록 (plan_day의 재시도 1회 = 1건)
+    vectorized가 아닌 엔진의 recommend_tiered는 안에서 recommend_daily_diet를 부르므로 가장 바깥 호출만 센다.
+    """
+    depth = [0]
+    for name in ('recommend_daily_diet', 'recommend_tiered'):
+        inner = getattr(optimizer, name)
+
+        def wrapper(*args, _inner=inner, **kwargs):
+            depth[0] += 1
+            t0 = time.perf_counter()
+            try:
+                return _inner(*args, **kwargs)
+            finally:
+                depth[0] -= 1
+                if depth[0] == 0: latencies.append(time.perf_counter() - t0)
+        setattr(optimizer, name, wrapper)
+
+
+def run_size(n_items, n_brands, n_users, seed, engine, planner, profile=False):
+    """메뉴 크기 1개에 대한 측정 (별도 프로세스에서 실행)"""
+    module = load_optimizer_module()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'final_nutrition_db.csv')
+        t0 = time.perf_counter()
+        generate_menu_csv(data_path, n_items, n_brands, module, seed)
+        gen_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        optimizer = module.DailyDietOptimizer(data_path, engine=engine, use_snapshot=False, seed=seed, profile=profile)
+        if engine == 'table':
+            # 배포 때처럼 오프라인 빌드로 만든다 (get_combo_table은 빌드가 끝날 때까지, 큰 메뉴에서는 계속 exhaustive로 넘김)
+            optimizer.combo_table = module.ComboTable.build(optimizer)
+        build_s = time.perf_counter() - t0
+    store = optimizer.store
+    store_mb = sum(getattr(store, field).nbytes for field in store.ARRAY_FIELDS) / 2**20
+
+    user_gen = module.RandomUserGenerator(seed=seed)
+    users = [user_gen.generate() for _ in range(n_users + WARMUP_USERS)]
+    user_seeds = np.random.SeedSequence(seed).spawn(len(users))
+    for user, user_seed in zip(users[:WARMUP_USERS], user_seeds):
+        module.plan_day(optimizer, user, planner, np.random.default_rng(user_seed))
+
+    if optimizer.profiler is not None: optimizer.profiler.reset()  # 워밍업 제외
+    search_latencies, day_latencies, successes = [], [], 0
+    timed_searches(optimizer, search_latencies)
+    for user, user_seed in zip(users[WARMUP_USERS:], user_seeds[WARMUP_USERS:]):
+        t0 = time.perf_counter()
+        result = module.plan_day(optimizer, user, planner, np.random.default_rng(user_seed))
+        day_latencies.append(time.perf_counter() - t0)
+        successes += bool(result.get('success'))
+
+    total_s = sum(day_latencies)
+    row = {
+        'items': len(store), 'items_requested': n_items, 'brands': len(store.brand_names),
+        'engine': engine, 'planner': planner, 'users': n_users, 'seed': seed,
+        'generate_s': gen_s, 'build_s': build_s,
+        'search_count': len(search_latencies),
+        'search_p50_ms': percentile_ms(search_latencies, 50), 'search_p95_ms': percentile_ms(search_latencies, 95),
+        'day_p50_ms': percentile_ms(day_latencies, 50), 'day_p95_ms': percentile_ms(day_latencies, 95),
+        'days_per_sec_per_core': n_users / total_s if total_s else None,
+        'success_rate': successes / n_users if n_users else None,
+        'peak_rss_mb': peak_rss_mb(), 'store_mb': store_mb,
+    }
+    if optimizer.profiler is not None: row['profile'] = optimizer.profiler.to_dict()
+    return row
+
+
+def _run_size_child(conn, args):
+    conn.send(run_size(*args))
+    conn.close()
+
+
+def run_size_isolated(ctx, args):
+    """
+    run_size를 새 프로세스에서 실행. 프로세스가 결과 없이 죽으면(OOM kill, 예외 등) 기다리지 않고
+    {'items_requested', 'brands', 'error'} 실패 행을 반환한다.
+    """
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_size_child, args=(send, args))
+    proc.start()
+    send.close()  # 자식이 죽으면 recv 쪽이 EOF를 받도록 부모 쪽 송신 끝은 닫는다
+    try:
+        row = recv.recv()
+    except EOFError:
+        row = None
+    proc.join()
+    if row is None:
+        return {'items_requested': args[0], 'brands': args[1], 'error': f'worker exited with code {proc.exitcode}'}
+    return row
+
+
+def print_table(rows):
+    fmt = lambda v, spec: '-' if v is None else format(v, spec)
+    header = (f"{'items':>8} {'brands':>6} {'build s':>8} {'search p50':>11} {'p95 ms':>8} "
+              f"{'day p50':>9} {'p95 ms':>8} {'days/s/core':>12} {'success':>8} {'RSS MB':>8} {'store MB':>9}")
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        print(f"{r['items']:>8,} {r['brands']:>6} {fmt(r['build_s'], '8.2f')} {fmt(r['search_p50_ms'], '11.1f')} "
+              f"{fmt(r['search_p95_ms'], '8.1f')} {fmt(r['day_p50_ms'], '9.1f')} {fmt(r['day_p95_ms'], '8.1f')} "
+              f"{fmt(r['days_per_sec_per_core'], '12.2f')} {fmt(r['success_rate'], '8.1%')} "
+              f"{fmt(r['peak_rss_mb'], '8.0f')} {fmt(r['store_mb'], '9.2f')}")
+
+
+def print_profiles(rows):
+    """--profile: 크기별 단계 시간 비중과 탈락 사유 비율"""
+    for r in rows:
+        profile = r['profile']
+        stages = '  '.join(f"{name} {s['seconds'] * 1000:.0f}ms({s['share']:.0%})" for name, s in profile['stages'].items())
+        ratios = '  '.join(f"{reason} {ratio:.1%}" for reason, ratio in profile['rejection_ratios'].items())
+        print(f"\n[{r['items']:,} items] samples {profile['counters']['samples']:,} / feasible {profile['counters']['feasible']:,}")
+        print(f"  stages:     {stages}")
+        print(f"  rejections: {ratios}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='식단 옵티마이저 벤치마크 (합성 메뉴 DB)')
+    parser.add_argument('--items', type=int, nargs='+', default=list(DEFAULT_ITEM_COUNTS), help='메뉴 수 목록')
+    parser.add_argument('--brands', type=int, default=DEFAULT_BRANDS)
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS, help='크기별 측정 사용자 수 (워밍업 제외)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--engine', default='vectorized', choices=['vectorized', 'sampling', 'exhaustive', 'table'])
+    parser.add_argument('--planner', default='greedy', choices=['greedy', 'tiered', 'joint'])
+    parser.add_argument('--json', default=None, help='결과를 JSON 파일로 저장')
+    parser.add_argument('--profile', action='store_true', help='단계별 시간/탈락 사유 계측 (계측 비용만큼 지연이 늘어남)')
+    args = parser.parse_args()
+
+    print(f"📏 벤치마크: engine={args.engine} planner={args.planner} brands={args.brands} users={args.users} seed={args.seed}")
+    rows = []
+    ctx = multiprocessing.get_context('spawn')  # 크기마다 깨끗한 프로세스 (최대 RSS 분리)
+    for n_items in args.items:
+        rows.append(run_size_isolated(ctx, (n_items, args.brands, args.users, args.seed, args.engine, args.planner, args.profile)))
+    done = [r for r in rows if 'error' not in r]
+    failed = [r for r in rows if 'error' in r]
+    print()
+    print_table(done)
+    if args.profile: print_profiles(done)
+    for r in failed:
+        print(f"❌ {r['items_requested']:,} items: {r['error']} (메모리 부족으로 종료됐을 수 있음)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.json}")
+    if failed: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
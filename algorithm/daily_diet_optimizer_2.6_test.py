@@ -1,17 +1,25 @@
-import pandas as pd
 import numpy as np
 import random
 import os
+import re
 import sys
 import time
 import multiprocessing
-import matplotlib.pyplot as plt 
-from collections import Counter
+from multiprocessing import shared_memory
+import heapq
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
 
-# -----------------------------------------------------------
-# [설정] 차트 한글 폰트 깨짐 방지
-# -----------------------------------------------------------
-plt.rcParams['axes.unicode_minus'] = False
+# 경로로 직접 로드(load_optimizer_module)하거나 algorithm/ 밖에서 불러도 같은 폴더 모듈을 찾도록
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from nutrient_index import NutrientIndex
+
+# pandas / matplotlib은 import만으로 수백 ms가 걸려 CSV 빌드·시각화 시점에만 불러온다
+# (스냅샷으로 시작하는 워커/CLI는 둘 다 import하지 않음)
 
 # -----------------------------------------------------------
 # [제약 조건 상수 설정]
@@ -20,16 +28,72 @@ ATWATER_P = 4
 ATWATER_C = 4
 ATWATER_F = 9
 SODIUM_MAX_LIMIT = 2500
+# 끼니 추천 재시도 단계 (엄격한 순): (단백질 하한 계수, 칼로리 허용 범위, 이미 쓴 브랜드 제외 유지)
+RETRY_TIERS = [(0.95, 0.15, True), (0.70, 0.30, True), (0.70, 0.30, False)]
 SUGAR_CAL_PERCENT = 0.10
 
+# 벡터화 평가용 영양소 행렬 열 순서
+NUTRIENT_COLS = ['calories', 'protein', 'carbs', 'fat', 'sodium', 'price', 'saturated_fat', 'sugars']
+COL_CAL, COL_PROT, COL_CARBS, COL_FAT, COL_SODIUM, COL_PRICE, COL_SAT_FAT, COL_SUGARS = range(len(NUTRIENT_COLS))
+INDEX_COLS = [COL_CAL, COL_PROT, COL_FAT, COL_SODIUM]  # NutrientIndex 축 순서 (nutrient_index.DIMS)
+MENU_CATEGORIES = ['MAIN', 'SIDE', 'DRINK', 'SNACK']  # FoodCategorizer.keywords 순서 = category 코드
+MAX_COMBO_SIZE = 4  # 메인 1 + 사이드 최대 2 + 음료 최대 1
+ENGINES = ('vectorized', 'exhaustive', 'table', 'sampling')  # recommend_daily_diet(engine=...)
+EXHAUSTIVE_BLOCK_SIZE = 200000  # 전수 탐색 시 한 번에 평가하는 (사이드 옵션 x 음료) 셀 수
+BATCH_CAL_SPAN_FACTOR = 1.5  # recommend_batch가 한 번에 열거하는 칼로리 구간 폭 상한 (가장 넓은 요청 구간 대비)
+FRONTIER_HEAD_SIZE = 2048  # _cheapest_frontier가 처음 정렬해 보는 가격 하위 조합 수
+
+# 파레토 목적 (키, 방향): +1 최소화 / -1 최대화
+PARETO_OBJECTIVES = [('price', 1), ('error', 1), ('sodium', 1), ('saturated_fat', 1), ('diversity_score', -1)]
+SKYLINE_BLOCK_SIZE = 256
+VECTOR_CHUNK_SIZE = 4096  # 벡터화 샘플링 시 한 번에 평가하는 조합 수
+
+# 샘플링 조기 종료 (recommend_daily_diet(patience=..., min_feasible_rate=..., time_budget=...)로 조정, None이면 끔)
+EARLY_STOP_PATIENCE = 8192     # 최종 상위 5개(가격, 오차)가 이 샘플 수 동안 그대로면 수렴으로 보고 종료
+FEASIBLE_RATE_FLOOR = None     # 켜면(예: 1e-3) 유효 조합 0개일 때 유효율 95% 상한(3/n)이 이보다 낮으면 불가능으로 보고 종료
+                               # 드물지만 가능한 요청도 첫 묶음에서 잘라내므로 기본은 끔
+
+# 끼니 추천 결과 캐시 (DailyDietOptimizer(result_cache_size=...)로 켬)
+CACHE_CAL_STEP = 10    # kcal 단위로 목표 칼로리 양자화
+CACHE_MACRO_STEP = 1   # g 단위로 목표 단백질/지방 양자화
+CACHE_TTL_SECONDS = 600
+
 MACRO_GOAL_RATIOS = {
     "다이어트": {'P': (0.35, 0.50), 'C': (0.30, 0.45), 'F': (0.15, 0.30)},
     "건강관리": {'P': (0.25, 0.35), 'C': (0.45, 0.55), 'F': (0.15, 0.25)},
     "근육증가": {'P': (0.35, 0.45), 'C': (0.35, 0.45), 'F': (0.15, 0.25)}
 }
 
+# 알레르기 유발 물질 표시 대상 (식품 등의 표시·광고에 관한 법률 기준, 비트 순서 고정)
+ALLERGEN_VOCAB = ['난류', '우유', '메밀', '땅콩', '대두', '밀', '고등어', '게', '새우', '돼지고기',
+                  '복숭아', '토마토', '아황산류', '호두', '닭고기', '쇠고기', '오징어', '조개류', '잣']
+# 한 끼 안에서 겹치면 안 되는 핵심 재료 키워드 (메뉴명 부분 문자열 기준, 비트 순서 고정)
+INGREDIENT_VOCAB = ['참치', '치킨', '닭', '불고기', '비프', '소고기', '돼지', '돈까스', '스팸', '햄', '새우', '오징어', '제육', '갈비', '베이컨', '계란', '명란']
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'final_nutrition_db.csv')
+SNAPSHOT_VERSION = 2  # MenuStore 배열 구성/분류 규칙이 바뀌면 올린다 (이전 스냅샷은 다음 CSV 로딩 때 다시 저장)
+
+def snapshot_path_for(data_path):
+    """CSV 옆에 두는 바이너리 스냅샷 경로 (final_nutrition_db.csv -> final_nutrition_db.snapshot.npz)"""
+    return os.path.splitext(data_path)[0] + '.snapshot.npz'
+
+# 브랜드별 사전 계산 조합 표 (engine='table')
+COMBO_TABLE_VERSION = 3  # 조합 공간/가지치기 규칙이 바뀌면 올린다 (3: 같은 사이드 두 개 포함)
+COMBO_TABLE_MAX_CAL = 2500  # 이보다 무거운 조합은 표에 넣지 않음 (칼로리 상한이 더 큰 요청은 전수 탐색으로 처리)
+COMBO_TABLE_CAL_STEP = 10   # 가지치기 셀 크기 (kcal)
+COMBO_TABLE_PROT_STEP = 2   # 가지치기 셀 크기 (g)
+COMBO_TABLE_PER_CELL = 8    # 셀마다 남기는 최대 조합 수
+COMBO_TABLE_INLINE_LIMIT = 20_000_000  # 프로세스 안(백그라운드) 빌드를 허용하는 열거 조합 수 추정치 상한 (넘으면 exhaustive로 처리)
+COMBO_TABLE_MAX_EXCLUDED = 0.05  # 후보 브랜드 메뉴 중 제외 FOOD_CODE 비율이 이보다 크면 표 대신 exhaustive (셀별로 남긴 조합이 많이 빠짐)
+
+def combo_space_size(n_main, n_side, n_drink):
+    """1 메인 + 사이드 0~2개(같은 사이드 두 개 포함) + 음료 0~1개 조합 수"""
+    return n_main * (1 + n_side + n_side * (n_side + 1) // 2) * (1 + n_drink)
+
+def combo_table_path_for(data_path):
+    """CSV 옆에 두는 조합 표 경로 (final_nutrition_db.csv -> final_nutrition_db.combos.npz)"""
+    return os.path.splitext(data_path)[0] + '.combos.npz'
 
 def calculate_macro_grams(target_cal, user_goal, weight):
     protein_factors = {
@@ -63,6 +127,93 @@ def calculate_macro_grams(target_cal, user_goal, weight):
     
     return target_prot, target_carbs, target_fat
 
+def parse_allergen_mask(allergen_text):
+    """allergens_scraped 문자열 -> ALLERGEN_VOCAB 비트마스크 (기존 부분 문자열 검색과 동일한 판정)"""
+    mask = 0
+    for bit, allergen in enumerate(ALLERGEN_VOCAB):
+        if allergen in allergen_text: mask |= 1 << bit
+    return mask
+
+def parse_ingredient_mask(name):
+    """메뉴명 -> INGREDIENT_VOCAB 비트마스크 (check_name_overlap의 부분 문자열 판정과 동일)"""
+    mask = 0
+    for bit, ingredient in enumerate(INGREDIENT_VOCAB):
+        if ingredient in name: mask |= 1 << bit
+    return mask
+
+def build_allergy_mask(allergies_to_avoid):
+    """회피 알레르기 목록 -> (비트마스크, 사전에 없어 부분 문자열 검색이 필요한 항목)"""
+    mask = 0
+    unknown = []
+    for allergen in allergies_to_avoid:
+        allergen = allergen.lower()
+        if allergen in ALLERGEN_VOCAB: mask |= 1 << ALLERGEN_VOCAB.index(allergen)
+        else: unknown.append(allergen)
+    return mask, unknown
+
+def _dominated_by(points, others):
+    """(P, Q) bool 행렬: others[j]가 points[i]를 지배하면 True (목적 축별 2차원 비교로 누적)"""
+    le = np.ones((len(points), len(others)), dtype=bool)
+    lt = np.zeros((len(points), len(others)), dtype=bool)
+    for k in range(points.shape[1]):
+        p_k = points[:, k][:, None]
+        o_k = others[:, k][None, :]
+        le &= o_k <= p_k
+        lt |= o_k < p_k
+    return le & lt
+
+def pareto_front_indices(points):
+    """
+    최소화 목적 행렬 (N, M)에서 비지배(non-dominated) 행의 인덱스 반환
+    - M == 2: (목적1, 목적2) 정렬 후 누적 최소값 스윕, O(n log n)
+    - M > 2 : SFS(Sort-Filter-Skyline). 정규화 합으로 정렬하면 지배하는 점이 항상 먼저 오므로
+              블록 단위로 '지금까지의 프런티어 + 같은 블록'에게 지배되는가만 검사하면 된다.
+    완전히 같은 점들은 서로 지배하지 않으므로 함께 남는다.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n == 0: return np.empty(0, dtype=np.int64)
+    if points.ndim == 1 or points.shape[1] == 1:
+        flat = points.reshape(n)
+        return np.flatnonzero(flat == flat.min())
+
+    if points.shape[1] == 2:
+        order = np.lexsort((points[:, 1], points[:, 0]))
+        s0, s1 = points[order, 0], points[order, 1]
+        prev_min = np.concatenate([[np.inf], np.minimum.accumulate(s1)[:-1]])
+        # 동일한 점이 연속된 구간은 구간 첫 점의 판정을 그대로 따른다
+        run_start = np.concatenate([[True], (s0[1:] != s0[:-1]) | (s1[1:] != s1[:-1])])
+        run_id = np.cumsum(run_start) - 1
+        first_kept = (s1 < prev_min)[run_start]
+        return np.sort(order[first_kept[run_id]])
+
+    span = points.max(axis=0) - points.min(axis=0)
+    span[span == 0] = 1.0
+    order = np.argsort(((points - points.min(axis=0)) / span).sum(axis=1), kind='stable')
+    ordered = points[order]
+    front_mask_ordered = np.zeros(len(ordered), dtype=bool)
+    front = np.empty_like(ordered)
+    n_front = 0
+
+    for start in range(0, len(ordered), SKYLINE_BLOCK_SIZE):
+        block = ordered[start:start + SKYLINE_BLOCK_SIZE]
+        pending = np.arange(len(block))
+        # 앞쪽 프런티어 점일수록 지배력이 강하므로 청크 단위로 비교하며 살아남은 점만 계속 검사
+        for f_start in range(0, n_front, SKYLINE_BLOCK_SIZE):
+            if len(pending) == 0: break
+            chunk = front[f_start:min(f_start + SKYLINE_BLOCK_SIZE, n_front)]
+            pending = pending[~_dominated_by(block[pending], chunk).any(axis=1)]
+        if len(pending):
+            # 블록 내부 상호 비교 (지배 관계는 추이적이므로 이미 탈락한 점과의 비교는 필요 없음)
+            cand = block[pending]
+            pending = pending[~_dominated_by(cand, cand).any(axis=1)]
+
+        front_mask_ordered[start + pending] = True
+        front[n_front:n_front + len(pending)] = block[pending]
+        n_front += len(pending)
+
+    return np.sort(order[front_mask_ordered])
+
 # -----------------------------------------------------------
 # 클래스 정의
 # -----------------------------------------------------------
@@ -76,98 +227,833 @@ class FoodCategorizer:
             'DRINK': ['물', '워터', '아메리카노', '커피', '라떼', '우유', '두유', '유산균', '주스', '에이드', '콜라', '사이다', '티', '차', '음료', '비타'],
             'SNACK': ['과자', '칩', '쿠키', '빵', '케이크', '젤리', '초콜릿', '바', '아이스크림', '팝콘', '맛밤', '육포', '오징어']
         }
+        # 전체 키워드를 정규식 하나로 컴파일. 카테고리별 전방 탐색을 keywords 순서대로 시도하므로
+        # 이름 안의 위치와 무관하게 앞선 카테고리가 우선한다 (예: '치킨버거' -> MAIN). 일치한 그룹명 = 카테고리
+        self.pattern = re.compile('|'.join(
+            f"(?=.*?(?:{'|'.join(map(re.escape, kws))}))(?P<{cat}>)" for cat, kws in self.keywords.items()
+        ), re.S)
+        self._cache = {}  # 공백 제거 전 메뉴명 -> 카테고리
+
     def assign_category(self, item_name):
-        name = item_name.replace(" ", "")
-        for cat, kws in self.keywords.items():
-            if any(kw in name for kw in kws): return cat
-        return 'SIDE'
+        cat = self._cache.get(item_name)
+        if cat is None:
+            match = self.pattern.match(item_name.replace(" ", ""))
+            cat = self._cache[item_name] = match.lastgroup if match else 'SIDE'
+        return cat
+
+    def assign_categories(self, names):
+        """메뉴명 컬럼 일괄 분류: 고유 이름만 한 번씩 판정한 뒤 펼친다. 반환: 카테고리 문자열 배열"""
+        names = np.asarray(names, dtype=str)
+        if len(names) == 0: return np.empty(0, dtype=str)
+        unique, inverse = np.unique(names, return_inverse=True)
+        return np.array([self.assign_category(name) for name in unique])[inverse.reshape(-1)]
 
 class DiversityManager:
     def __init__(self):
         self.cat_keys = ['MAIN', 'SIDE', 'DRINK', 'SNACK'] 
-        # 핵심 재료 키워드 (중복 방지용)
-        self.ingredients = ['참치', '치킨', '닭', '불고기', '비프', '소고기', '돼지', '돈까스', '스팸', '햄', '새우', '오징어', '제육', '갈비', '베이컨', '계란', '명란']
+        # 카테고리 문자열 -> 정수 코드 (cat_keys에 없는 카테고리는 ETC = len(cat_keys), 원-핫 벡터가 전부 0)
+        self.cat_codes = {cat: code for code, cat in enumerate(self.cat_keys)}
+        self.etc_code = len(self.cat_keys)
+        self._name_masks = {}  # 메뉴명 -> 재료 비트마스크 (샘플링 루프에서 같은 메뉴명을 반복 검사하지 않도록)
 
-    def create_vector(self, item):
-        vector = []
-        item_cat = item.get('category_tag', 'ETC')
-        for cat in self.cat_keys:
-            vector.append(1 if cat == item_cat else 0)
-        return np.array(vector)
-
-    def calculate_hamming_distance(self, vec1, vec2):
-        return np.sum(np.abs(vec1 - vec2))
+    def category_code(self, item):
+        return self.cat_codes.get(item.get('category_tag', 'ETC'), self.etc_code)
 
     def get_diversity_score(self, combo):
+        """
+        원-핫 카테고리 벡터 쌍별 해밍 거리 평균 (벡터를 만들지 않고 카테고리별 개수로 계산)
+        다른 카테고리 쌍 = 2, ETC와 일반 카테고리 쌍 = 1, 같은 카테고리 쌍 = 0
+        """
         if len(combo) < 2: return 0.0
-        vectors = [self.create_vector(item) for item in combo]
-        distances = []
-        for i in range(len(vectors)):
-            for j in range(i + 1, len(vectors)):
-                dist = self.calculate_hamming_distance(vectors[i], vectors[j])
-                distances.append(dist)
-        return np.mean(distances) if distances else 0.0
-    
+        counts = [0] * (self.etc_code + 1)
+        for item in combo: counts[self.category_code(item)] += 1
+        return self._score_from_counts(counts, len(combo))
+
+    def _score_from_counts(self, counts, n):
+        n_etc = counts[self.etc_code]
+        known = n - n_etc
+        total = known * known - sum(c * c for c in counts[:self.etc_code]) + n_etc * known
+        return total / (n * (n - 1) / 2)
+
     def check_ingredient_overlap(self, combo):
-        if len(combo) < 2: return False
-        found_ingredients = []
-        for item in combo:
-            name = item.get('menu_name', item.get('식품명', ''))
-            for ing in self.ingredients:
-                if ing in name: found_ingredients.append(ing)
-        
-        counts = Counter(found_ingredients)
-        for ing, count in counts.items():
-            if count > 1: return True # 중복 발생
+        return self.check_name_overlap([item.get('menu_name', item.get('식품명', '')) for item in combo])
+
+    def check_name_overlap(self, names):
+        """같은 재료 키워드가 두 메뉴 이상에 있으면 True (메뉴명별 비트마스크 AND)"""
+        if len(names) < 2: return False
+        seen = 0
+        for name in names:
+            mask = self._name_masks.get(name)
+            if mask is None: mask = self._name_masks[name] = parse_ingredient_mask(name)
+            if seen & mask: return True # 중복 발생
+            seen |= mask
         return False
 
+    @staticmethod
+    def masks_overlap(masks):
+        """
+        check_name_overlap의 일괄 버전
+        masks: (N, 슬롯 수) 재료 비트마스크 배열 (빈 슬롯은 0) -> (N,) 중복 여부
+        """
+        seen = np.zeros(len(masks), dtype=masks.dtype)
+        overlap = np.zeros(len(masks), dtype=bool)
+        for slot in range(masks.shape[1]):
+            overlap |= (seen & masks[:, slot]) != 0
+            seen |= masks[:, slot]
+        return overlap
+
+class MenuStore:
+    """
+    컬럼형 메뉴 저장소 (to_dict('records') 행 dict 리스트 대체)
+    - item_id = 행 번호. nutrients는 float32 (N+1, len(NUTRIENT_COLS)), 마지막 행은 빈 슬롯(-1)용 0 패딩
+    - 브랜드/카테고리는 정수 코드, 문자열 컬럼은 고정폭 유니코드 배열
+    - views[브랜드][카테고리] = item_id 배열, 출력용 dict는 record()로 필요할 때만 생성
+    """
+    ARRAY_FIELDS = ('nutrients', 'brand_codes', 'category_codes', 'allergen_masks', 'ingredient_masks', 'names', 'food_codes', 'allergen_texts')
+    __slots__ = ARRAY_FIELDS + ('brand_names', 'views', '_segments')
+
+    def __init__(self, nutrients, brand_codes, category_codes, allergen_masks, ingredient_masks, names, food_codes, allergen_texts, brand_names):
+        self.nutrients = nutrients
+        self.brand_codes = brand_codes
+        self.category_codes = category_codes
+        self.allergen_masks = allergen_masks
+        self.ingredient_masks = ingredient_masks
+        self.names = names
+        self.food_codes = food_codes
+        self.allergen_texts = allergen_texts
+        self.brand_names = list(brand_names)
+        self.views = self._build_views()
+        self._segments = []  # attach_shared로 붙은 공유 메모리 (배열 버퍼 수명 유지용)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """전처리된 DataFrame(category_tag, allergen_mask 포함) -> MenuStore"""
+        import pandas as pd
+        n = len(df)
+        brand_col = 'store_name' if 'store_name' in df.columns else ('제조사명' if '제조사명' in df.columns else None)
+        name_col = 'menu_name' if 'menu_name' in df.columns else ('식품명' if '식품명' in df.columns else None)
+
+        brands = df[brand_col].fillna('Unknown').astype(str) if brand_col else pd.Series(['Unknown'] * n)
+        brand_codes, brand_names = pd.factorize(brands, sort=False)
+        category_index = {cat: code for code, cat in enumerate(MENU_CATEGORIES)}
+
+        nutrients = np.zeros((n + 1, len(NUTRIENT_COLS)), dtype=np.float32)
+        nutrients[:n] = df[NUTRIENT_COLS].to_numpy(dtype=np.float32)
+
+        def text_column(col):
+            if col is None or col not in df.columns: return np.full(n, '', dtype=str)
+            return np.array(df[col].fillna('').astype(str).tolist(), dtype=str)
+
+        names = text_column(name_col)
+        return cls(
+            nutrients=nutrients,
+            brand_codes=brand_codes.astype(np.int32),
+            category_codes=df['category_tag'].map(category_index).to_numpy(dtype=np.int8),
+            allergen_masks=df['allergen_mask'].to_numpy(dtype=np.int64),
+            ingredient_masks=np.array([parse_ingredient_mask(name) for name in names], dtype=np.int64),
+            names=names,
+            food_codes=text_column('FOOD_CODE'),
+            allergen_texts=text_column('allergens_scraped'),
+            brand_names=[str(b) for b in brand_names],
+        )
+
+    def _build_views(self):
+        """(브랜드, 카테고리)별 item_id 배열. 정렬 한 번으로 그룹을 나눈다."""
+        n_cat = len(MENU_CATEGORIES)
+        keys = self.brand_codes.astype(np.int64) * n_cat + self.category_codes
+        order = np.argsort(keys, kind='stable')
+        bounds = np.searchsorted(keys[order], np.arange(len(self.brand_names) * n_cat + 1))
+        views = {}
+        for b_code, brand in enumerate(self.brand_names):
+            views[brand] = {
+                cat: order[bounds[b_code * n_cat + c]:bounds[b_code * n_cat + c + 1]]
+                for c, cat in enumerate(MENU_CATEGORIES)
+            }
+        return views
+
+    @staticmethod
+    def source_signature(data_path):
+        """스냅샷 신선도 판단용 원본 CSV (크기, mtime_ns). 파일이 없으면 None"""
+        try:
+            st = os.stat(data_path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def save_snapshot(self, path, data_path=None):
+        """
+        배열 컬럼을 비압축 .npz로 저장 (pickle 없이 로드 가능한 dtype만 사용)
+        data_path를 주면 원본 CSV 시그니처를 함께 기록해 CSV가 바뀌면 스냅샷을 무효화한다.
+        """
+        signature = self.source_signature(data_path) if data_path else None
+        arrays = {field: np.ascontiguousarray(getattr(self, field)) for field in self.ARRAY_FIELDS}
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"  # 여러 프로세스가 동시에 다시 써도 임시 파일이 겹치지 않게
+        np.savez(
+            tmp_path,
+            version=np.int64(SNAPSHOT_VERSION),
+            source_signature=np.array(signature if signature else (-1, -1), dtype=np.int64),
+            brand_names=np.array(self.brand_names, dtype=str),
+            category_names=np.array(MENU_CATEGORIES, dtype=str),
+            allergen_vocab=np.array(ALLERGEN_VOCAB, dtype=str),
+            ingredient_vocab=np.array(INGREDIENT_VOCAB, dtype=str),
+            **arrays,
+        )
+        os.replace(tmp_path, path)  # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 원자적 교체
+
+    @classmethod
+    def load_snapshot(cls, path, data_path=None):
+        """
+        save_snapshot 결과를 pandas 없이 로드. 버전/분류 체계가 다르거나
+        data_path의 CSV가 스냅샷 이후 바뀌었으면 None (호출 측이 CSV에서 다시 빌드)
+        """
+        if not os.path.exists(path): return None
+        with np.load(path, allow_pickle=False) as z:
+            if int(z['version']) != SNAPSHOT_VERSION: return None
+            if z['category_names'].tolist() != MENU_CATEGORIES or z['allergen_vocab'].tolist() != ALLERGEN_VOCAB:
+                return None
+            if z['ingredient_vocab'].tolist() != INGREDIENT_VOCAB: return None
+            if data_path:
+                signature = cls.source_signature(data_path)
+                if signature is not None and tuple(z['source_signature'].tolist()) != signature: return None
+            arrays = {field: z[field] for field in cls.ARRAY_FIELDS}
+            return cls(brand_names=z['brand_names'].tolist(), **arrays)
+
+    def to_shared_memory(self):
+        """
+        배열 컬럼을 multiprocessing.shared_memory에 복사해 게시
+        반환: (워커에 넘길 picklable 핸들, 부모가 close/unlink 해야 하는 SharedMemory 목록)
+        """
+        handle = {'brand_names': self.brand_names, 'arrays': {}}
+        segments = []
+        for field in self.ARRAY_FIELDS:
+            arr = np.ascontiguousarray(getattr(self, field))
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            handle['arrays'][field] = (shm.name, arr.shape, arr.dtype.str)
+            segments.append(shm)
+        return handle, segments
+
+    @classmethod
+    def attach_shared(cls, handle):
+        """to_shared_memory 핸들로 복사 없이(zero-copy) 배열을 붙여 MenuStore 생성 (읽기 전용)"""
+        arrays, segments = {}, []
+        for field, (name, shape, dtype) in handle['arrays'].items():
+            try:
+                shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+            except TypeError:
+                shm = shared_memory.SharedMemory(name=name)
+            arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            arr.flags.writeable = False
+            arrays[field] = arr
+            segments.append(shm)
+        store = cls(brand_names=handle['brand_names'], **arrays)
+        store._segments = segments
+        return store
+
+    def __len__(self):
+        return len(self.brand_codes)
+
+    def fingerprint(self):
+        """메뉴 내용 체크섬 (저장소에서 파생된 ComboTable이 같은 메뉴로 만들어졌는지 확인용)"""
+        crc = zlib.crc32('\x1f'.join(self.brand_names).encode('utf-8'))
+        for field in ('nutrients', 'brand_codes', 'category_codes', 'ingredient_masks'):
+            crc = zlib.crc32(np.ascontiguousarray(getattr(self, field)).tobytes(), crc)
+        return crc
+
+    def record(self, item_id):
+        """출력/호환용 dict (기존 menu_items 행과 같은 키)"""
+        item = {
+            'item_id': int(item_id),
+            'store_name': self.brand_names[self.brand_codes[item_id]],
+            'menu_name': str(self.names[item_id]),
+            'FOOD_CODE': str(self.food_codes[item_id]) or None,
+            'category_tag': MENU_CATEGORIES[self.category_codes[item_id]],
+            'allergens_scraped': str(self.allergen_texts[item_id]),
+            'allergen_mask': int(self.allergen_masks[item_id]),
+        }
+        for k, col in enumerate(NUTRIENT_COLS):
+            item[col] = round(float(self.nutrients[item_id, k]), 4)
+        item['price'] = int(round(item['price']))
+        return item
+
+class ComboTable:
+    """
+    브랜드별 조합 표 (메뉴 CSV가 바뀔 때만 오프라인으로 재생성)
+    - 1 메인 + 사이드 0~2개 + 음료 0~1개 중 재료 중복이 없고 끼니 나트륨 조건을 만족하며 칼로리 max_cal 이하인 조합
+    - 조합 수는 브랜드 메뉴 수의 세제곱으로 늘어나므로 전부 저장하지 않고 (칼로리, 단백질) 셀마다 가지치기:
+      셀 안에서 가격순으로 훑어 더 싼 조합보다 지방 또는 나트륨이 낮은 조합(가격-지방 / 가격-나트륨 계단)만 남기고,
+      그중 싼 순으로 per_cell개까지 저장한다. 셀 안의 조합은 칼로리·단백질이 거의 같아 오차 차이가 주로 지방/나트륨에서 나온다.
+      따라서 결과는 exhaustive의 근사다 (질의 범위 경계에 걸친 셀과 포화지방/다양성만 다른 조합에서 차이가 날 수 있음)
+    - 브랜드 구간(brand_starts)마다 칼로리 오름차순: 칼로리 범위는 이진 탐색, 단백질은 그 구간 안에서만 검사
+    ids (K, MAX_COMBO_SIZE) int32 / totals (K, len(NUTRIENT_COLS)) float32 / diversity (K,) float32
+    """
+    ARRAY_FIELDS = ('ids', 'totals', 'diversity', 'brand_starts')
+    QUERY_TOL = 1e-2  # float32 합계 반올림 여유. 경계 판정은 호출 측이 float64 합계로 다시 한다
+    PRUNE_BATCH = 1_000_000  # 빌드 중 이만큼 쌓이면 중간 가지치기 (메모리 상한)
+
+    def __init__(self, ids, totals, diversity, brand_starts, brand_names, max_cal, fingerprint):
+        self.ids = ids
+        self.totals = totals
+        self.diversity = diversity
+        self.brand_starts = brand_starts
+        self.brand_names = list(brand_names)
+        self.brand_index = {brand: b for b, brand in enumerate(self.brand_names)}
+        self.max_cal = float(max_cal)
+        self.fingerprint = int(fingerprint)
+        self._indexes = {}  # 브랜드 번호 -> 구간 NutrientIndex (첫 질의 때 생성)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def estimate_combos(store, max_cal=COMBO_TABLE_MAX_CAL):
+        """빌드 때 열거할 조합 수 상한 추정 (단품 칼로리/나트륨 상한만 반영, 요청 중 빌드 허용 여부 판단용)"""
+        nm = store.nutrients
+        total = 0
+        for brand in store.brand_names:
+            fits = lambda ids: int(np.count_nonzero((nm[ids, COL_CAL] <= max_cal) & (nm[ids, COL_SODIUM] <= SODIUM_MAX_LIMIT * 0.6)))
+            cats = store.views[brand]
+            n_main, n_side, n_drink = fits(cats['MAIN']), fits(cats['SIDE']), fits(cats['DRINK'])
+            total += combo_space_size(n_main, n_side, n_drink)
+        return total
+
+    @staticmethod
+    def prune(ids, totals, per_cell=COMBO_TABLE_PER_CELL):
+        """(칼로리, 단백질) 셀별 가격-지방 / 가격-나트륨 계단에 드는 조합 중 싼 순 per_cell개의 행 번호"""
+        if len(ids) == 0: return np.empty(0, dtype=np.int64)
+        prot_cells = int(totals[:, COL_PROT].max() // COMBO_TABLE_PROT_STEP) + 1
+        cell = (totals[:, COL_CAL] // COMBO_TABLE_CAL_STEP).astype(np.int64) * prot_cells \
+            + (totals[:, COL_PROT] // COMBO_TABLE_PROT_STEP).astype(np.int64)
+        order = np.lexsort((totals[:, COL_SODIUM], totals[:, COL_FAT], totals[:, COL_PRICE], cell))
+        cell = cell[order]
+        first = np.r_[True, cell[1:] != cell[:-1]]
+        cell_rank = np.cumsum(first) - 1
+
+        def staircase(values):
+            # 셀이 바뀔 때마다 값 범위보다 큰 폭씩 내려 주면 누적 최솟값이 셀 단위로 초기화된다
+            values = values[order]
+            shifted = values - cell_rank * (values.max() - values.min() + 1.0)
+            running = np.minimum.accumulate(shifted)
+            return shifted < np.r_[np.inf, running[:-1]]
+
+        keep = staircase(totals[:, COL_FAT]) | staircase(totals[:, COL_SODIUM])
+        rows, kept_cells = order[keep], cell[keep]
+        starts = np.flatnonzero(np.r_[True, kept_cells[1:] != kept_cells[:-1]])
+        position = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        return rows[position < per_cell]
+
+    @classmethod
+    def build(cls, optimizer, max_cal=COMBO_TABLE_MAX_CAL, per_cell=COMBO_TABLE_PER_CELL):
+        """
+        optimizer.store의 브랜드별 전체 메뉴로 조합 공간을 열거 (칼로리 0~max_cal, 단백질 하한 없음)
+        메인 단위로 열거하고 PRUNE_BATCH마다 가지치기해 한 번에 메모리에 올리는 조합 수를 제한한다.
+        """
+        store = optimizer.store
+        nm = store.nutrients
+        chunks, starts = [], [0]
+        for brand in store.brand_names:
+            cats = store.views[brand]
+            pending, n_pending = [], 0
+            kept = np.empty((0, MAX_COMBO_SIZE), dtype=np.int64)
+            for m in range(len(cats['MAIN'])):
+                ids = optimizer._enumerate_feasible_combos(cats['MAIN'][m:m + 1], cats['SIDE'], cats['DRINK'], max_cal / 2, 0, 0.0, 1.0)
+                ids = ids[~optimizer.combo_overlaps(ids)]
+                pending.append(ids)
+                n_pending += len(ids)
+                if n_pending >= cls.PRUNE_BATCH:
+                    kept = np.vstack([kept] + pending)
+                    kept = kept[cls.prune(kept, nm[kept].sum(axis=1, dtype=np.float64), per_cell)]
+                    pending, n_pending = [], 0
+            kept = np.vstack([kept] + pending)
+            totals = nm[kept].sum(axis=1, dtype=np.float64)
+            rows = cls.prune(kept, totals, per_cell)
+            rows = rows[np.argsort(totals[rows, COL_CAL], kind='stable')]
+            chunks.append((kept[rows], totals[rows], optimizer._slot_diversity_scores(kept[rows])))
+            starts.append(starts[-1] + len(rows))
+        return cls(
+            ids=np.vstack([c[0] for c in chunks]).astype(np.int32) if chunks else np.empty((0, MAX_COMBO_SIZE), dtype=np.int32),
+            totals=np.vstack([c[1] for c in chunks]).astype(np.float32) if chunks else np.empty((0, len(NUTRIENT_COLS)), dtype=np.float32),
+            diversity=np.concatenate([c[2] for c in chunks]).astype(np.float32) if chunks else np.empty(0, dtype=np.float32),
+            brand_starts=np.array(starts, dtype=np.int64),
+            brand_names=store.brand_names, max_cal=max_cal, fingerprint=store.fingerprint(),
+        )
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"  # 여러 프로세스가 동시에 다시 써도 임시 파일이 겹치지 않게
+        np.savez(
+            tmp_path,
+            version=np.int64(COMBO_TABLE_VERSION),
+            brand_names=np.array(self.brand_names, dtype=str),
+            max_cal=np.float64(self.max_cal),
+            fingerprint=np.int64(self.fingerprint),
+            **{field: getattr(self, field) for field in self.ARRAY_FIELDS},
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, store):
+        """버전이 다르거나 store와 다른 메뉴로 만든 표면 None (호출 측이 다시 빌드)"""
+        if not os.path.exists(path): return None
+        with np.load(path, allow_pickle=False) as z:
+            if int(z['version']) != COMBO_TABLE_VERSION or int(z['fingerprint']) != store.fingerprint(): return None
+            return cls(
+                brand_names=z['brand_names'].tolist(), max_cal=float(z['max_cal']), fingerprint=int(z['fingerprint']),
+                **{field: z[field] for field in cls.ARRAY_FIELDS}
+            )
+
+    def query(self, brand, cal_lo, cal_hi, prot_min):
+        """brand 구간에서 칼로리 [cal_lo, cal_hi], 단백질 prot_min 이상인 조합의 표 행 번호 (int64)"""
+        b = self.brand_index.get(brand)
+        if b is None: return np.empty(0, dtype=np.int64)
+        start, stop = self.brand_starts[b], self.brand_starts[b + 1]
+        index = self._indexes.get(b)
+        if index is None: index = self._indexes[b] = NutrientIndex(self.totals[start:stop][:, INDEX_COLS])
+        tol = self.QUERY_TOL
+        return start + index.query(lo=(cal_lo - tol, prot_min - tol, None, None), hi=(cal_hi + tol, None, None, None))
+
+class ParetoAccumulator:
+    """
+    유효 조합이 들어오는 대로 비지배(파레토) 집합만 유지하는 누적기
+    valid_combinations 전체를 쌓지 않으며, 이미 있는 점과 같은 조합(중복 샘플)은 받지 않는다.
+    """
+    def __init__(self, objectives=PARETO_OBJECTIVES):
+        self.objectives = objectives
+        self.points = np.empty((0, len(objectives)))
+        self.items = []
+
+    def point_of(self, candidate):
+        return np.array([sign * candidate[key] for key, sign in self.objectives], dtype=np.float64)
+
+    def push(self, candidate):
+        """후보 1개 추가, 프런티어에 들어가면 True"""
+        point = self.point_of(candidate)
+        if len(self.points) and (self.points <= point).all(axis=1).any(): return False
+        keep = ~((point <= self.points).all(axis=1) & (point < self.points).any(axis=1))
+        self.points = np.vstack([self.points[keep], point])
+        self.items = [item for item, k in zip(self.items, keep) if k] + [candidate]
+        return True
+
+    def push_batch(self, points, make_candidate):
+        """
+        목적 행렬 (B, M) 일괄 추가. 프런티어에 새로 들어가는 행만 make_candidate(row)로 dict를 만든다.
+        반환: 새로 들어간 조합 수
+        """
+        if len(points) == 0: return 0
+        _, first = np.unique(points, axis=0, return_index=True)
+        rows = np.sort(first)
+        if len(self.points):
+            covered = np.zeros(len(rows), dtype=bool)
+            for k in range(len(self.points)):
+                covered |= (self.points[k] <= points[rows]).all(axis=1)
+            rows = rows[~covered]
+        if len(rows) == 0: return 0
+
+        merged = np.vstack([self.points, points[rows]])
+        front = pareto_front_indices(merged)
+        n_old = len(self.points)
+        old_kept = front[front < n_old]
+        new_rows = rows[front[front >= n_old] - n_old]
+
+        self.points = np.vstack([self.points[old_kept], points[new_rows]])
+        self.items = [self.items[i] for i in old_kept] + [make_candidate(r) for r in new_rows]
+        return len(new_rows)
+
+    def results(self):
+        return list(self.items)
+
+class TopKAccumulator:
+    """
+    (가격, 오차) 기준 상위 k개만 힙으로 유지하는 누적기 (기존 '가격순 상위 5개' 동작)
+    같은 조합(브랜드 + item_id 구성)이 다시 뽑혀도 한 자리만 차지한다.
+    """
+    def __init__(self, k=5):
+        self.k = k
+        self.heap = []  # (-price, -error, seq, key, candidate): 루트가 현재 가장 나쁜 조합
+        self.keys = set()
+        self.seq = 0
+
+    @staticmethod
+    def key_of(candidate):
+        return candidate['brand'], tuple(sorted(item['item_id'] for item in candidate['combo']))
+
+    def _admit(self, price, error):
+        return len(self.heap) < self.k or (price, error) < (-self.heap[0][0], -self.heap[0][1])
+
+    def _insert(self, price, error, candidate):
+        """새 조합이면 넣고 True, 이미 있는 조합이면 False"""
+        key = self.key_of(candidate)
+        if key in self.keys: return False
+        entry = (-price, -error, self.seq, key, candidate)
+        self.seq += 1
+        if len(self.heap) < self.k: heapq.heappush(self.heap, entry)
+        else: self.keys.discard(heapq.heapreplace(self.heap, entry)[3])
+        self.keys.add(key)
+        return True
+
+    def push(self, candidate):
+        if not self._admit(candidate['price'], candidate['error']): return False
+        return self._insert(candidate['price'], candidate['error'], candidate)
+
+    def push_batch(self, prices, errors, make_candidate):
+        admitted = 0
+        for row in np.lexsort((errors, prices)):
+            if not self._admit(prices[row], errors[row]): break
+            admitted += self._insert(prices[row], errors[row], make_candidate(row))
+        return admitted
+
+    def results(self):
+        return [entry[4] for entry in sorted(self.heap, key=lambda e: (-e[0], -e[1]))]
+
+class FrontierRows:
+    """
+    조합 블록이 들어오는 대로 비지배 행만 배열로 유지하는 스트리밍 프런티어 (전수 탐색용)
+    모든 블록을 모은 뒤 pareto_front_indices를 구한 것과 같은 행을 같은 순서로 남긴다 (같은 점끼리는 함께 남음).
+    열 배열(columns)은 행과 같이 잘라 보관하므로 메모리는 프런티어 크기에 비례한다.
+    """
+    def __init__(self, n_objectives):
+        self.points = np.empty((0, n_objectives))
+        self.columns = None
+        self.probe_order = np.empty(0, dtype=np.int64)  # 정규화 합 오름차순 (많이 지배하는 점부터 비교)
+
+    def __len__(self):
+        return len(self.points)
+
+    @staticmethod
+    def _strength(points):
+        """정규화한 목적값 합 (작을수록 다른 점을 많이 지배)"""
+        span = np.ptp(points, axis=0)
+        span[span == 0] = 1.0
+        return ((points - points.min(axis=0)) / span).sum(axis=1)
+
+    def dominated(self, points):
+        """
+        (B,) bool: 현재 프런티어의 어떤 점에 지배되는 행
+        지배력이 강한 점부터 작은 묶음으로 비교해, 대부분의 행이 앞쪽 몇 점에서 걸러지면 나머지 비교를 건너뛴다.
+        """
+        out = np.zeros(len(points), dtype=bool)
+        start, block = 0, 4
+        while start < len(self.points):
+            pending = np.flatnonzero(~out)
+            if len(pending) == 0: break
+            chunk = self.points[self.probe_order[start:start + block]]
+            out[pending] = _dominated_by(points[pending], chunk).any(axis=1)
+            start += block
+            block = min(block * 2, SKYLINE_BLOCK_SIZE)
+        return out
+
+    def push(self, points, **columns):
+        """목적 행렬 (B, M)과 같은 길이의 열 배열들을 추가. 반환: 새로 프런티어에 들어간 행 수"""
+        rows = np.flatnonzero(~self.dominated(points))
+        if len(rows) > SKYLINE_BLOCK_SIZE:
+            # 큰 블록은 블록 안에서 지배력이 강한 점들의 프런티어로 먼저 거른다 (어떤 점에든 지배되면 프런티어 밖)
+            seeds = FrontierRows(points.shape[1])
+            seeds.push(points[rows[np.argpartition(self._strength(points[rows]), SKYLINE_BLOCK_SIZE)[:SKYLINE_BLOCK_SIZE]]])
+            rows = rows[~seeds.dominated(points[rows])]
+        if len(rows) == 0: return 0
+        if self.columns is None:
+            self.columns = {name: values[:0] for name, values in columns.items()}
+        merged = np.vstack([self.points, points[rows]])
+        keep = pareto_front_indices(merged)
+        n_old = len(self.points)
+        self.points = merged[keep]
+        self.columns = {name: np.concatenate([self.columns[name], values[rows]])[keep] for name, values in columns.items()}
+        self.probe_order = np.argsort(self._strength(self.points), kind='stable')
+        return int(np.count_nonzero(keep >= n_old))
+
+class EarlyStopper:
+    """
+    샘플링 루프 조기 종료 판정 + 실제 사용 샘플 수 기록
+    - 수렴: 누적기의 최종 출력(가격, 오차 상위 5개)이 patience 샘플 동안 바뀌지 않음
+    - 불가능: 유효 조합 0개로 n개를 뽑았을 때 유효율 95% 상한 3/n(rule of three)이 min_feasible_rate 미만
+    - 시간 예산: time_budget초 초과
+    """
+    def __init__(self, patience=EARLY_STOP_PATIENCE, min_feasible_rate=FEASIBLE_RATE_FLOOR, time_budget=None):
+        self.patience = patience
+        self.min_feasible_rate = min_feasible_rate
+        self.time_budget = time_budget
+        self.started = time.perf_counter()
+        self.samples = 0
+        self.feasible = 0
+        self.last_improved = 0
+        self.signature = ()
+        self.reason = None  # None(끝까지 샘플링) | 'converged' | 'infeasible' | 'time_budget'
+
+    def update(self, accumulator, n_samples, n_feasible, admitted):
+        """샘플 n_samples개 처리 후 호출. 멈춰야 하면 True"""
+        self.samples += n_samples
+        self.feasible += n_feasible
+        if admitted:
+            # 프런티어에 들어갔어도 최종 상위 5개가 그대로면 개선으로 치지 않는다
+            top = sorted((c['price'], c['error']) for c in accumulator.results())[:5]
+            signature = tuple(top)
+            if signature != self.signature:
+                self.signature = signature
+                self.last_improved = self.samples
+
+        if self.feasible == 0:
+            if self.min_feasible_rate and 3.0 / self.samples < self.min_feasible_rate: self.reason = 'infeasible'
+        elif self.patience and self.samples - self.last_improved >= self.patience:
+            self.reason = 'converged'
+        if self.reason is None and self.time_budget is not None and time.perf_counter() - self.started > self.time_budget:
+            self.reason = 'time_budget'
+        return self.reason is not None
+
+    def stats(self):
+        return {'samples': self.samples, 'feasible': self.feasible, 'stop_reason': self.reason,
+                'elapsed': time.perf_counter() - self.started}
+
+class RecommendationCache:
+    """
+    recommend_daily_diet 결과 LRU + TTL 캐시 (스레드 안전, 상주 서비스용)
+    실패 문자열도 그대로 저장해 같은 조건의 재탐색을 막는다. 반환값은 공유 객체이므로 수정하지 말 것.
+    """
+    def __init__(self, max_size=4096, ttl=CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (만료 시각, 결과)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None: del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+class StageProfiler:
+    """
+    끼니 탐색 단계별 계측 (DailyDietOptimizer(profile=True)로 켬, 끄면 계측 코드가 전혀 돌지 않음)
+    - 단계별 wall time / 호출 수. 단계 안에서 다른 단계를 부르면 그 시간은 안쪽 단계에만 잡힌다 (자기 시간)
+      filtering(후보 풀) / sampling(조합 샘플링·전수 열거) / error(영양 합계·오차·조건 판정)
+      overlap(재료 중복 검사) / diversity(다양성 점수) / frontier(누적기·파레토 선택)
+    - 카운터: 요청 수, 평가한 조합 수(samples), 모든 검사를 통과한 조합 수(feasible)
+      exhaustive 엔진은 상/하한·분기 한정으로 평가 전에 버린 조합을 pruned로 따로 센다 (samples + pruned = 후보 풀 조합 공간).
+      이때 samples는 이미 영양 조건을 통과한 조합만이라 feasible/samples가 샘플링 엔진의 유효율과 뜻이 다르다
+    - 탈락 사유별 조합 수: 영양 조건(protein/calories/sodium)은 사유마다 따로 센다 (한 조합이 여러 사유에 중복 집계)
+      검사 순서는 엔진마다 다르고 앞 검사에서 걸러진 조합은 뒤 사유에 잡히지 않는다
+      (vectorized/exhaustive/table: 영양 조건 -> 재료 중복, sampling: 재료 중복 -> 다양성 0 -> 영양 조건)
+    - to_dict() / to_json() / to_prometheus()로 내보냄. 스레드 안전 (상주 서비스에서 공유)
+    """
+    STAGES = ('filtering', 'sampling', 'error', 'overlap', 'diversity', 'frontier')
+    REJECTIONS = ('overlap', 'zero_diversity', 'protein', 'calories', 'sodium')
+    COUNTERS = ('requests', 'samples', 'feasible', 'pruned')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 스레드별 진행 중인 단계의 자식 시간 스택
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stage_seconds = dict.fromkeys(self.STAGES, 0.0)
+            self.stage_calls = dict.fromkeys(self.STAGES, 0)
+            self.counters = dict.fromkeys(self.COUNTERS, 0)
+            self.rejections = dict.fromkeys(self.REJECTIONS, 0)
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            child = stack.pop()
+            if stack: stack[-1] += elapsed
+            with self._lock:
+                self.stage_seconds[name] += elapsed - child
+                self.stage_calls[name] += 1
+
+    def add(self, **counts):
+        """카운터/탈락 사유 누적: add(samples=n, feasible=k, overlap=m, ...)"""
+        with self._lock:
+            for key, n in counts.items():
+                target = self.counters if key in self.counters else self.rejections
+                target[key] += int(n)
+
+    def add_constraints(self, is_protein_min_met, is_cal_valid, is_sodium_valid):
+        """영양 조건 판정 배열 -> 사유별 탈락 수"""
+        self.add(
+            protein=np.count_nonzero(~is_protein_min_met), calories=np.count_nonzero(~is_cal_valid),
+            sodium=np.count_nonzero(~is_sodium_valid),
+        )
+
+    def to_dict(self):
+        with self._lock:
+            seconds, calls = dict(self.stage_seconds), dict(self.stage_calls)
+            counters, rejections = dict(self.counters), dict(self.rejections)
+        total = sum(seconds.values())
+        samples = counters['samples']
+        return {
+            'stages': {
+                name: {'seconds': seconds[name], 'calls': calls[name], 'share': seconds[name] / total if total else 0.0}
+                for name in self.STAGES
+            },
+            'counters': counters,
+            'rejections': rejections,
+            'rejection_ratios': {reason: n / samples if samples else 0.0 for reason, n in rejections.items()},
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix='diet_optimizer'):
+        """Prometheus 텍스트 노출 형식 (counter)"""
+        data = self.to_dict()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value:.9g}")
+
+        stages = data['stages']
+        metric('stage_seconds_total', '탐색 단계별 누적 시간 (초, 안쪽 단계 제외)',
+               [(f'{{stage="{name}"}}', s['seconds']) for name, s in stages.items()])
+        metric('stage_calls_total', '탐색 단계별 호출 수',
+               [(f'{{stage="{name}"}}', s['calls']) for name, s in stages.items()])
+        for key, value in data['counters'].items():
+            metric(f'{key}_total', f'누적 {key} 수', [('', value)])
+        metric('rejections_total', '탈락 사유별 조합 수 (영양 조건 사유는 중복 집계)',
+               [(f'{{reason="{reason}"}}', n) for reason, n in data['rejections'].items()])
+        return '\n'.join(lines) + '\n'
+
+def profiled(stage):
+    """DailyDietOptimizer 메서드 전체를 StageProfiler 단계로 계측 (profiler가 없으면 그대로 호출)"""
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None: return method(self, *args, **kwargs)
+            with self.profiler.stage(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
 class DailyDietOptimizer:
-    def __init__(self, data_path=DATA_PATH):
-        print("⚙️ AI 추천 엔진 초기화 중 (v2.6_test: 3-Stage Retry + Visualization)...")
-        if not os.path.exists(data_path):
+    def __init__(self, data_path=DATA_PATH, engine='vectorized', store=None, use_snapshot=True, result_cache_size=0, seed=None, profile=False):
+        print("⚙️ AI 추천 엔진 초기화 중 (v2.6_test: vectorized/exhaustive/table/sampling 엔진 + 3단계 재시도)...")
+        self.categorizer = FoodCategorizer()
+        self.div_manager = DiversityManager()
+        if engine not in ENGINES: raise ValueError(f"미지원 엔진: {engine}")
+        self.engine = engine  # 'vectorized' (NumPy 일괄 평가) | 'exhaustive' (전수 탐색) | 'table' (사전 계산 조합 표) | 'sampling' (기존 루프)
+        self._safe_ids_cache = {}  # (brand, 알레르기 비트마스크) -> {cat: 안전 item_id 배열} (사전에 있는 알레르기만)
+        # 샘플링 엔진 기본 난수원. 호출별로 rng= (Generator 또는 시드)를 넘기면 그쪽을 쓴다.
+        self.rng = np.random.default_rng(seed)
+        self._day_planner = None  # plan_day(planner='joint')용 JointDayPlanner (웜 스타트 힌트 유지)
+        # 0이면 끔. 켜면 목표치를 CACHE_*_STEP 격자로 맞춘 뒤 계산해 같은 격자의 요청끼리 결과를 공유
+        self.result_cache = RecommendationCache(result_cache_size) if result_cache_size else None
+        self.combo_table = None  # engine='table'용 ComboTable (첫 사용 시 디스크에서 로드, 없으면 백그라운드 빌드)
+        self._combo_table_refused = False  # 메모리 빌드 한도 초과(또는 빌드 실패)로 표 없이 exhaustive로 처리 중
+        self._combo_table_builder = None  # 빌드 중인 백그라운드 스레드
+        self._combo_table_lock = threading.Lock()
+        self.item_index = None  # 메뉴 단품 NutrientIndex (후보 풀 가지치기, 첫 사용 시 생성)
+        self.data_path = data_path
+        self.profiler = StageProfiler() if profile else None  # 단계별 시간/탈락 사유 계측 (끄면 None)
+
+        # 이미 만들어진(예: 공유 메모리에 붙은) 저장소가 있으면 CSV 로딩/분류를 건너뛴다
+        if store is not None:
+            self.store = store
+            return
+
+        if not os.path.exists(data_path) and not os.path.exists(snapshot_path_for(data_path)):
             data_path = 'final_nutrition_db.csv' 
             if not os.path.exists(data_path):
                 data_path = os.path.join('data', 'processed', 'final_nutrition_db.csv')
-            if not os.path.exists(data_path):
-                raise FileNotFoundError(f"❌ 데이터 파일이 없습니다: {data_path}")
-        
-        self.df = pd.read_csv(data_path)
-        self.df = self.df[(self.df['price'] > 500) & (self.df['calories'] > 10)]
+        self.data_path = data_path
+
+        # 빌드된 바이너리 스냅샷이 최신이면 pandas 없이 바로 매핑
+        if use_snapshot:
+            self.store = MenuStore.load_snapshot(snapshot_path_for(data_path), data_path)
+            if self.store is not None: return
+
+        if not os.path.exists(data_path):
+            raise FileNotFoundError(f"❌ 데이터 파일이 없습니다: {data_path}")
+        self.store = self._build_store_from_csv(data_path)
+        if use_snapshot:
+            # 스냅샷이 없거나 오래됐으면 다시 써 두어 다음 시작부터는 pandas 경로를 타지 않게 한다
+            try:
+                self.store.save_snapshot(snapshot_path_for(data_path), data_path)
+            except OSError as e:
+                print(f"⚠️ 스냅샷 저장 실패 (CSV로 계속 진행): {e}")
+
+    def _build_store_from_csv(self, data_path):
+        """CSV 로딩 + 숫자 변환 + 알레르기 파싱 + 카테고리 분류 (스냅샷이 없을 때만 수행)"""
+        import pandas as pd
+        df = pd.read_csv(data_path)
+        df = df[(df['price'] > 500) & (df['calories'] > 10)]
         numeric_cols = ['calories', 'protein', 'carbs', 'fat', 'sodium', 'saturated_fat', 'sugars', 'price']
         for col in numeric_cols:
-             self.df[col] = pd.to_numeric(self.df[col], errors='coerce').fillna(0)
+             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
 
-        if 'allergens_scraped' in self.df.columns:
-            self.df['allergens_scraped'] = self.df['allergens_scraped'].astype(str).str.lower()
+        if 'allergens_scraped' in df.columns:
+            df['allergens_scraped'] = df['allergens_scraped'].astype(str).str.lower()
         else:
-            self.df['allergens_scraped'] = ""
+            df['allergens_scraped'] = ""
+        # 알레르기 문자열은 초기화 시 한 번만 파싱
+        df['allergen_mask'] = df['allergens_scraped'].map(parse_allergen_mask)
         
-        self.categorizer = FoodCategorizer()
-        self.df['category_tag'] = self.df.apply(
-            lambda x: self.categorizer.assign_category(x.get('menu_name', x.get('식품명', ''))), axis=1
-        )
+        name_col = 'menu_name' if 'menu_name' in df.columns else ('식품명' if '식품명' in df.columns else None)
+        names = df[name_col].fillna('').astype(str) if name_col else [''] * len(df)
+        df['category_tag'] = self.categorizer.assign_categories(names)
         
-        self.menu_items = self.df.to_dict('records')
-        self.brand_menu_map = {}
-        for item in self.menu_items:
-            brand = item.get('store_name', item.get('제조사명', 'Unknown'))
-            cat = item['category_tag']
-            if brand not in self.brand_menu_map:
-                self.brand_menu_map[brand] = {c: [] for c in self.categorizer.keywords.keys()}
-            self.brand_menu_map[brand][cat].append(item)
-            
-        self.div_manager = DiversityManager()
+        # 행 dict 대신 컬럼형 저장소만 유지 (DataFrame은 초기화 후 버린다)
+        return MenuStore.from_dataframe(df.reset_index(drop=True))
+
+    def reload_store(self, store):
+        """메뉴 저장소 교체 (스냅샷 재빌드 후 등). 저장소에 묶인 캐시는 모두 비운다."""
+        self.store = store
+        self._safe_ids_cache = {}
+        self._day_planner = None
+        with self._combo_table_lock:
+            self.combo_table = None
+            self._combo_table_refused = False
+            self._combo_table_builder = None  # 이전 저장소로 빌드 중인 표는 끝나도 버려진다
+        self.item_index = None
+        if self.result_cache is not None: self.result_cache.clear()
 
-    def filter_by_allergens(self, dishes, allergies_to_avoid):
-        if not allergies_to_avoid: return dishes
-        allergens_lower = [a.lower() for a in allergies_to_avoid]
-        safe_menu_items = []
-        for item in dishes:
-            is_safe = True
-            for allergen in allergens_lower:
-                if allergen in item['allergens_scraped']: is_safe = False; break
-            if is_safe: safe_menu_items.append(item)
-        return safe_menu_items
+    def get_safe_item_ids(self, brand, allergies_to_avoid):
+        """
+        (브랜드, 알레르기 집합)별 카테고리 -> 안전 item_id 배열 (마스크 AND 한 번, 결과 캐시)
+        캐시 키는 ALLERGEN_VOCAB 비트마스크라 (브랜드 수 x 사전 조합)으로 묶인다.
+        사전에 없는 알레르기(부분 문자열 검색)가 섞인 요청은 키가 임의 문자열이 되므로 캐시하지 않는다.
+        """
+        avoid_mask, unknown = build_allergy_mask(allergies_to_avoid or ())
+        key = (brand, avoid_mask)
+        if not unknown:
+            cached = self._safe_ids_cache.get(key)
+            if cached is not None: return cached
+
+        cached = {}
+        for cat, ids in self.store.views[brand].items():
+            is_safe = (self.store.allergen_masks[ids] & avoid_mask) == 0
+            if unknown:
+                is_safe &= np.array([not any(a in self.store.allergen_texts[i] for a in unknown) for i in ids], dtype=bool)
+            cached[cat] = ids[is_safe]
+        if not unknown: self._safe_ids_cache[key] = cached
+        return cached
 
     def calculate_nutritional_error(self, combo, target_cal, target_prot, target_fat, goal_ratios, prot_min_factor=0.95, cal_range=0.15):
         total_cal = sum(item['calories'] for item in combo)
@@ -196,11 +1082,571 @@ class DailyDietOptimizer:
         
         return error_score, total_cal, total_prot, total_carbs, total_fat, total_sodium, is_sodium_valid, is_protein_min_met, is_cal_valid
 
-    def get_pareto_optimal_sets(self, candidates):
-        sorted_candidates = sorted(candidates, key=lambda x: x['price'])
-        return sorted_candidates[:5]
+    @profiled('error')
+    def evaluate_combos_batch(self, combo_ids, target_cal, target_prot, target_fat, prot_min_factor=0.95, cal_range=0.15):
+        """
+        calculate_nutritional_error의 벡터화 버전
+        combo_ids: (N, MAX_COMBO_SIZE) item_id 배열, 빈 슬롯은 -1 (0 패딩 행을 가리킴)
+        """
+        totals = self.store.nutrients[combo_ids].sum(axis=1, dtype=np.float64)
+        return (totals,) + self.score_totals(totals, target_cal, target_prot, target_fat, prot_min_factor, cal_range)
+
+    @staticmethod
+    def score_totals(totals, target_cal, target_prot, target_fat, prot_min_factor=0.95, cal_range=0.15):
+        """
+        영양소 합계 (N, len(NUTRIENT_COLS)) -> (오차, 나트륨/단백질/칼로리 조건)
+        목표치 인자에 (U, 1) 배열을 넘기면 U명 x N조합 행렬로 한 번에 계산된다 (recommend_batch)
+        """
+        total_cal = totals[:, COL_CAL]
+        total_prot = totals[:, COL_PROT]
+        total_fat = totals[:, COL_FAT]
+        total_sodium = totals[:, COL_SODIUM]
+
+        t_cal = np.maximum(target_cal, 1)
+        t_prot = np.maximum(target_prot, 1)
+        t_fat = np.maximum(target_fat, 1)
+        sodium_meal_limit = SODIUM_MAX_LIMIT / 3
+
+        cal_error = ((total_cal - t_cal) / t_cal) ** 2
+        prot_error = ((total_prot - t_prot) / t_prot) ** 2
+        fat_penalty = np.where(total_fat > t_fat, ((total_fat - t_fat) / t_fat) ** 2 * 2.0, 0.0)
+        sodium_penalty = np.where(total_sodium > sodium_meal_limit, ((total_sodium - sodium_meal_limit) / sodium_meal_limit) ** 2, 0.0)
+
+        error_scores = np.sqrt(cal_error + prot_error + fat_penalty + sodium_penalty)
+
+        is_protein_min_met = total_prot >= target_prot * prot_min_factor
+        is_cal_valid = (total_cal >= target_cal * (1 - cal_range)) & (total_cal <= target_cal * (1 + cal_range))
+        is_sodium_valid = total_sodium <= SODIUM_MAX_LIMIT * 0.6
+
+        return error_scores, is_sodium_valid, is_protein_min_met, is_cal_valid
+
+    def _record_checks(self, n_samples, is_protein_min_met, is_cal_valid, is_sodium_valid, n_nutrient_ok, n_feasible):
+        """조합 n_samples개의 영양 조건 판정 + 재료 중복 탈락 수를 프로파일러에 누적"""
+        if self.profiler is None: return
+        self.profiler.add_constraints(is_protein_min_met, is_cal_valid, is_sodium_valid)
+        self.profiler.add(samples=n_samples, feasible=n_feasible, overlap=n_nutrient_ok - n_feasible)
+
+    def _stage(self, name):
+        """메서드 일부 구간 계측용 (profiled 데코레이터의 with 버전)"""
+        return self.profiler.stage(name) if self.profiler is not None else nullcontext()
+
+    def _staged_iter(self, name, iterator):
+        """제너레이터의 next()마다 단계 시간으로 계측 (열거가 제너레이터 안에서 일어나 호출 측 단계에 잡히지 않는 경우)"""
+        if self.profiler is None:
+            yield from iterator
+            return
+        iterator = iter(iterator)
+        while True:
+            with self.profiler.stage(name):
+                item = next(iterator, None)
+            if item is None: return
+            yield item
+
+    def get_item_index(self):
+        if self.item_index is None:
+            self.item_index = NutrientIndex(self.store.nutrients[:len(self.store)][:, INDEX_COLS])
+        return self.item_index
+
+    @profiled('filtering')
+    def build_candidate_pool(self, allergies_to_avoid, excluded_codes, excluded_brands, cal_max=None):
+        """
+        요청 1회당 한 번만 만드는 후보 풀: 브랜드 -> {'MAIN'/'SIDE'/'DRINK': item_id 배열}
+        알레르기·제외 코드 필터를 적용하고, MAIN이 남지 않는 브랜드는 제외한다.
+        cal_max를 주면 단품만으로 끼니 칼로리 상한이나 나트륨 상한을 넘는 메뉴(어떤 조합에도 못 들어감)를 인덱스로 미리 뺀다.
+        """
+        fits = None
+        if cal_max is not None:
+            fits = self.get_item_index().mask(hi=(cal_max, None, None, SODIUM_MAX_LIMIT * 0.6))
+        pool = {}
+        for brand in self.store.brand_names:
+            if brand in excluded_brands: continue
+            safe_ids = self.get_safe_item_ids(brand, allergies_to_avoid)
+            cats = {}
+            for cat in ('MAIN', 'SIDE', 'DRINK'):
+                ids = safe_ids.get(cat, np.empty(0, dtype=np.int64))
+                if fits is not None and len(ids): ids = ids[fits[ids]]
+                if excluded_codes and len(ids):
+                    ids = ids[[self.store.food_codes[i] not in excluded_codes for i in ids]]
+                cats[cat] = ids
+            if len(cats['MAIN']) == 0: continue
+            pool[brand] = cats
+        return pool
+
+    def _make_candidate(self, combo, brand, totals_row, error, div_score):
+        """영양소 합계 행 -> 추천 결과 dict"""
+        return {
+            'combo': combo,
+            'brand': brand,
+            'price': int(round(totals_row[COL_PRICE])),
+            'calories': totals_row[COL_CAL],
+            'protein': totals_row[COL_PROT],
+            'carbs': totals_row[COL_CARBS],
+            'fat': totals_row[COL_FAT],
+            'sodium': totals_row[COL_SODIUM],
+            'saturated_fat': totals_row[COL_SAT_FAT],
+            'error': error,
+            'diversity_score': div_score
+        }
+
+    @profiled('sampling')
+    def _sample_combo_ids(self, candidate_pool, num_simulations, rng):
+        """
+        기존 루프와 같은 확률 구조(사이드 60%, 두번째 사이드 30%, 음료 50%)로
+        num_simulations개의 조합을 item_id 배열로 한 번에 뽑는다.
+        반환: (조합 item_id 배열, candidate_pool 키 순서 기준 브랜드 인덱스 배열)
+        """
+        pool_brands = list(candidate_pool.keys())
+        brand_draws = rng.integers(0, len(pool_brands), num_simulations)
+        chunks, brand_idx = [], []
+
+        for b_idx, brand in enumerate(pool_brands):
+            n = int(np.count_nonzero(brand_draws == b_idx))
+            if n == 0: continue
+            cats = candidate_pool[brand]
+            mains, sides, drinks = cats['MAIN'], cats['SIDE'], cats['DRINK']
+
+            ids = np.full((n, MAX_COMBO_SIZE), -1, dtype=np.int64)
+            ids[:, 0] = mains[rng.integers(0, len(mains), n)]
+            if len(sides) > 0:
+                has_side = rng.random(n) < 0.6
+                ids[:, 1] = np.where(has_side, sides[rng.integers(0, len(sides), n)], -1)
+                if len(sides) > 1:
+                    has_side2 = has_side & (rng.random(n) < 0.3)
+                    ids[:, 2] = np.where(has_side2, sides[rng.integers(0, len(sides), n)], -1)
+            if len(drinks) > 0:
+                has_drink = rng.random(n) < 0.5
+                ids[:, 3] = np.where(has_drink, drinks[rng.integers(0, len(drinks), n)], -1)
+
+            chunks.append(ids)
+            brand_idx.append(np.full(n, b_idx))
+
+        if not chunks:
+            return np.empty((0, MAX_COMBO_SIZE), dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.vstack(chunks), np.concatenate(brand_idx)
+
+    def _objective_points(self, totals, errors, div_scores, objectives):
+        """합계/오차/다양성 배열 -> 최소화 기준 목적 행렬 (N, M)"""
+        columns = {
+            'price': totals[:, COL_PRICE], 'error': errors, 'sodium': totals[:, COL_SODIUM],
+            'saturated_fat': totals[:, COL_SAT_FAT], 'diversity_score': div_scores
+        }
+        return np.column_stack([sign * columns[key] for key, sign in objectives])
+
+    @profiled('frontier')
+    def _push_rows(self, accumulator, rows, combo_ids, brand_idx, pool_brands, totals, errors, div_scores):
+        """유효 행들을 누적기에 일괄 추가 (dict는 누적기에 실제로 들어가는 행만 생성)"""
+        def make_candidate(r):
+            row = rows[r]
+            combo = [self.store.record(i) for i in combo_ids[row] if i >= 0]
+            return self._make_candidate(combo, pool_brands[brand_idx[row]], totals[row], errors[row], div_scores[row])
+
+        if isinstance(accumulator, TopKAccumulator):
+            return accumulator.push_batch(totals[rows, COL_PRICE], errors[rows], make_candidate)
+        points = self._objective_points(totals[rows], errors[rows], div_scores[rows], accumulator.objectives)
+        return accumulator.push_batch(points, make_candidate)
+
+    @profiled('overlap')
+    def combo_overlaps(self, combo_ids):
+        """조합 item_id 배열 (N, MAX_COMBO_SIZE) -> (N,) 재료 중복 여부 (저장소의 재료 비트마스크 AND)"""
+        masks = np.where(combo_ids >= 0, self.store.ingredient_masks[np.maximum(combo_ids, 0)], 0)
+        return self.div_manager.masks_overlap(masks)
+
+    def _drop_overlaps(self, rows, combo_ids):
+        """rows 중 재료가 겹치지 않는 조합 행만 반환"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return rows[~self.combo_overlaps(combo_ids[rows])]
+
+    def _recommend_vectorized(self, candidate_pool, target_cal, target_prot, target_fat, num_simulations, prot_min_factor, cal_range, accumulator, rng, stopper):
+        pool_brands = list(candidate_pool.keys())
+
+        for start in range(0, num_simulations, VECTOR_CHUNK_SIZE):
+            n = min(VECTOR_CHUNK_SIZE, num_simulations - start)
+            combo_ids, brand_idx = self._sample_combo_ids(candidate_pool, n, rng)
+            if len(combo_ids) == 0:
+                if stopper.update(accumulator, n, 0, 0): break
+                continue
+
+            totals, errors, is_sodium_valid, is_protein_min_met, is_cal_valid = self.evaluate_combos_batch(
+                combo_ids, target_cal, target_prot, target_fat, prot_min_factor, cal_range
+            )
+            feasible_rows = np.flatnonzero(is_protein_min_met & is_cal_valid & is_sodium_valid)
+
+            # 재료 중복 체크는 영양 조건을 통과한 소수의 조합에만 수행
+            rows = self._drop_overlaps(feasible_rows, combo_ids)
+            self._record_checks(len(combo_ids), is_protein_min_met, is_cal_valid, is_sodium_valid, len(feasible_rows), len(rows))
+            admitted = 0
+            if len(rows):
+                div_scores = self._slot_diversity_scores(combo_ids)
+                admitted = self._push_rows(accumulator, rows, combo_ids, brand_idx, pool_brands, totals, errors, div_scores)
+            if stopper.update(accumulator, n, len(rows), admitted): break
+
+        return accumulator.results()
+
+    @profiled('sampling')
+    def _enumerate_feasible_combos(self, mains, sides, drinks, target_cal, target_prot, prot_min_factor, cal_range):
+        """
+        1 메인 + 사이드 0~2개 + 음료 0~1개 조합 공간 전수 탐색 (영양소 상/하한으로 가지치기)
+        두 번째 사이드를 독립으로 뽑는 샘플링 엔진과 같은 공간이므로 같은 사이드 두 개도 포함한다.
+        칼로리/단백질/나트륨 조건을 모두 만족하는 조합만 (M, MAX_COMBO_SIZE) item_id 배열로 반환
+        """
+        found = list(self._iter_feasible_combos(mains, sides, drinks, target_cal, target_prot, prot_min_factor, cal_range))
+        return np.vstack(found) if found else np.empty((0, MAX_COMBO_SIZE), dtype=np.int64)
+
+    def _iter_feasible_combos(self, mains, sides, drinks, target_cal, target_prot, prot_min_factor, cal_range, keep_bases=None):
+        """
+        _enumerate_feasible_combos의 블록 단위 버전: 메인 하나의 (사이드 옵션 x 음료) 블록마다 조건을 만족하는 조합을 낸다.
+        keep_bases(base_ids (B, 3), base_totals (B, C), drink_totals (D, C)) -> (B,) bool을 주면
+        음료를 붙이기 전에 (메인 + 사이드) 행을 한 번 더 거른다 (분기 한정: 어떤 음료를 붙여도 쓸모없는 가지 제거).
+        """
+        nm = self.store.nutrients
+        cal_lo, cal_hi = target_cal * (1 - cal_range), target_cal * (1 + cal_range)
+        prot_min = target_prot * prot_min_factor
+        sodium_max = SODIUM_MAX_LIMIT * 0.6
+
+        # 영양소는 모두 0 이상이므로 단품만으로 상한을 넘는 항목은 어떤 조합에도 못 들어감
+        def within_upper(ids):
+            return ids[(nm[ids, COL_CAL] <= cal_hi) & (nm[ids, COL_SODIUM] <= sodium_max)]
+        mains, sides, drinks = within_upper(mains), within_upper(sides), within_upper(drinks)
+        if len(mains) == 0: return
+
+        # 사이드 옵션: 없음 / 1개 / 2개 (같은 사이드 두 번 포함, 순서 무시)
+        side_opts = [np.full((1, 2), -1, dtype=np.int64)]
+        if len(sides) > 0:
+            side_opts.append(np.column_stack([sides, np.full(len(sides), -1, dtype=np.int64)]))
+            i, j = np.triu_indices(len(sides))
+            side_opts.append(np.column_stack([sides[i], sides[j]]))
+        side_opts = np.vstack(side_opts)
+        drink_opts = np.concatenate([np.array([-1], dtype=np.int64), drinks])
+
+        side_tot = nm[side_opts].sum(axis=1, dtype=np.float64)
+        drink_tot = nm[drink_opts].astype(np.float64)
+        max_drink_cal = drink_tot[:, COL_CAL].max()
+        max_drink_prot = drink_tot[:, COL_PROT].max()
+
+        # 가장 가벼운 메인과 붙여도 상한을 넘는 사이드 옵션은 미리 제거
+        min_main = nm[mains].min(axis=0)
+        keep = (side_tot[:, COL_CAL] + min_main[COL_CAL] <= cal_hi) & (side_tot[:, COL_SODIUM] + min_main[COL_SODIUM] <= sodium_max)
+        side_opts, side_tot = side_opts[keep], side_tot[keep]
+
+        block_rows = max(1, EXHAUSTIVE_BLOCK_SIZE // len(drink_opts))
+        for m in mains:
+            base = nm[m] + side_tot
+            # 메인+사이드 단계의 상한, 그리고 음료를 더해도 하한에 못 미치는 가지 제거
+            ok = (base[:, COL_CAL] <= cal_hi) & (base[:, COL_SODIUM] <= sodium_max) \
+                & (base[:, COL_CAL] + max_drink_cal >= cal_lo) & (base[:, COL_PROT] + max_drink_prot >= prot_min)
+            s_idx = np.flatnonzero(ok)
+            if keep_bases is not None and len(s_idx):
+                base_ids = np.column_stack([np.full(len(s_idx), m), side_opts[s_idx]])
+                s_idx = s_idx[keep_bases(base_ids, base[s_idx], drink_tot)]
+
+            for start in range(0, len(s_idx), block_rows):
+                blk = s_idx[start:start + block_rows]
+                tot = base[blk][:, None, :] + drink_tot[None, :, :]
+                feasible = (tot[..., COL_CAL] >= cal_lo) & (tot[..., COL_CAL] <= cal_hi) \
+                    & (tot[..., COL_PROT] >= prot_min) & (tot[..., COL_SODIUM] <= sodium_max)
+                si, di = np.nonzero(feasible)
+                if len(si) == 0: continue
+
+                ids = np.empty((len(si), MAX_COMBO_SIZE), dtype=np.int64)
+                ids[:, 0] = m
+                ids[:, 1:3] = side_opts[blk[si]]
+                ids[:, 3] = drink_opts[di]
+                yield ids
+
+    @profiled('diversity')
+    def _slot_diversity_scores(self, combo_ids):
+        """
+        후보 풀 슬롯 구성(MAIN, SIDE, SIDE, DRINK) 기준 해밍 다양성 점수 (get_diversity_score와 동일 값)
+        서로 다른 카테고리 쌍의 거리는 2, 같은 카테고리 쌍은 0이므로 카테고리별 개수로 바로 계산된다.
+        """
+        filled = combo_ids >= 0
+        n_main = filled[:, 0].astype(np.int64)
+        n_side = filled[:, 1:3].sum(axis=1)
+        n_drink = filled[:, 3].astype(np.int64)
+        n = n_main + n_side + n_drink
+        pairs = n * (n - 1) / 2
+        same = (n_main * (n_main - 1) + n_side * (n_side - 1) + n_drink * (n_drink - 1)) / 2
+        return np.where(pairs > 0, 2.0 * (pairs - same) / np.maximum(pairs, 1), 0.0)
+
+    def _recommend_exhaustive(self, candidate_pool, target_cal, target_prot, target_fat, prot_min_factor, cal_range, objectives=PARETO_OBJECTIVES):
+        """
+        브랜드별 조합 공간을 전수 탐색해 결정적인 파레토 프런티어 조합 반환 (분기 한정)
+        - 열거 블록마다 재료 중복을 거른 뒤 바로 FrontierRows에 넣는다: 메모리는 실행 가능 조합 수가 아니라 프런티어 크기에 비례
+        - 음료를 붙이기 전 (메인 + 사이드) 행의 목적값 하한(_base_objective_bounds)이 현재 프런티어에 지배되면 가지째 버린다
+        결과는 조합을 모두 모은 뒤 프런티어를 구한 것과 같은 조합, 같은 순서다.
+        """
+        pool_brands = list(candidate_pool.keys())
+        front = FrontierRows(len(objectives))
+        keep_bases = None
+        # 하한은 다양성만 최대화, 나머지는 최소화하는 목적에서만 구할 수 있다
+        if all(sign == (-1 if key == 'diversity_score' else 1) for key, sign in objectives):
+            def keep_bases(base_ids, base_totals, drink_totals):
+                if len(front) == 0: return np.ones(len(base_ids), dtype=bool)
+                bounds = self._base_objective_bounds(base_ids, base_totals, drink_totals, target_cal, target_prot, target_fat, prot_min_factor, cal_range, objectives)
+                with self._stage('frontier'):
+                    return ~front.dominated(bounds)
+
+        for b_idx, brand in enumerate(pool_brands):
+            cats = candidate_pool[brand]
+            blocks = self._iter_feasible_combos(cats['MAIN'], cats['SIDE'], cats['DRINK'], target_cal, target_prot, prot_min_factor, cal_range, keep_bases)
+            n_evaluated = 0
+            for combo_ids in self._staged_iter('sampling', blocks):
+                n_evaluated += len(combo_ids)
+                totals, errors, is_sodium_valid, is_protein_min_met, is_cal_valid = self.evaluate_combos_batch(
+                    combo_ids, target_cal, target_prot, target_fat, prot_min_factor, cal_range
+                )
+                rows = np.flatnonzero(~self.combo_overlaps(combo_ids))
+                self._record_checks(len(combo_ids), is_protein_min_met, is_cal_valid, is_sodium_valid, len(combo_ids), len(rows))
+                if len(rows) == 0: continue
+                div_scores = self._slot_diversity_scores(combo_ids[rows])
+                points = self._objective_points(totals[rows], errors[rows], div_scores, objectives)
+                with self._stage('frontier'):
+                    front.push(points, ids=combo_ids[rows], brand_idx=np.full(len(rows), b_idx), totals=totals[rows], errors=errors[rows], div_scores=div_scores)
+            if self.profiler is not None:
+                self.profiler.add(pruned=combo_space_size(len(cats['MAIN']), len(cats['SIDE']), len(cats['DRINK'])) - n_evaluated)
+
+        if len(front) == 0: return []
+        c = front.columns
+        return [
+            self._make_candidate([self.store.record(i) for i in c['ids'][r] if i >= 0], pool_brands[c['brand_idx'][r]], c['totals'][r], c['errors'][r], c['div_scores'][r])
+            for r in range(len(front))
+        ]
+
+    def _base_objective_bounds(self, base_ids, base_totals, drink_totals, target_cal, target_prot, target_fat, prot_min_factor, cal_range, objectives):
+        """
+        (메인 + 사이드) 행에 음료 옵션(없음 포함)을 붙여 만들 수 있는 조합의 목적값 하한 (최소화 기준 (B, M))
+        - 가격/나트륨/포화지방/지방: 음료 중 가장 작은 값을 더한 값
+        - 오차: 칼로리/단백질을 도달 가능한 구간 안에서 목표에 가장 가깝게 둔 값 (오차 항은 영양소별로 따로 최소화되므로 하한)
+        - 다양성: 음료가 있을 때와 없을 때 중 큰 값
+        """
+        lower = base_totals + drink_totals.min(axis=0)
+        cal_lo = np.maximum(lower[:, COL_CAL], target_cal * (1 - cal_range))
+        cal_hi = np.minimum(base_totals[:, COL_CAL] + drink_totals[:, COL_CAL].max(), target_cal * (1 + cal_range))
+        prot_lo = np.maximum(lower[:, COL_PROT], target_prot * prot_min_factor)
+        prot_hi = base_totals[:, COL_PROT] + drink_totals[:, COL_PROT].max()
+        lower[:, COL_CAL] = np.clip(max(target_cal, 1), cal_lo, cal_hi)
+        lower[:, COL_PROT] = np.clip(max(target_prot, 1), prot_lo, prot_hi)
+        errors = self.score_totals(lower, target_cal, target_prot, target_fat, prot_min_factor, cal_range)[0]
+
+        slots = np.column_stack([base_ids, np.full(len(base_ids), -1)])
+        div_scores = self._slot_diversity_scores(slots)
+        if len(drink_totals) > 1:
+            slots[:, 3] = 0  # 음료 칸이 채워졌는지만 본다
+            div_scores = np.maximum(div_scores, self._slot_diversity_scores(slots))
+        bounds = self._objective_points(lower, errors, div_scores, objectives)
+        return bounds - 1e-9 * (1 + np.abs(bounds))  # 실제 조합은 합산 순서가 달라 반올림 오차만큼 다를 수 있음
+
+    @profiled('frontier')
+    def _overlap_free_frontier(self, rows, combo_ids, brand_idx, pool_brands, totals, errors, objectives=PARETO_OBJECTIVES):
+        """조합 행 rows(재료 중복 없는 조합)의 파레토 프런티어 -> 추천 결과 dict 목록"""
+        div_scores = self._slot_diversity_scores(combo_ids)
+        points = self._objective_points(totals[rows], errors[rows], div_scores[rows], objectives)
+        return [
+            self._make_candidate([self.store.record(i) for i in combo_ids[row] if i >= 0], pool_brands[brand_idx[row]], totals[row], errors[row], div_scores[row])
+            for row in rows[pareto_front_indices(points)]
+        ]
+
+    def get_combo_table(self):
+        """engine='table'용 조합 표. 아직 없으면 준비를 시작하고 None (호출 측이 exhaustive로 처리)"""
+        return self.warm_combo_table()
+
+    def warm_combo_table(self, wait=False):
+        """
+        조합 표 준비: CSV 옆 .combos.npz가 현재 메뉴와 맞으면 로드, 아니면 백그라운드 스레드에서 빌드를 시작한다.
+        빌드는 수천만 조합을 열거할 수 있어 요청 스레드에서 하지 않는다 (완료 전 요청은 exhaustive로 처리).
+        열거량 추정이 COMBO_TABLE_INLINE_LIMIT를 넘으면 빌드하지 않는다 (--build-combo-table로 미리 만들 것).
+        wait=True면 빌드가 끝날 때까지 기다린다 (오프라인 도구/테스트용). 반환: ComboTable 또는 None
+        """
+        with self._combo_table_lock:
+            if self.combo_table is None and self._combo_table_builder is None and not self._combo_table_refused:
+                self.combo_table = ComboTable.load(combo_table_path_for(self.data_path), self.store)
+                if self.combo_table is None:
+                    estimate = ComboTable.estimate_combos(self.store)
+                    if estimate > COMBO_TABLE_INLINE_LIMIT:
+                        print(f"⚠️ 조합 표가 없고 메모리 빌드 한도를 넘어(열거 약 {estimate:,}개) exhaustive로 처리합니다 (--build-combo-table로 미리 만드세요)")
+                        self._combo_table_refused = True
+                    else:
+                        print("🧮 조합 표가 없거나 오래되어 백그라운드에서 빌드합니다 (완료 전 요청은 exhaustive, --build-combo-table로 미리 만들어 두세요)")
+                        self._combo_table_builder = threading.Thread(target=self._build_combo_table, args=(self.store,), daemon=True)
+                        self._combo_table_builder.start()
+            builder = self._combo_table_builder
+        if wait and builder is not None: builder.join()
+        return self.combo_table
+
+    def _build_combo_table(self, store):
+        try:
+            table = ComboTable.build(self)
+        except Exception as e:  # 스레드 안의 예외는 아무도 받지 않으므로 알리고 표 없이 계속한다
+            print(f"⚠️ 조합 표 빌드 실패: {type(e).__name__}: {e} (exhaustive로 처리)")
+            table = None
+        with self._combo_table_lock:
+            if self._combo_table_builder is not threading.current_thread(): return  # 빌드 중 reload_store
+            self._combo_table_builder = None
+            if table is None: self._combo_table_refused = True
+            elif self.store is store: self.combo_table = table
+
+    def _recommend_table(self, candidate_pool, target_cal, target_prot, target_fat, prot_min_factor, cal_range, objectives=PARETO_OBJECTIVES, excluded_codes=None):
+        """
+        사전 계산 조합 표를 칼로리/단백질 범위로 잘라 _recommend_exhaustive의 근사 결과를 반환 (표는 셀별 가지치기됨)
+        알레르기/제외 코드로 빠진 메뉴가 든 조합은 표에서 지울 뿐 다른 조합으로 채우지 않으므로,
+        셀에 남긴 조합이 많이 빠질수록 exhaustive와 결과가 달라질 수 있다 (최저가 조합이 더 비싸게 나옴).
+        다음 요청은 전수 탐색으로 넘긴다:
+        - 표가 아직 없음 (백그라운드 빌드 중 / 메모리 빌드 거부) 또는 표 범위(max_cal)를 넘는 칼로리
+        - 후보 브랜드 메뉴 중 제외 FOOD_CODE 비율이 COMBO_TABLE_MAX_EXCLUDED 초과
+        """
+        table = self.get_combo_table()
+        if table is None or target_cal * (1 + cal_range) > table.max_cal or self._excluded_ratio(candidate_pool, excluded_codes) > COMBO_TABLE_MAX_EXCLUDED:
+            return self._recommend_exhaustive(candidate_pool, target_cal, target_prot, target_fat, prot_min_factor, cal_range, objectives)
+
+        # 알레르기/제외 코드가 반영된 후보 풀 밖의 메뉴가 들어간 조합은 버린다 (빈 슬롯 -1 = 마지막 패딩 행)
+        allowed = np.zeros(len(self.store.nutrients), dtype=bool)
+        allowed[-1] = True
+        for cats in candidate_pool.values():
+            for ids in cats.values(): allowed[ids] = True
+
+        pool_brands = list(candidate_pool.keys())
+        chunks, brand_idx = [], []
+        for b_idx, brand in enumerate(pool_brands):
+            table_rows = table.query(brand, target_cal * (1 - cal_range), target_cal * (1 + cal_range), target_prot * prot_min_factor)
+            table_rows = table_rows[allowed[table.ids[table_rows]].all(axis=1)]
+            if len(table_rows) == 0: continue
+            chunks.append(table_rows)
+            brand_idx.append(np.full(len(table_rows), b_idx))
+        if not chunks: return []
+
+        table_rows = np.concatenate(chunks)
+        combo_ids = table.ids[table_rows].astype(np.int64)
+        brand_idx = np.concatenate(brand_idx)
+        totals, errors, is_sodium_valid, is_protein_min_met, is_cal_valid = self.evaluate_combos_batch(
+            combo_ids, target_cal, target_prot, target_fat, prot_min_factor, cal_range
+        )
+        rows = np.flatnonzero(is_sodium_valid & is_protein_min_met & is_cal_valid)
+        self._record_checks(len(combo_ids), is_protein_min_met, is_cal_valid, is_sodium_valid, len(rows), len(rows))  # 표에는 재료 중복 조합이 없음
+        if objectives is not PARETO_OBJECTIVES:
+            return self._overlap_free_frontier(rows, combo_ids, brand_idx, pool_brands, totals, errors, objectives)
+        # 최종 출력(가격, 오차 상위 5개)에 필요한 프런티어 앞부분만 구한다 (recommend_batch와 같은 방식)
+        div_scores = table.diversity[table_rows].astype(np.float64)  # 빌드 때 계산해 둔 슬롯 다양성 점수
+        points = self._objective_points(totals[rows], errors[rows], div_scores[rows], objectives)
+        return self._cheapest_frontier(rows, points, combo_ids, brand_idx, pool_brands, totals, errors[rows], div_scores)
+
+    def _excluded_ratio(self, candidate_pool, excluded_codes):
+        """후보 브랜드 전체 메뉴 중 excluded_codes에 걸린 메뉴 비율"""
+        codes = [c for c in (excluded_codes or ()) if c]
+        if not codes: return 0.0
+        ids = np.concatenate([ids for brand in candidate_pool for ids in self.store.views[brand].values()])
+        return float(np.isin(self.store.food_codes[ids], codes).mean()) if len(ids) else 0.0
+
+    def _recommend_sampling(self, candidate_pool, target_cal, target_prot, target_fat, goal_ratios, num_simulations, prot_min_factor, cal_range, accumulator, rng, stopper):
+        py_rng = random.Random(int(rng.integers(2**63)))  # 기존 random.* 호출 흐름 유지, 시드만 Generator에서 파생
+        pool_brands = list(candidate_pool.keys())
+        item_pool = {
+            brand: {cat: [self.store.record(i) for i in ids] for cat, ids in cats.items()}
+            for brand, cats in candidate_pool.items()
+        }
+        
+        for start in range(0, num_simulations, VECTOR_CHUNK_SIZE):
+            n = min(VECTOR_CHUNK_SIZE, num_simulations - start)
+            n_feasible = admitted = 0
+            rejected = dict.fromkeys(StageProfiler.REJECTIONS, 0)
+            # 조합별 파이썬 루프는 단계를 나누지 않고 sampling 하나로 잰다 (조합마다 타이머를 켜면 측정값이 왜곡됨)
+            with self._stage('sampling'):
+                for _ in range(n):
+                    selected_brand = py_rng.choice(pool_brands)
+                    mains = item_pool[selected_brand]['MAIN']
+                    sides = item_pool[selected_brand]['SIDE']
+                    drinks = item_pool[selected_brand]['DRINK']
+
+                    combo = [py_rng.choice(mains)]
+                    if sides and py_rng.random() < 0.6:
+                        combo.append(py_rng.choice(sides))
+                        if len(sides) > 1 and py_rng.random() < 0.3:
+                            combo.append(py_rng.choice(sides))
+                    if drinks and py_rng.random() < 0.5:
+                        combo.append(py_rng.choice(drinks))
+            
+                    # 재료 중복 및 해밍 거리 체크
+                    if self.div_manager.check_ingredient_overlap(combo):
+                        rejected['overlap'] += 1
+                        continue
+            
+                    div_score = 0
+                    if len(combo) > 1:
+                        div_score = self.div_manager.get_diversity_score(combo)
+                        if div_score == 0.0:
+                            rejected['zero_diversity'] += 1
+                            continue
+
+                    total_price = sum(item['price'] for item in combo)
+                    total_sat_fat = sum(item['saturated_fat'] for item in combo)
+                    error, tot_cal, tot_prot, tot_carbs, tot_fat, tot_sodium, is_sodium_valid, is_protein_min_met, is_cal_valid = self.calculate_nutritional_error(
+                        combo, target_cal, target_prot, target_fat, goal_ratios, prot_min_factor, cal_range
+                    )
+
+                    rejected['protein'] += not is_protein_min_met
+                    rejected['calories'] += not is_cal_valid
+                    rejected['sodium'] += not is_sodium_valid
+                    if is_protein_min_met and is_cal_valid and is_sodium_valid:
+                        n_feasible += 1
+                        admitted += accumulator.push({
+                            'combo': combo,
+                            'brand': selected_brand,
+                            'price': total_price,
+                            'calories': tot_cal,
+                            'protein': tot_prot,
+                            'carbs': tot_carbs,
+                            'fat': tot_fat,
+                            'sodium': tot_sodium,
+                            'saturated_fat': total_sat_fat,
+                            'error': error,
+                            'diversity_score': div_score
+                        })
+            if self.profiler is not None: self.profiler.add(samples=n, feasible=n_feasible, **rejected)
+            if stopper.update(accumulator, n, n_feasible, admitted): break
+
+        return accumulator.results()
+
+    @profiled('frontier')
+    def get_pareto_optimal_sets(self, candidates, objectives=PARETO_OBJECTIVES, limit=5):
+        """
+        objectives(가격/오차/나트륨/포화지방 최소화, 다양성 최대화)에 대한 비지배 조합만 남긴 뒤
+        가격 -> 오차 순으로 정렬해 상위 limit개 반환
+        """
+        if not candidates: return []
+        points = np.array([[sign * c[key] for key, sign in objectives] for c in candidates], dtype=np.float64)
+        frontier = [candidates[i] for i in pareto_front_indices(points)]
+        frontier.sort(key=lambda x: (x['price'], x['error']))
+        return frontier[:limit]
 
     def recommend_daily_diet(self, target_cal, target_prot, target_fat, user_goal, allergies_to_avoid=[], excluded_codes=None, excluded_brands=None, num_simulations=20000, **kwargs):
+        # rng=를 넘긴 호출은 그 난수열의 결과를 기대하므로 캐시를 거치지 않는다 (캐시 결과는 처음 계산한 호출의 난수열 기준)
+        if self.result_cache is None or kwargs.get('rng') is not None:
+            return self._recommend_daily_diet(target_cal, target_prot, target_fat, user_goal, allergies_to_avoid, excluded_codes, excluded_brands, num_simulations, **kwargs)
+
+        # 목표치를 격자에 맞춰 계산하므로 같은 키의 결과는 누가 먼저 요청했는지와 무관하다
+        target_cal = round(target_cal / CACHE_CAL_STEP) * CACHE_CAL_STEP
+        target_prot = round(target_prot / CACHE_MACRO_STEP) * CACHE_MACRO_STEP
+        target_fat = round(target_fat / CACHE_MACRO_STEP) * CACHE_MACRO_STEP
+        key = (
+            target_cal, target_prot, target_fat, user_goal,
+            frozenset(a.lower() for a in allergies_to_avoid or ()),
+            frozenset(excluded_codes or ()), frozenset(excluded_brands or ()), num_simulations,
+            kwargs.get('prot_min_factor', 0.95), kwargs.get('cal_range', 0.15),
+            kwargs.get('engine', self.engine), kwargs.get('accumulator'),
+            kwargs.get('patience', EARLY_STOP_PATIENCE), kwargs.get('min_feasible_rate', FEASIBLE_RATE_FLOOR), kwargs.get('time_budget'),
+        )
+        # 조기 종료 통계도 결과와 함께 저장해 캐시 적중 시에도 stats=를 채운다 (cached=True, 값은 처음 계산 기준)
+        entry = self.result_cache.get(key)
+        cached = entry is not None
+        if not cached:
+            run_stats = {}
+            result = self._recommend_daily_diet(target_cal, target_prot, target_fat, user_goal, allergies_to_avoid, excluded_codes, excluded_brands, num_simulations, **{**kwargs, 'stats': run_stats})
+            entry = (result, run_stats)
+            self.result_cache.put(key, entry)
+        result, run_stats = entry
+        if kwargs.get('stats') is not None: kwargs['stats'].update(run_stats, cached=cached)
+        return result
+
+    def _recommend_daily_diet(self, target_cal, target_prot, target_fat, user_goal, allergies_to_avoid=[], excluded_codes=None, excluded_brands=None, num_simulations=20000, **kwargs):
         
         if excluded_codes is None: excluded_codes = set()
         if excluded_brands is None: excluded_brands = set()
@@ -208,80 +1654,524 @@ class DailyDietOptimizer:
         
         prot_min_factor = kwargs.get('prot_min_factor', 0.95)
         cal_range = kwargs.get('cal_range', 0.15)
+        engine = kwargs.get('engine', self.engine)
+        if engine not in ENGINES: raise ValueError(f"미지원 엔진: {engine}")
+        rng = np.random.default_rng(kwargs['rng']) if kwargs.get('rng') is not None else self.rng
+        # 'pareto': 비지배 집합 스트리밍 유지 / 'topk': (가격, 오차) 상위 5개만 유지
+        accumulator = TopKAccumulator(k=5) if kwargs.get('accumulator') == 'topk' else ParetoAccumulator()
+        # 조기 종료 (patience/min_feasible_rate=None이면 해당 규칙 끔). stats= dict를 넘기면 실제 샘플 수 등을 채워 준다
+        stopper = EarlyStopper(
+            kwargs.get('patience', EARLY_STOP_PATIENCE), kwargs.get('min_feasible_rate', FEASIBLE_RATE_FLOOR), kwargs.get('time_budget')
+        )
+        stats = kwargs.get('stats')
+        if self.profiler is not None: self.profiler.add(requests=1)
         
-        available_brands = [b for b in self.brand_menu_map.keys() if b not in excluded_brands]
+        available_brands = [b for b in self.store.brand_names if b not in excluded_brands]
         if not available_brands: return "❌ 가용 브랜드 없음"
 
-        valid_combinations = []
-        
-        for _ in range(num_simulations):
-            selected_brand = random.choice(available_brands)
-            brand_db = self.brand_menu_map[selected_brand]
-            
-            mains = self.filter_by_allergens(brand_db.get('MAIN', []), allergies_to_avoid)
-            sides = self.filter_by_allergens(brand_db.get('SIDE', []), allergies_to_avoid)
-            drinks = self.filter_by_allergens(brand_db.get('DRINK', []), allergies_to_avoid)
-            
-            mains = [m for m in mains if m.get('FOOD_CODE') not in excluded_codes]
-            sides = [s for s in sides if s.get('FOOD_CODE') not in excluded_codes]
-            drinks = [d for d in drinks if d.get('FOOD_CODE') not in excluded_codes]
-            
-            if not mains: continue 
-
-            combo = [random.choice(mains)]
-            if sides and random.random() < 0.6:
-                combo.append(random.choice(sides))
-                if len(sides) > 1 and random.random() < 0.3:
-                    combo.append(random.choice(sides))
-            if drinks and random.random() < 0.5:
-                combo.append(random.choice(drinks))
-            
-            # 재료 중복 및 해밍 거리 체크
-            if self.div_manager.check_ingredient_overlap(combo): continue
-            
-            div_score = 0
-            if len(combo) > 1:
-                div_score = self.div_manager.get_diversity_score(combo)
-                if div_score == 0.0: continue
-
-            total_price = sum(item['price'] for item in combo)
-            error, tot_cal, tot_prot, tot_carbs, tot_fat, tot_sodium, is_sodium_valid, is_protein_min_met, is_cal_valid = self.calculate_nutritional_error(
-                combo, target_cal, target_prot, target_fat, goal_ratios, prot_min_factor, cal_range
-            )
+        # 후보 필터링은 시뮬레이션 루프 밖에서 요청당 한 번만 수행
+        candidate_pool = self.build_candidate_pool(allergies_to_avoid, excluded_codes, excluded_brands, cal_max=target_cal * (1 + cal_range))
+        if not candidate_pool: return "❌ 조건 만족 식단 없음"
 
-            if is_protein_min_met and is_cal_valid and is_sodium_valid:
-                valid_combinations.append({
-                    'combo': combo,
-                    'brand': selected_brand,
-                    'price': total_price,
-                    'calories': tot_cal,
-                    'protein': tot_prot,
-                    'carbs': tot_carbs,
-                    'fat': tot_fat,
-                    'sodium': tot_sodium,
-                    'error': error,
-                    'diversity_score': div_score
-                })
+        if engine == 'vectorized':
+            valid_combinations = self._recommend_vectorized(
+                candidate_pool, target_cal, target_prot, target_fat, num_simulations, prot_min_factor, cal_range, accumulator, rng, stopper
+            )
+        elif engine == 'exhaustive':
+            valid_combinations = self._recommend_exhaustive(
+                candidate_pool, target_cal, target_prot, target_fat, prot_min_factor, cal_range
+            )
+        elif engine == 'table':
+            valid_combinations = self._recommend_table(
+                candidate_pool, target_cal, target_prot, target_fat, prot_min_factor, cal_range, excluded_codes=excluded_codes
+            )
+        else:
+            valid_combinations = self._recommend_sampling(
+                candidate_pool, target_cal, target_prot, target_fat, goal_ratios, num_simulations, prot_min_factor, cal_range, accumulator, rng, stopper
+            )
 
+        sampled = engine not in ('exhaustive', 'table')
+        if stats is not None and sampled: stats.update(stopper.stats())
         if not valid_combinations: return "❌ 조건 만족 식단 없음"
 
         pareto = self.get_pareto_optimal_sets(valid_combinations)
         final_sorted = sorted(pareto, key=lambda x: x['price'])
+        if sampled:
+            for candidate in final_sorted: candidate['samples_used'] = stopper.samples
         
         return final_sorted
 
+    def recommend_tiered(self, target_cal, target_prot, target_fat, user_goal, allergies_to_avoid=[], excluded_codes=None, excluded_brands=None, num_simulations=20000, tiers=RETRY_TIERS, **kwargs):
+        """
+        plan_day의 3단계 재시도를 샘플링 한 번으로 처리 (vectorized 엔진)
+        뽑은 조합마다 만족하는 가장 엄격한 단계를 매기고, 결과가 있는 가장 엄격한 단계의 상위 조합을 반환한다.
+        브랜드 제외를 푸는 단계가 있으면 제외 브랜드도 함께 샘플링하므로 앞 단계가 받는 샘플 수는 그만큼 줄어든다.
+        tiers: (단백질 하한 계수, 칼로리 허용 범위, 브랜드 제외 유지) 목록, 엄격한 순
+        반환: recommend_daily_diet와 같은 형식, 후보마다 'tier'(0부터) 추가
+        """
+        if excluded_codes is None: excluded_codes = set()
+        if excluded_brands is None: excluded_brands = set()
+        if kwargs.get('engine', self.engine) != 'vectorized':
+            # 다른 엔진은 단계별 순차 재시도로 대신한다 (요청 수는 단계마다 recommend_daily_diet가 센다)
+            # 결과 캐시가 같은 dict를 돌려줄 수 있어 'tier'는 복사본에 붙인다
+            for t, (prot_min_factor, cal_range, keep_brands) in enumerate(tiers):
+                result = self.recommend_daily_diet(
+                    target_cal, target_prot, target_fat, user_goal, allergies_to_avoid, excluded_codes,
+                    excluded_brands if keep_brands else set(), num_simulations,
+                    prot_min_factor=prot_min_factor, cal_range=cal_range, **kwargs
+                )
+                if not isinstance(result, str): return [{**candidate, 'tier': t} for candidate in result]
+            return result
+
+        if self.profiler is not None: self.profiler.add(requests=1)
+        rng = np.random.default_rng(kwargs['rng']) if kwargs.get('rng') is not None else self.rng
+        make_accumulator = (lambda: TopKAccumulator(k=5)) if kwargs.get('accumulator') == 'topk' else ParetoAccumulator
+        accumulators = [make_accumulator() for _ in tiers]
+        stopper = EarlyStopper(
+            kwargs.get('patience', EARLY_STOP_PATIENCE), kwargs.get('min_feasible_rate', FEASIBLE_RATE_FLOOR), kwargs.get('time_budget')
+        )
+
+        drop_brands = not all(keep_brands for _, _, keep_brands in tiers)
+        cal_max = target_cal * (1 + max(cal_range for _, cal_range, _ in tiers))
+        candidate_pool = self.build_candidate_pool(allergies_to_avoid, excluded_codes, set() if drop_brands else excluded_brands, cal_max=cal_max)
+        if not candidate_pool: return "❌ 조건 만족 식단 없음"
+        pool_brands = list(candidate_pool.keys())
+        brand_excluded = np.array([b in excluded_brands for b in pool_brands])
+
+        for start in range(0, num_simulations, VECTOR_CHUNK_SIZE):
+            n = min(VECTOR_CHUNK_SIZE, num_simulations - start)
+            combo_ids, brand_idx = self._sample_combo_ids(candidate_pool, n, rng)
+            with self._stage('error'):
+                totals = self.store.nutrients[combo_ids].sum(axis=1, dtype=np.float64)
+
+                # 느슨한 단계부터 덮어써서 각 조합에 만족하는 가장 엄격한 단계가 남게 한다
+                tier_of = np.full(len(combo_ids), -1)
+                for t in reversed(range(len(tiers))):
+                    prot_min_factor, cal_range, keep_brands = tiers[t]
+                    errors, is_sodium_valid, is_protein_min_met, is_cal_valid = self.score_totals(
+                        totals, target_cal, target_prot, target_fat, prot_min_factor, cal_range
+                    )
+                    if t == len(tiers) - 1: loosest = (is_protein_min_met, is_cal_valid, is_sodium_valid)
+                    ok = is_sodium_valid & is_protein_min_met & is_cal_valid
+                    if keep_brands: ok &= ~brand_excluded[brand_idx]
+                    tier_of[ok] = t
+
+            # 결과는 가장 엄격한 비어 있지 않은 단계에서만 나오므로 그보다 느슨한 단계의 행은 검사하지 않는다
+            # 조기 종료는 그 단계(모두 비었으면 가장 느슨한 단계)의 누적기로 판정한다
+            n_feasible = admitted = n_checked = 0
+            div_scores = None
+            result_acc = accumulators[-1]
+            for t, acc in enumerate(accumulators):
+                tier_rows = np.flatnonzero(tier_of == t)
+                rows = self._drop_overlaps(tier_rows, combo_ids)
+                n_checked += len(tier_rows)
+                if len(rows):
+                    if div_scores is None: div_scores = self._slot_diversity_scores(combo_ids)
+                    n_feasible += len(rows)
+                    admitted += self._push_rows(acc, rows, combo_ids, brand_idx, pool_brands, totals, errors, div_scores)
+                if acc.results():
+                    result_acc = acc
+                    break
+            # 영양 조건 탈락은 가장 느슨한 단계 기준
+            self._record_checks(len(combo_ids), *loosest, n_checked, n_feasible)
+            if stopper.update(result_acc, n, n_feasible, admitted): break
+
+        if kwargs.get('stats') is not None: kwargs['stats'].update(stopper.stats())
+        for t, acc in enumerate(accumulators):
+            valid_combinations = acc.results()
+            if not valid_combinations: continue
+            final_sorted = sorted(self.get_pareto_optimal_sets(valid_combinations), key=lambda x: x['price'])
+            for candidate in final_sorted:
+                candidate['tier'] = t
+                candidate['samples_used'] = stopper.samples
+            return final_sorted
+        return "❌ 조건 만족 식단 없음"
+
+    def recommend_batch(self, requests, engine='exhaustive', num_simulations=20000, rng=None):
+        """
+        여러 사용자의 끼니 추천 일괄 처리
+        requests: recommend_daily_diet 인자 dict 목록
+            (target_cal, target_prot, target_fat, user_goal, allergies_to_avoid, excluded_codes, excluded_brands, prot_min_factor, cal_range)
+        engine: 'exhaustive' (조합 전수 열거, exhaustive 엔진과 같은 결과) |
+                'vectorized' (묶음마다 num_simulations개를 한 번 샘플링해 요청끼리 공유, 기본 엔진처럼 근사)
+        알레르기 집합이 같은 요청끼리 후보 풀을 공유하고, 그 안에서 칼로리 구간이 겹치는 요청끼리
+        조합 열거·영양 합계·재료 중복 검사를 공유한다 (_calorie_clusters: 구간이 먼 요청을 묶으면 열거 범위만 넓어짐).
+        요청별 목표치 판정과 오차는 (요청 x 조합) 행렬로 한 번에 계산한다.
+        제외 브랜드·FOOD_CODE는 요청별 마스크로 처리 (끼니마다 사용자별로 달라 그룹 키에 넣으면 공유가 거의 안 됨).
+        반환: 요청 순서대로 recommend_daily_diet와 같은 형식 (가격순 리스트 또는 실패 문자열)
+        """
+        if engine not in ('exhaustive', 'vectorized'): raise ValueError(f"recommend_batch 미지원 엔진: {engine}")
+        rng = np.random.default_rng(rng) if rng is not None else self.rng
+        results = [None] * len(requests)
+        if self.profiler is not None: self.profiler.add(requests=len(requests))
+        groups = {}
+        for idx, req in enumerate(requests):
+            excluded_brands = req.get('excluded_brands') or ()
+            if not [b for b in self.store.brand_names if b not in excluded_brands]:
+                results[idx] = "❌ 가용 브랜드 없음"
+                continue
+            groups.setdefault(frozenset(a.lower() for a in req.get('allergies_to_avoid') or ()), []).append(idx)
+
+        for allergies, members in groups.items():
+            for cluster in self._calorie_clusters(requests, members):
+                cal_max = max(requests[i].get('target_cal', 0) * (1 + requests[i].get('cal_range', 0.15)) for i in cluster)
+                candidate_pool = self.build_candidate_pool(allergies, set(), set(), cal_max=cal_max)
+                if not candidate_pool:
+                    for idx in cluster: results[idx] = "❌ 조건 만족 식단 없음"
+                    continue
+                group_results = self._recommend_group(candidate_pool, [requests[i] for i in cluster], engine, num_simulations, rng)
+                for idx, result in zip(cluster, group_results):
+                    results[idx] = result
+        return results
+
+    @staticmethod
+    def _calorie_clusters(requests, members):
+        """
+        칼로리 구간 하한순으로 훑어 겹치는 요청끼리 묶는다.
+        묶음의 합집합 구간이 가장 넓은 요청 구간의 BATCH_CAL_SPAN_FACTOR배를 넘으면 새 묶음을 시작해 열거 범위를 좁게 유지한다.
+        """
+        def window(idx):
+            t_cal, cal_range = requests[idx].get('target_cal', 0), requests[idx].get('cal_range', 0.15)
+            return t_cal * (1 - cal_range), t_cal * (1 + cal_range)
+
+        clusters = []
+        for idx in sorted(members, key=lambda i: window(i)[0]):
+            lo, hi = window(idx)
+            if clusters and lo <= span_hi and max(span_hi, hi) - span_lo <= BATCH_CAL_SPAN_FACTOR * max(widest, hi - lo):
+                clusters[-1].append(idx)
+                span_hi, widest = max(span_hi, hi), max(widest, hi - lo)
+            else:
+                clusters.append([idx])
+                span_lo, span_hi, widest = lo, hi, hi - lo
+        return clusters
+
+    def _recommend_group(self, candidate_pool, group_requests, engine='exhaustive', num_simulations=20000, rng=None):
+        """
+        같은 후보 풀을 쓰는 요청들: 가장 느슨한 조건으로 조합을 한 번 열거(또는 샘플링)한 뒤 요청별로 걸러 낸다
+        열거는 블록 단위로 흘려 보내고 요청마다 FrontierRows만 유지한다 (전체 조합을 모아 두지 않음).
+        """
+        param = lambda key, default: np.array([req.get(key, default) for req in group_requests], dtype=np.float64)[:, None]
+        t_cal, t_prot, t_fat = param('target_cal', 0), param('target_prot', 0), param('target_fat', 0)
+        prot_min_factor, cal_range = param('prot_min_factor', 0.95), param('cal_range', 0.15)
+
+        # 모든 요청의 칼로리 구간을 덮는 (중심, 비율)과 가장 낮은 단백질 하한으로 한 번만 열거
+        cal_lo, cal_hi = (t_cal * (1 - cal_range)).min(), (t_cal * (1 + cal_range)).max()
+        union_cal, union_range = (cal_lo + cal_hi) / 2, (cal_hi - cal_lo) / max(cal_hi + cal_lo, 1e-9)
+        union_prot_min = (t_prot * prot_min_factor).min()
+
+        pool_brands = list(candidate_pool.keys())
+        if engine == 'vectorized':
+            combo_ids, brand_idx = self._sample_combo_ids(candidate_pool, num_simulations, rng)
+            # 같은 조합이 여러 번 뽑히면 결과에 중복으로 나오므로 하나만 남긴다 (item_id가 브랜드를 결정)
+            combo_ids, first = np.unique(combo_ids, axis=0, return_index=True)
+            blocks = [(combo_ids, brand_idx[first])]
+        else:
+            # 열거 블록을 하나씩 처리해 요청별 프런티어만 유지 (메모리는 실행 가능 조합 수가 아니라 프런티어 크기에 비례)
+            blocks = self._staged_iter('sampling', self._coalesced_union_blocks(candidate_pool, union_cal, union_prot_min, union_range))
+
+        # 제외 브랜드/FOOD_CODE는 요청별 마스크 (빈 슬롯 -1 = 마지막 패딩 행은 제외 안 됨)
+        excluded_brands = [[b for b, brand in enumerate(pool_brands) if brand in (req.get('excluded_brands') or ())] for req in group_requests]
+        excluded_items = []
+        for req in group_requests:
+            codes = [c for c in (req.get('excluded_codes') or ()) if c]
+            excluded_items.append(np.append(np.isin(self.store.food_codes, codes), False) if codes else None)
+
+        fronts = [FrontierRows(len(PARETO_OBJECTIVES)) for _ in group_requests]
+        for combo_ids, brand_idx in blocks:
+            if len(combo_ids) == 0: continue
+            with self._stage('error'):
+                totals = self.store.nutrients[combo_ids].sum(axis=1, dtype=np.float64)
+            div_scores = self._slot_diversity_scores(combo_ids)
+            overlap_free = ~self.combo_overlaps(combo_ids)
+
+            block = max(1, EXHAUSTIVE_BLOCK_SIZE // len(combo_ids))  # (요청 x 조합) 행렬 크기 제한
+            for start in range(0, len(group_requests), block):
+                sl = slice(start, start + block)
+                with self._stage('error'):
+                    errors, is_sodium_valid, is_protein_min_met, is_cal_valid = self.score_totals(
+                        totals, t_cal[sl], t_prot[sl], t_fat[sl], prot_min_factor[sl], cal_range[sl]
+                    )
+                valid = (is_sodium_valid & overlap_free)[None, :] & is_protein_min_met & is_cal_valid
+                if self.profiler is not None:
+                    is_sodium_valid = np.broadcast_to(is_sodium_valid, is_cal_valid.shape)  # 요청 x 조합으로 맞춰 센다
+                    nutrient_ok = is_sodium_valid & is_protein_min_met & is_cal_valid
+                    self._record_checks(valid.size, is_protein_min_met, is_cal_valid, is_sodium_valid, np.count_nonzero(nutrient_ok), np.count_nonzero(valid))
+                for u in range(sl.start, min(sl.stop, len(group_requests))):
+                    mask = valid[u - start]
+                    if excluded_brands[u]: mask = mask & ~np.isin(brand_idx, excluded_brands[u])
+                    if excluded_items[u] is not None: mask = mask & ~excluded_items[u][combo_ids].any(axis=1)
+                    rows = np.flatnonzero(mask)
+                    if len(rows) == 0: continue
+                    points = self._objective_points(totals[rows], errors[u - start, rows], div_scores[rows], PARETO_OBJECTIVES)
+                    with self._stage('frontier'):
+                        fronts[u].push(points, ids=combo_ids[rows], brand_idx=brand_idx[rows], totals=totals[rows], errors=errors[u - start, rows], div_scores=div_scores[rows])
+
+        results = []
+        for front in fronts:
+            if len(front) == 0:
+                results.append("❌ 조건 만족 식단 없음")
+                continue
+            c = front.columns
+            best = self._cheapest_frontier(np.arange(len(front)), front.points, c['ids'], c['brand_idx'], pool_brands, c['totals'], c['errors'], c['div_scores'])
+            results.append(sorted(best, key=lambda x: x['price']) if best else "❌ 조건 만족 식단 없음")
+        return results
+
+    def _coalesced_union_blocks(self, candidate_pool, union_cal, union_prot_min, union_range):
+        """합집합 조건으로 브랜드별 조합을 열거해 (ids, brand_idx) 블록으로 묶는다 (요청별 처리 비용을 줄이려 작은 블록은 합친다)"""
+        pending, pending_rows = [], 0
+        for b_idx, brand in enumerate(candidate_pool):
+            cats = candidate_pool[brand]
+            for ids in self._iter_feasible_combos(cats['MAIN'], cats['SIDE'], cats['DRINK'], union_cal, union_prot_min, 1.0, union_range):
+                pending.append((ids, np.full(len(ids), b_idx)))
+                pending_rows += len(ids)
+                if pending_rows >= EXHAUSTIVE_BLOCK_SIZE:
+                    yield np.vstack([ids for ids, _ in pending]), np.concatenate([b for _, b in pending])
+                    pending, pending_rows = [], 0
+        if pending:
+            yield np.vstack([ids for ids, _ in pending]), np.concatenate([b for _, b in pending])
+
+    @profiled('frontier')
+    def _cheapest_frontier(self, rows, points, combo_ids, brand_idx, pool_brands, totals, errors, div_scores, limit=5):
+        """
+        rows(재료 중복 없는 조합)에 대한 get_pareto_optimal_sets(프런티어)와 같은 결과를 프런티어 전체 없이 계산
+        PARETO_OBJECTIVES는 (가격, 오차, ...) 순이므로 목적 벡터 사전순으로 훑으면 지배하는 점이 항상 먼저 나온다.
+        비지배 조합을 (가격, 오차)가 작은 순으로 limit개 (+ 마지막과 동률인 조합) 모으면 멈춘다.
+        전체를 정렬하지 않고 가격 하위 head개 이하 가격의 조합(사전순 앞부분)만 정렬해 훑고, 그 안에서 못 멈추면 head를 늘린다.
+        """
+        head = FRONTIER_HEAD_SIZE
+        while True:
+            if head < len(points):
+                price_cut = np.partition(points[:, 0], head - 1)[head - 1]
+                candidates = np.flatnonzero(points[:, 0] <= price_cut)
+            else:
+                candidates = np.arange(len(points))
+            order = candidates[np.lexsort(points[candidates].T[::-1])]
+            front, accepted, stopped = [], [], False
+            for k in order:
+                key = (points[k, 0], points[k, 1])
+                if len(accepted) >= limit and key != last_key:
+                    stopped = True
+                    break
+                row = rows[k]
+                if front and _dominated_by(points[k][None, :], np.array(front))[0].any(): continue
+                front.append(points[k])
+                accepted.append((key, row, k))
+                last_key = key
+            if stopped or len(candidates) == len(points): break
+            head *= 8
+        accepted.sort()  # 동률은 조합 행 순서 (get_pareto_optimal_sets의 안정 정렬과 동일)
+        return [
+            self._make_candidate([self.store.record(i) for i in combo_ids[row] if i >= 0], pool_brands[brand_idx[row]], totals[row], errors[k], div_scores[row])
+            for _, row, k in accepted[:limit]
+        ]
+
+class JointDayPlanner:
+    """
+    OR-Tools 0/1 MIP 하루 3끼 동시 선택 (plan_day(planner='joint'), 끼니별 탐욕 루프 대신)
+    - 끼니 후보: 브랜드별로 끼니 조건(칼로리·단백질·나트륨)을 만족하는 조합을 전수 열거한 뒤
+      재료 중복 없는 조합 중 (가격 + 오차) 상위 COMBOS_PER_BRAND개만 남긴다.
+    - 솔버는 후보 조합 중 정확히 3개를 고른다 (끼니끼리 순서가 없어 대칭이 생기지 않음)
+      · 하루 동안 같은 item / FOOD_CODE 재사용 금지, 끼니마다 다른 브랜드(단계별로 해제)
+      · 끼니/하루 지방 상한: 목표별 지방 에너지 비율 상한(MACRO_GOAL_RATIOS 'F')에 FAT_RATIO_SLACK을 곱한 값
+      · 하루 칼로리·단백질·나트륨·예산 조건
+      · 목적: 가격 + 하루 합계의 목표 편차(칼로리·단백질 절대편차, 지방 초과) 가중합 최소화 (objective)
+    - 같은 알레르기 집합의 직전 해를 힌트로 넣어 다음 풀이를 웜 스타트
+    - 선택형(plan_day 기본은 'greedy'): 끼니 후보 열거 + MIP 풀이로 사용자당 greedy/tiered보다 몇 배 느리고
+      (합성 1,000개·8개 브랜드 메뉴에서 약 0.65초 vs 0.1초), 후보를 브랜드당 상위 조합으로 자르므로
+      탐욕 루프가 고른 조합이 후보에 없으면 가격·편차가 더 나쁠 수도 있다.
+      (탐욕 선택이 후보 안에 있으면 목적값은 그보다 나쁘지 않다.) 하루 예산·지방 상한처럼 끼니별로는 지킬 수 없는 조건이 필요할 때 쓴다.
+    """
+    MEALS_COUNT = 3
+    BACKENDS = ('SCIP', 'CBC')  # 설치된 OR-Tools 빌드에서 먼저 생성되는 MIP 솔버 사용
+    COMBOS_PER_BRAND = 40  # 브랜드당 후보 조합 수 (늘리면 풀이 시간 증가, 줄이면 탐욕 루프보다 나쁜 해가 늘어남)
+    ERROR_WEIGHT_KRW = 5000  # 하루 목표 대비 편차 100% = 5,000원 (칼로리 1% 벗어나면 50원)
+    DAY_CAL_RANGE = 0.10
+    FAT_RATIO_SLACK = 1.2  # 지방 에너지 비율 상한 여유 (패스트푸드 메뉴는 지방 비율이 높아 1.0이면 해가 크게 줄어듦)
+    # plan_day 재시도와 같은 단계 (여기서 세 번째 값은 끼니별 브랜드 중복 금지)
+    TIERS = RETRY_TIERS
+
+    def __init__(self, optimizer, time_limit=2.0):
+        self.optimizer = optimizer
+        self.time_limit = time_limit
+        # 알레르기 비트마스크(ALLERGEN_VOCAB) -> 직전 해의 조합 (item_id 튜플) 집합
+        # 사전 밖 알레르기는 키에서 빼 크기를 사전 조합 수로 묶는다 (힌트는 웜 스타트용이라 후보에 없는 조합은 무시됨)
+        self._hints = {}
+
+    def plan(self, user_profile, budget=None, excluded_codes=None):
+        try:
+            d_prot, d_carbs, d_fat = calculate_macro_grams(user_profile['target_cal'], user_profile['goal'], user_profile['weight'])
+        except:
+            return {"success": False, "reason": "Target Calc Error"}
+
+        allergies = user_profile['allergies']
+        candidate_pool = self.optimizer.build_candidate_pool(allergies, set(excluded_codes or ()), set())
+        if not candidate_pool: return {"success": False, "reason": "No Brand Available"}
+
+        n = self.MEALS_COUNT
+        meal_cal, meal_prot, meal_fat = user_profile['target_cal'] / n, d_prot / n, d_fat / n
+        fat_ratio_max = MACRO_GOAL_RATIOS.get(user_profile['goal'], MACRO_GOAL_RATIOS['건강관리'])['F'][1] * self.FAT_RATIO_SLACK
+        day_fat_max = user_profile['target_cal'] * fat_ratio_max / ATWATER_F
+        hint_key = build_allergy_mask(allergies)[0]
+        for prot_min_factor, cal_range, distinct_brands in self.TIERS:
+            meal_fat_max = day_fat_max / n * (1 + cal_range)  # 끼니 칼로리 허용 범위만큼 끼니 지방 상한도 넓힘
+            combo_ids, brand_idx = self._meal_candidates(candidate_pool, meal_cal, meal_prot, meal_fat, prot_min_factor, cal_range, meal_fat_max)
+            if len(combo_ids) < n: continue
+            chosen = self._solve(combo_ids, brand_idx, user_profile['target_cal'], d_prot, d_fat, budget,
+                                 prot_min_factor, distinct_brands, self._hints.get(hint_key, ()), day_fat_max)
+            if chosen is not None: break
+        else:
+            return {"success": False, "reason": "No Feasible Day Plan"}
+
+        self._hints[hint_key] = {tuple(combo_ids[r].tolist()) for r in chosen}
+        pool_brands = list(candidate_pool.keys())
+        return self._format_plan(combo_ids[chosen], [pool_brands[b] for b in brand_idx[chosen]], user_profile, d_prot, d_fat)
+
+    def objective(self, totals, day_cal, day_prot, day_fat):
+        """선택된 끼니 영양소 합계 (끼니 수, C) -> _solve가 최소화하는 목적값 (원)"""
+        day = np.asarray(totals, dtype=np.float64).sum(axis=0)
+        w_cal, w_prot, w_fat = self._deviation_weights(day_cal, day_prot, day_fat)
+        return (day[COL_PRICE] + w_cal * abs(day[COL_CAL] - day_cal) + w_prot * abs(day[COL_PROT] - day_prot)
+                + w_fat * max(day[COL_FAT] - day_fat, 0.0))
+
+    def _deviation_weights(self, day_cal, day_prot, day_fat):
+        """편차 1 단위의 원 환산 가중치 (칼로리, 단백질, 지방 초과): 목표 대비 비율에 ERROR_WEIGHT_KRW를 곱함, 지방 초과는 2배"""
+        w = self.ERROR_WEIGHT_KRW
+        return w / max(day_cal, 1), w / max(day_prot, 1), 2.0 * w / max(day_fat, 1)
+
+    def _meal_candidates(self, candidate_pool, meal_cal, meal_prot, meal_fat, prot_min_factor, cal_range, meal_fat_max=None):
+        """브랜드별 끼니 조건(+ 지방 상한) 만족 조합 중 (가격 + 오차) 상위 조합. 반환: (조합 item_id 배열, 브랜드 인덱스)"""
+        opt = self.optimizer
+        chunks, brand_idx = [], []
+        for b_idx, cats in enumerate(candidate_pool.values()):
+            ids = opt._enumerate_feasible_combos(cats['MAIN'], cats['SIDE'], cats['DRINK'], meal_cal, meal_prot, prot_min_factor, cal_range)
+            if len(ids) == 0: continue
+            totals, errors, _, _, _ = opt.evaluate_combos_batch(ids, meal_cal, meal_prot, meal_fat, prot_min_factor, cal_range)
+            order = np.argsort(totals[:, COL_PRICE] + self.ERROR_WEIGHT_KRW / self.MEALS_COUNT * errors, kind='stable')
+            if meal_fat_max is not None: order = order[totals[order, COL_FAT] <= meal_fat_max]
+            # 하루에 같은 item은 한 번만이므로 같은 사이드를 두 번 담은 조합은 뺀다
+            order = order[(ids[order, 1] < 0) | (ids[order, 1] != ids[order, 2])]
+            kept = opt._drop_overlaps(order, ids)[:self.COMBOS_PER_BRAND]
+            chunks.append(ids[kept])
+            brand_idx.append(np.full(len(kept), b_idx))
+        if not chunks: return np.empty((0, MAX_COMBO_SIZE), dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.vstack(chunks), np.concatenate(brand_idx)
+
+    def _solve(self, combo_ids, brand_idx, day_cal, day_prot, day_fat, budget, prot_min_factor, distinct_brands, hint, day_fat_max=None):
+        """후보 조합 중 3개 선택 (0/1 MIP). 반환: 선택된 행 번호 배열, 해가 없으면 None"""
+        from ortools.linear_solver import pywraplp
+
+        solver = None
+        for backend in self.BACKENDS:
+            solver = pywraplp.Solver.CreateSolver(backend)
+            if solver: break
+        if not solver: raise RuntimeError("❌ MIP 솔버 생성 실패")
+        solver.SetTimeLimit(int(self.time_limit * 1000))
+
+        store = self.optimizer.store
+        totals = store.nutrients[combo_ids].sum(axis=1, dtype=np.float64)
+        z = [solver.BoolVar(f'combo_{r}') for r in range(len(combo_ids))]
+        total = lambda col: solver.Sum(float(v) * z[r] for r, v in enumerate(totals[:, col]) if v)
+
+        solver.Add(solver.Sum(z) == self.MEALS_COUNT)
+
+        # 하루 동안 같은 item / 같은 FOOD_CODE는 한 번만
+        groups = {}
+        for r, ids in enumerate(combo_ids.tolist()):
+            for i in ids:
+                if i < 0: continue
+                groups.setdefault(str(store.food_codes[i]) or f'#{i}', set()).add(r)
+        for rows in groups.values():
+            if len(rows) > 1: solver.Add(solver.Sum(z[r] for r in rows) <= 1)
+
+        if distinct_brands:
+            for b in np.unique(brand_idx):
+                rows = np.flatnonzero(brand_idx == b)
+                if len(rows) > 1: solver.Add(solver.Sum(z[r] for r in rows) <= 1)
+
+        total_cal, total_prot, total_fat = total(COL_CAL), total(COL_PROT), total(COL_FAT)
+        solver.Add(total_cal >= day_cal * (1 - self.DAY_CAL_RANGE))
+        solver.Add(total_cal <= day_cal * (1 + self.DAY_CAL_RANGE))
+        solver.Add(total_prot >= day_prot * prot_min_factor)
+        solver.Add(total(COL_SODIUM) <= SODIUM_MAX_LIMIT)
+        if day_fat_max is not None: solver.Add(total_fat <= day_fat_max)
+        total_price = total(COL_PRICE)
+        if budget is not None: solver.Add(total_price <= budget)
+
+        # 편차 항: |x - t| <= dev 두 부등식으로 선형화, 목표 대비 비율에 ERROR_WEIGHT_KRW를 곱해 원 단위로 환산
+        dev_cal = solver.NumVar(0, solver.infinity(), 'dev_cal')
+        dev_prot = solver.NumVar(0, solver.infinity(), 'dev_prot')
+        fat_over = solver.NumVar(0, solver.infinity(), 'fat_over')
+        solver.Add(dev_cal >= total_cal - day_cal)
+        solver.Add(dev_cal >= day_cal - total_cal)
+        solver.Add(dev_prot >= total_prot - day_prot)
+        solver.Add(dev_prot >= day_prot - total_prot)
+        solver.Add(fat_over >= total_fat - day_fat)
+        w_cal, w_prot, w_fat = self._deviation_weights(day_cal, day_prot, day_fat)
+        solver.Minimize(total_price + w_cal * dev_cal + w_prot * dev_prot + w_fat * fat_over)
+
+        hinted = [z[r] for r, ids in enumerate(combo_ids.tolist()) if tuple(ids) in hint]
+        if len(hinted) == self.MEALS_COUNT: solver.SetHint(hinted, [1.0] * len(hinted))
+
+        status = solver.Solve()
+        if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE): return None
+        return np.array([r for r in range(len(z)) if z[r].solution_value() > 0.5], dtype=np.int64)
+
+    def _format_plan(self, combo_ids, brands, user_profile, d_prot, d_fat):
+        """plan_day와 같은 결과 형식"""
+        n = self.MEALS_COUNT
+        totals, errors, _, _, _ = self.optimizer.evaluate_combos_batch(
+            combo_ids, user_profile['target_cal'] / n, d_prot / n, d_fat / n
+        )
+        div_scores = self.optimizer._slot_diversity_scores(combo_ids)
+        result_log = [
+            self.optimizer._make_candidate(
+                [self.optimizer.store.record(i) for i in ids if i >= 0], brand, totals[m], errors[m], div_scores[m]
+            )
+            for m, (ids, brand) in enumerate(zip(combo_ids, brands))
+        ]
+        return {
+            "success": True,
+            "price": sum(r['price'] for r in result_log),
+            "calories": totals[:, COL_CAL].sum(),
+            "protein": totals[:, COL_PROT].sum(),
+            "avg_diversity": div_scores.mean(),
+            "target_cal": user_profile['target_cal'],
+            "target_prot": d_prot,
+            "results": result_log,
+            "user_profile": user_profile
+        }
+
 # -----------------------------------------------------
 # 전역 변수 (Worker Process용)
 # -----------------------------------------------------
 optimizer_instance = None
 
-def init_worker():
+def init_worker(shared_handle=None):
     global optimizer_instance
-    optimizer_instance = DailyDietOptimizer()
+    # 워커 기본 난수원은 쓰지 않는다: 사용자마다 부모가 분기한 시드를 run_single_simulation(seed=...)으로 넘김
+    if shared_handle is not None:
+        # 부모가 게시한 메뉴 배열에 zero-copy로 붙음 (CSV 재로딩/재분류 없음)
+        optimizer_instance = DailyDietOptimizer(store=MenuStore.attach_shared(shared_handle))
+    else:
+        optimizer_instance = DailyDietOptimizer()
 
-def run_single_simulation(user_profile):
+def run_single_simulation(user_profile, planner='greedy', seed=None):
     global optimizer_instance
-    
+    rng = np.random.default_rng(seed) if seed is not None else None
+    return plan_day(optimizer_instance, user_profile, planner, rng)
+
+def plan_day(optimizer, user_profile, planner='greedy', rng=None, budget=None):
+    """
+    사용자 1명의 하루 3끼 식단. 워커/상주 서비스 공용
+    planner: 'greedy' (끼니별 3단계 재시도) | 'tiered' (3단계를 끼니당 샘플링 한 번으로) | 'joint' (JointDayPlanner로 3끼 동시 선택, 더 느림)
+    rng: 이 사용자 전용 Generator (None이면 optimizer.rng)
+    budget: 하루 예산(원) 상한. 끼니별 탐욕 루프는 하루 합계를 미리 알 수 없어 'joint'에서만 지원
+    """
+    if planner == 'joint':
+        if optimizer._day_planner is None: optimizer._day_planner = JointDayPlanner(optimizer)
+        return optimizer._day_planner.plan(user_profile, budget=budget)
+    if budget is not None: raise ValueError("budget은 planner='joint'에서만 지원합니다")
+
     try:
         d_prot, d_carbs, d_fat = calculate_macro_grams(user_profile['target_cal'], user_profile['goal'], user_profile['weight'])
     except:
@@ -300,31 +2190,39 @@ def run_single_simulation(user_profile):
         target_prot = max((d_prot - current_status['protein']) / remaining_meals, 10)
         target_fat = max((d_fat - current_status['fat']) / remaining_meals, 5)
         
-        # 1차 시도: Strict + 브랜드 제외
-        meal_result = optimizer_instance.recommend_daily_diet(
-            target_cal=target_cal, target_prot=target_prot, target_fat=target_fat,
-            user_goal=user_profile['goal'], allergies_to_avoid=user_profile['allergies'],
-            excluded_codes=excluded_codes, excluded_brands=excluded_brands,
-            prot_min_factor=0.95, cal_range=0.15
-        )
-        
-        # 2차 시도: Relaxed + 브랜드 제외 유지
-        if isinstance(meal_result, str):
-            meal_result = optimizer_instance.recommend_daily_diet(
+        if planner == 'tiered':
+            # 세 단계를 샘플링 한 번으로 판정 (결과가 있는 가장 엄격한 단계 선택)
+            meal_result = optimizer.recommend_tiered(
                 target_cal=target_cal, target_prot=target_prot, target_fat=target_fat,
                 user_goal=user_profile['goal'], allergies_to_avoid=user_profile['allergies'],
-                excluded_codes=excluded_codes, excluded_brands=excluded_brands,
-                prot_min_factor=0.70, cal_range=0.30
+                excluded_codes=excluded_codes, excluded_brands=excluded_brands, rng=rng
             )
-
-        # 3차 시도: Relaxed + 브랜드 제외 해제 (최후의 수단)
-        if isinstance(meal_result, str):
-            meal_result = optimizer_instance.recommend_daily_diet(
+        else:
+            # 1차 시도: Strict + 브랜드 제외
+            meal_result = optimizer.recommend_daily_diet(
                 target_cal=target_cal, target_prot=target_prot, target_fat=target_fat,
                 user_goal=user_profile['goal'], allergies_to_avoid=user_profile['allergies'],
-                excluded_codes=excluded_codes, excluded_brands=set(), # 브랜드 리셋
-                prot_min_factor=0.70, cal_range=0.30
+                excluded_codes=excluded_codes, excluded_brands=excluded_brands,
+                prot_min_factor=0.95, cal_range=0.15, rng=rng
             )
+        
+            # 2차 시도: Relaxed + 브랜드 제외 유지
+            if isinstance(meal_result, str):
+                meal_result = optimizer.recommend_daily_diet(
+                    target_cal=target_cal, target_prot=target_prot, target_fat=target_fat,
+                    user_goal=user_profile['goal'], allergies_to_avoid=user_profile['allergies'],
+                    excluded_codes=excluded_codes, excluded_brands=excluded_brands,
+                    prot_min_factor=0.70, cal_range=0.30, rng=rng
+                )
+
+            # 3차 시도: Relaxed + 브랜드 제외 해제 (최후의 수단)
+            if isinstance(meal_result, str):
+                meal_result = optimizer.recommend_daily_diet(
+                    target_cal=target_cal, target_prot=target_prot, target_fat=target_fat,
+                    user_goal=user_profile['goal'], allergies_to_avoid=user_profile['allergies'],
+                    excluded_codes=excluded_codes, excluded_brands=set(), # 브랜드 리셋
+                    prot_min_factor=0.70, cal_range=0.30, rng=rng
+                )
 
         if not isinstance(meal_result, str):
             best_combo = meal_result[0]
@@ -354,11 +2252,83 @@ def run_single_simulation(user_profile):
         "user_profile": user_profile
     }
 
+def plan_days(optimizer, user_profiles, engine='exhaustive', rng=None):
+    """
+    plan_day(greedy)의 코호트 버전: 모든 사용자의 i번째 끼니를 recommend_batch 한 번으로 처리
+    재시도 단계도 같아서 engine='exhaustive'이면 결과는 engine='exhaustive'로 plan_day를 사용자마다 돌린 것과 같다.
+    engine='vectorized'는 묶음마다 샘플을 공유하는 근사 (기본 엔진 plan_day와 같은 수준의 결과를 더 적은 시간에)
+    """
+    MEALS_COUNT = 3
+
+    states = {}
+    results = [None] * len(user_profiles)
+    for u, profile in enumerate(user_profiles):
+        try:
+            d_prot, d_carbs, d_fat = calculate_macro_grams(profile['target_cal'], profile['goal'], profile['weight'])
+        except:
+            results[u] = {"success": False, "reason": "Target Calc Error"}
+            continue
+        states[u] = {'d_prot': d_prot, 'd_fat': d_fat, 'calories': 0, 'protein': 0, 'fat': 0, 'price': 0, 'diversity_sum': 0,
+                     'excluded_codes': set(), 'excluded_brands': set(), 'log': []}
+
+    for i in range(MEALS_COUNT):
+        remaining_meals = MEALS_COUNT - i
+        pending = list(states)
+        meal_results = {}
+        for prot_min_factor, cal_range, keep_brands in RETRY_TIERS:
+            if not pending: break
+            requests = []
+            for u in pending:
+                st, profile = states[u], user_profiles[u]
+                requests.append({
+                    'target_cal': max((profile['target_cal'] - st['calories']) / remaining_meals, 100),
+                    'target_prot': max((st['d_prot'] - st['protein']) / remaining_meals, 10),
+                    'target_fat': max((st['d_fat'] - st['fat']) / remaining_meals, 5),
+                    'user_goal': profile['goal'], 'allergies_to_avoid': profile['allergies'],
+                    'excluded_codes': st['excluded_codes'], 'excluded_brands': st['excluded_brands'] if keep_brands else set(),
+                    'prot_min_factor': prot_min_factor, 'cal_range': cal_range,
+                })
+            for u, meal_result in zip(pending, optimizer.recommend_batch(requests, engine=engine, rng=rng)):
+                if not isinstance(meal_result, str): meal_results[u] = meal_result
+            pending = [u for u in pending if u not in meal_results]
+
+        for u in pending:
+            results[u] = {"success": False, "reason": f"Meal {i+1} Failed"}
+            del states[u]
+        for u, meal_result in meal_results.items():
+            st, best_combo = states[u], meal_result[0]
+            st['calories'] += best_combo['calories']
+            st['protein'] += best_combo['protein']
+            st['fat'] += best_combo['fat']
+            st['price'] += best_combo['price']
+            st['diversity_sum'] += best_combo.get('diversity_score', 0)
+            st['excluded_brands'].add(best_combo['brand'])
+            for item in best_combo['combo']:
+                if item.get('FOOD_CODE'): st['excluded_codes'].add(item['FOOD_CODE'])
+            st['log'].append(best_combo)
+
+    for u, st in states.items():
+        profile = user_profiles[u]
+        results[u] = {
+            "success": True,
+            "price": st['price'],
+            "calories": st['calories'],
+            "protein": st['protein'],
+            "avg_diversity": st['diversity_sum'] / MEALS_COUNT,
+            "target_cal": profile['target_cal'],
+            "target_prot": st['d_prot'],
+            "results": st['log'],
+            "user_profile": profile
+        }
+    return results
+
 class RandomUserGenerator:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.goals = ["다이어트", "건강관리", "근육증가"]
         self.allergy_pool = ["난류", "땅콩", "우유", "대두", "밀", "새우", "복숭아"]
+        self.random = random.Random(seed)
     def generate(self):
+        random = self.random
         weight = random.randint(45, 100)
         gender = random.choice(['Male', 'Female'])
         goal = random.choice(self.goals)
@@ -372,6 +2342,21 @@ class RandomUserGenerator:
         allergies = random.sample(self.allergy_pool, num_allergies)
         return {"weight": weight, "gender": gender, "goal": goal, "target_cal": target_cal, "allergies": allergies}
 
+def build_menu_snapshot(data_path=DATA_PATH, snapshot_path=None):
+    """CSV -> 바이너리 스냅샷 빌드 (배포/CSV 갱신 후 한 번 실행)"""
+    snapshot_path = snapshot_path or snapshot_path_for(data_path)
+    store = DailyDietOptimizer(data_path, use_snapshot=False).store
+    store.save_snapshot(snapshot_path, data_path)
+    return snapshot_path
+
+def build_combo_table(data_path=DATA_PATH, table_path=None):
+    """메뉴 -> 브랜드별 조합 표 빌드 (스냅샷과 같이 CSV 갱신 후 한 번 실행)"""
+    table_path = table_path or combo_table_path_for(data_path)
+    optimizer = DailyDietOptimizer(data_path)
+    table = ComboTable.build(optimizer)
+    table.save(table_path)
+    return table_path, len(table)
+
 def plot_distribution(ax, data, title, xlabel, color='skyblue'):
     if not data: return
     mean_val = np.mean(data)
@@ -395,20 +2380,47 @@ def plot_distribution(ax, data, title, xlabel, color='skyblue'):
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
+
+    # python daily_diet_optimizer_2.6_test.py --build-snapshot [csv 경로] [스냅샷 경로]
+    if len(sys.argv) > 1 and sys.argv[1] == '--build-snapshot':
+        t0 = time.time()
+        out = build_menu_snapshot(*sys.argv[2:4])
+        print(f"📦 스냅샷 생성: {out} ({time.time() - t0:.2f}s)")
+        sys.exit(0)
+    # python daily_diet_optimizer_2.6_test.py --build-combo-table [csv 경로] [표 경로]
+    if len(sys.argv) > 1 and sys.argv[1] == '--build-combo-table':
+        t0 = time.time()
+        out, n_combos = build_combo_table(*sys.argv[2:4])
+        print(f"🧮 조합 표 생성: {out} ({n_combos:,}개 조합, {time.time() - t0:.2f}s)")
+        sys.exit(0)
     
     NUM_USERS = 100 
-    user_gen = RandomUserGenerator()
+    SEED = 42  # 같은 시드면 사용자 생성·샘플링·출력 샘플까지 실행마다 동일 (None이면 매번 다름)
+    user_gen = RandomUserGenerator(seed=SEED)
     users = [user_gen.generate() for _ in range(NUM_USERS)]
     
     CORES_TO_USE = 4
+    USE_SHARED_MEMORY = True  # 부모가 메뉴 배열을 한 번만 만들고 워커는 공유 메모리에 붙음
+    PLANNER = 'greedy'  # 'greedy' | 'tiered' | 'joint' (OR-Tools 필요)
     
     print(f"\n🚀 [Parallel] {NUM_USERS}명 시뮬레이션 및 시각화 시작 (v2.6 Logic)")
     print("--------------------------------------------------")
     
     start_time = time.time()
     
-    with multiprocessing.Pool(processes=CORES_TO_USE, initializer=init_worker) as pool:
-        results = pool.map(run_single_simulation, users)
+    shared_handle, shared_segments = None, []
+    if USE_SHARED_MEMORY:
+        shared_handle, shared_segments = DailyDietOptimizer().store.to_shared_memory()
+    # 사용자별 시드를 미리 분기해 두므로 어느 워커가 어떤 사용자를 맡든 결과가 같다
+    root_seq = np.random.SeedSequence(SEED)
+    user_seeds = root_seq.spawn(NUM_USERS)
+    try:
+        with multiprocessing.Pool(processes=CORES_TO_USE, initializer=init_worker, initargs=(shared_handle,)) as pool:
+            results = pool.starmap(run_single_simulation, [(user, PLANNER, seed) for user, seed in zip(users, user_seeds)])
+    finally:
+        for shm in shared_segments:
+            shm.close()
+            shm.unlink()
         
     end_time = time.time()
     
@@ -445,6 +2457,8 @@ if __name__ == "__main__":
     
     if success_cnt > 0:
         try:
+            import matplotlib.pyplot as plt
+            plt.rcParams['axes.unicode_minus'] = False  # 차트 한글 폰트 깨짐 방지
             fig, axes = plt.subplots(2, 2, figsize=(15, 12))
             plot_distribution(axes[0, 0], prices, "Price Distribution", "Price (KRW)", color='skyblue')
             plot_distribution(axes[0, 1], cal_accuracies, "Calorie Accuracy", "Accuracy (%)", color='lightgreen')
@@ -457,7 +2471,7 @@ if __name__ == "__main__":
 
     if success_cnt > 0:
         sample_size = min(10, success_cnt)
-        random_samples = random.sample(success_results, sample_size)
+        random_samples = random.Random(SEED).sample(success_results, sample_size)
         print(f"\n🎲 랜덤 샘플 {sample_size}명 상세 출력")
         print("==================================================")
         for idx, sample in enumerate(random_samples):
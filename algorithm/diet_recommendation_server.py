@@ -0,0 +1,245 @@
+"""
+식단 추천 상주 서비스 (HTTP + JSON)
+- DailyDietOptimizer를 프로세스 시작 시 한 번만 만들고 계속 재사용 (요청마다 CSV 로딩/분류 없음)
+- 동시 처리 수는 세마포어로 제한, 대기 시간이 넘으면 503 반환
+
+실행:
+    python algorithm/diet_recommendation_server.py --port 8080
+
+요청 예:
+    POST /plan  {"weight": 70, "goal": "다이어트", "target_cal": 1800, "allergies": ["난류"], "planner": "joint", "budget": 25000}
+    POST /meal  {"target_cal": 600, "target_prot": 40, "target_fat": 20, "goal": "건강관리"}
+    POST /reload  (메뉴 스냅샷/CSV 재로딩 + 캐시 무효화)
+    GET  /health
+    GET  /metrics  (--profile로 켠 단계별 시간/탈락 사유, Prometheus 텍스트 형식)
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+OPTIMIZER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'daily_diet_optimizer_2.6_test.py')
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_QUEUE_TIMEOUT = 10.0  # 초
+DEFAULT_CACHE_SIZE = 4096
+MAX_BODY_BYTES = 64 * 1024
+
+
+def load_optimizer_module(path=OPTIMIZER_PATH):
+    """버전 번호가 붙은 파일명은 import 문으로 불러올 수 없어 경로로 직접 로드"""
+    spec = importlib.util.spec_from_file_location('daily_diet_optimizer', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_str_list(body, key):
+    """문자열 리스트 항목만 허용 (문자열 하나를 list()로 풀면 '난류' -> ['난', '류']가 되어 부분 문자열 매칭이 틀어짐)"""
+    values = body.get(key, [])
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ValueError(f"{key}는 문자열 리스트여야 합니다")
+    return values
+
+
+def to_jsonable(obj):
+    """추천 결과의 NumPy 스칼라/배열/집합을 JSON 기본 타입으로 변환"""
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return obj
+
+
+class RecommendationService:
+    """워밍된 옵티마이저 + 동시성 제어"""
+
+    def __init__(self, module, optimizer, max_concurrency=DEFAULT_MAX_CONCURRENCY, queue_timeout=DEFAULT_QUEUE_TIMEOUT, data_path=None):
+        self.module = module
+        self.optimizer = optimizer
+        self.max_concurrency = max_concurrency
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.data_path = data_path or module.DATA_PATH
+
+    def validate_profile(self, body):
+        for key in ('weight', 'goal', 'target_cal'):
+            if key not in body: raise ValueError(f"필수 항목 누락: {key}")
+        if body['goal'] not in self.module.MACRO_GOAL_RATIOS:
+            raise ValueError(f"지원하지 않는 목표: {body['goal']}")
+        return {
+            'weight': float(body['weight']),
+            'gender': body.get('gender', 'Unknown'),
+            'goal': body['goal'],
+            'target_cal': float(body['target_cal']),
+            'allergies': parse_str_list(body, 'allergies'),
+        }
+
+    def plan(self, body):
+        profile = self.validate_profile(body)
+        planner = body.get('planner', 'greedy')
+        if planner not in ('greedy', 'tiered', 'joint'): raise ValueError(f"지원하지 않는 planner: {planner}")
+        budget = float(body['budget']) if body.get('budget') is not None else None  # 하루 예산(원), planner='joint' 전용
+        return self.module.plan_day(self.optimizer, profile, planner, budget=budget)
+
+    def meal(self, body):
+        for key in ('target_cal', 'target_prot', 'target_fat', 'goal'):
+            if key not in body: raise ValueError(f"필수 항목 누락: {key}")
+        result = self.optimizer.recommend_daily_diet(
+            target_cal=float(body['target_cal']), target_prot=float(body['target_prot']),
+            target_fat=float(body['target_fat']), user_goal=body['goal'],
+            allergies_to_avoid=parse_str_list(body, 'allergies'),
+            excluded_codes=set(parse_str_list(body, 'excluded_codes')),
+            excluded_brands=set(parse_str_list(body, 'excluded_brands')),
+            prot_min_factor=float(body.get('prot_min_factor', 0.95)),
+            cal_range=float(body.get('cal_range', 0.15)),
+        )
+        if isinstance(result, str):
+            return {'success': False, 'reason': result}
+        return {'success': True, 'results': result}
+
+    def reload(self, body):
+        """진행 중인 요청이 모두 끝난 뒤(슬롯 전부 확보) 저장소를 교체해 요청 중간에 메뉴가 바뀌지 않게 한다"""
+        store = self.module.DailyDietOptimizer(self.data_path).store
+        acquired = 0
+        try:
+            for _ in range(self.max_concurrency - 1):  # 이 요청이 이미 슬롯 하나를 쥐고 있음
+                if not self.slots.acquire(timeout=self.queue_timeout): raise TimeoutError("reload timed out")
+                acquired += 1
+            self.optimizer.reload_store(store)
+        finally:
+            for _ in range(acquired): self.slots.release()
+        if self.optimizer.engine == 'table': self.optimizer.warm_combo_table()  # 새 메뉴의 표를 미리 로드/빌드 시작
+        return {'status': 'reloaded', 'items': len(store), 'brands': len(store.brand_names)}
+
+    def health(self):
+        store = self.optimizer.store
+        health = {'status': 'ok', 'items': len(store), 'brands': len(store.brand_names)}
+        if self.optimizer.result_cache is not None:
+            health['cache'] = self.optimizer.result_cache.stats()
+        if self.optimizer.profiler is not None:
+            health['profile'] = self.optimizer.profiler.to_dict()
+        return health
+
+    def metrics(self):
+        """Prometheus 텍스트 (프로파일링이 꺼져 있으면 None)"""
+        if self.optimizer.profiler is None: return None
+        return self.optimizer.profiler.to_prometheus()
+
+
+def make_handler(service):
+    routes = {'/plan': service.plan, '/meal': service.meal, '/reload': service.reload}
+
+    class RecommendationHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(to_jsonable(payload), ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_text(self, status, text):
+            body = text.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, service.health())
+            elif self.path == '/metrics':
+                text = service.metrics()
+                if text is None:
+                    self._send(404, {'error': 'profiling disabled (--profile)'})
+                else:
+                    self._send_text(200, text)
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            handler = routes.get(self.path)
+            if handler is None:
+                self._send(404, {'error': 'not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                length = -1
+            if length < 0:  # 숫자가 아니거나 음수면 rfile.read(-1)이 연결이 닫힐 때까지 막힌다
+                self._send(400, {'error': 'invalid Content-Length'})
+                return
+            if length > MAX_BODY_BYTES:
+                self._send(413, {'error': 'request too large'})
+                return
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except json.JSONDecodeError:
+                self._send(400, {'error': 'invalid json'})
+                return
+            if not isinstance(body, dict):
+                self._send(400, {'error': 'json object expected'})
+                return
+
+            if not service.slots.acquire(timeout=service.queue_timeout):
+                self._send(503, {'error': 'server busy'})
+                return
+            try:
+                self._send(200, handler(body))
+            except (ValueError, TypeError) as e:
+                self._send(400, {'error': str(e)})
+            except TimeoutError as e:
+                self._send(503, {'error': str(e)})
+            except Exception as e:  # 예상 못 한 오류도 응답은 돌려준다 (핸들러 스레드가 응답 없이 죽지 않게)
+                self._send(500, {'error': f"internal error: {type(e).__name__}"})
+            finally:
+                service.slots.release()
+
+        def log_message(self, format, *args):
+            pass  # 요청별 로그 생략 (버스트 시 stdout 병목 방지)
+
+    return RecommendationHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='식단 추천 상주 서비스')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data', default=None, help='final_nutrition_db.csv 경로 (기본: 옵티마이저 DATA_PATH)')
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument('--queue-timeout', type=float, default=DEFAULT_QUEUE_TIMEOUT)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help='끼니 결과 캐시 크기 (0이면 끔)')
+    parser.add_argument('--profile', action='store_true', help='단계별 시간/탈락 사유 계측 (GET /metrics)')
+    parser.add_argument('--engine', default='vectorized', choices=['vectorized', 'sampling', 'exhaustive', 'table'],
+                        help='끼니 추천 엔진 (table이면 시작 시 조합 표를 로드하거나 백그라운드로 빌드, 준비 전 요청은 exhaustive)')
+    args = parser.parse_args()
+
+    module = load_optimizer_module()
+    data_path = args.data or module.DATA_PATH
+    optimizer = module.DailyDietOptimizer(data_path, engine=args.engine, result_cache_size=args.cache_size, profile=args.profile)
+    if args.engine == 'table': optimizer.warm_combo_table()
+    service = RecommendationService(module, optimizer, args.max_concurrency, args.queue_timeout, data_path)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🚀 추천 서비스 시작: http://{args.host}:{args.port} (동시 처리 {args.max_concurrency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
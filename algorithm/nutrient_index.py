@@ -0,0 +1,72 @@
+"""
+영양소 다차원 범위 인덱스 (칼로리, 단백질, 지방, 나트륨)
+- 행을 칼로리 오름차순으로 정렬하고 고정 크기 블록마다 축별 최소/최대를 기록 (정렬 격자 + 블록 요약)
+- 상자 질의: 칼로리 구간은 이진 탐색, 다른 축 범위와 겹치지 않는 블록은 통째로 건너뛰고 남은 행만 검사
+- 메뉴 단품(DailyDietOptimizer, MealRecommendationEngine)과 조합 표(ComboTable) 후보 가지치기에 공용
+
+사용 예:
+    index = NutrientIndex(points)                    # points: (N, 4) = 칼로리, 단백질, 지방, 나트륨
+    ids = index.query(lo=(500, 30, None, None), hi=(700, None, None, 1500))
+"""
+
+import numpy as np
+
+DIMS = ('calories', 'protein', 'fat', 'sodium')
+DEFAULT_BLOCK_SIZE = 256
+
+
+class NutrientIndex:
+    """(N, len(DIMS)) 점 집합에 대한 상자 질의 인덱스. 질의 결과는 입력 행 번호"""
+
+    def __init__(self, points, block_size=DEFAULT_BLOCK_SIZE):
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != len(DIMS):
+            raise ValueError(f"points는 (N, {len(DIMS)}) 배열이어야 합니다: {points.shape}")
+        self.block_size = block_size
+        self.order = np.argsort(points[:, 0], kind='stable')
+        self.points = points[self.order]
+        self.calories = np.ascontiguousarray(self.points[:, 0])
+
+        starts = np.arange(0, len(self.points), block_size)
+        if len(starts):
+            self.block_min = np.minimum.reduceat(self.points, starts, axis=0)
+            self.block_max = np.maximum.reduceat(self.points, starts, axis=0)
+        else:
+            self.block_min = self.block_max = np.empty((0, len(DIMS)))
+
+    def __len__(self):
+        return len(self.points)
+
+    @staticmethod
+    def _bounds(values, fill):
+        """축별 경계 (None 또는 None 항목 = 제한 없음) -> float 배열"""
+        if values is None: return np.full(len(DIMS), fill)
+        if len(values) != len(DIMS): raise ValueError(f"경계는 {DIMS} 순서의 {len(DIMS)}개 값이어야 합니다")
+        return np.array([fill if v is None else v for v in values], dtype=np.float64)
+
+    def query(self, lo=None, hi=None):
+        """
+        lo <= 점 <= hi (축별, 양끝 포함)인 행 번호를 오름차순 int64 배열로 반환
+        lo/hi: DIMS 순서의 경계, 항목이 None이면 그 축은 제한 없음
+        """
+        lo, hi = self._bounds(lo, -np.inf), self._bounds(hi, np.inf)
+        first = np.searchsorted(self.calories, lo[0], side='left')
+        last = np.searchsorted(self.calories, hi[0], side='right')
+        if first >= last: return np.empty(0, dtype=np.int64)
+
+        bs = self.block_size
+        b0, b1 = first // bs, (last - 1) // bs + 1
+        block_ok = ((self.block_max[b0:b1] >= lo) & (self.block_min[b0:b1] <= hi)).all(axis=1)
+        if not block_ok.any(): return np.empty(0, dtype=np.int64)
+
+        rows = np.arange(first, last)
+        rows = rows[block_ok[rows // bs - b0]]
+        pts = self.points[rows]
+        rows = rows[((pts >= lo) & (pts <= hi)).all(axis=1)]
+        return np.sort(self.order[rows])
+
+    def mask(self, lo=None, hi=None):
+        """query와 같은 조건의 (N,) bool 배열"""
+        out = np.zeros(len(self.points), dtype=bool)
+        out[self.query(lo, hi)] = True
+        return out
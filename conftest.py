@@ -0,0 +1,2 @@
+# algorithm/ 의 *_test.py는 버전별 실행 스크립트(테스트 아님)라 수집에서 뺀다. 테스트는 tests/ 아래에 둔다.
+collect_ignore_glob = ['algorithm/*']
@@ -0,0 +1,38 @@
+"""tests/ 공용 픽스처: 합성 메뉴 CSV와 그 위의 최적화기, 끼니 요청 묶음"""
+
+import numpy as np
+import pytest
+
+from .support import MENU_BRANDS, MENU_ITEMS, ddo
+
+from benchmark_optimizer import generate_menu_csv  # noqa: E402 (support가 algorithm/을 경로에 추가)
+
+
+@pytest.fixture(scope='session')
+def menu_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('menu') / 'final_nutrition_db.csv')
+    generate_menu_csv(path, MENU_ITEMS, MENU_BRANDS, ddo, seed=0)
+    return path
+
+
+@pytest.fixture(scope='module')
+def optimizer(menu_path):
+    return ddo.DailyDietOptimizer(menu_path, use_snapshot=False, seed=0)
+
+
+@pytest.fixture(scope='module')
+def meal_requests(optimizer):
+    rng = np.random.default_rng(1)
+    goals = list(ddo.MACRO_GOAL_RATIOS)
+    codes = [str(c) for c in optimizer.store.food_codes if c]
+    requests = []
+    for k in range(12):
+        requests.append({
+            'target_cal': float(rng.uniform(400, 900)), 'target_prot': float(rng.uniform(15, 50)),
+            'target_fat': float(rng.uniform(10, 30)), 'user_goal': goals[k % len(goals)],
+            'allergies_to_avoid': [['난류'], [], ['우유', '대두']][k % 3],
+            'excluded_codes': set(rng.choice(codes, 3, replace=False)) if k % 2 else set(),
+            'excluded_brands': {optimizer.store.brand_names[k % MENU_BRANDS]} if k % 4 == 3 else set(),
+            'prot_min_factor': [0.95, 0.7][k % 2], 'cal_range': [0.15, 0.3][k % 2],
+        })
+    return requests
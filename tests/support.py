@@ -0,0 +1,35 @@
+"""
+tests/ 공용 도우미: 최적화 모듈 로드, 결과 비교용 서명, 파레토 기준 구현
+버전 번호가 붙은 파일명은 import 문으로 불러올 수 없어 서버와 같은 로더를 쓴다.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+ALGORITHM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'algorithm')
+if ALGORITHM_DIR not in sys.path: sys.path.append(ALGORITHM_DIR)
+
+from diet_recommendation_server import load_optimizer_module  # noqa: E402
+
+ddo = load_optimizer_module()
+
+MENU_ITEMS = 300
+MENU_BRANDS = 3
+
+
+def signature(result):
+    """추천 결과 -> 비교 가능한 튜플 목록 (실패 문자열은 그대로)"""
+    if isinstance(result, str): return result
+    return [(c['brand'], c['price'], round(float(c['error']), 9), tuple(i['item_id'] for i in c['combo'])) for c in result]
+
+
+def brute_force_front(points):
+    """O(n^2) 기준 구현: 다른 어떤 점에도 지배되지 않는 행"""
+    points = np.asarray(points, dtype=np.float64)
+    keep = []
+    for i, p in enumerate(points):
+        dominated = ((points <= p).all(axis=1) & (points < p).any(axis=1)).any()
+        if not dominated: keep.append(i)
+    return np.array(keep, dtype=np.int64)
@@ -0,0 +1,61 @@
+"""
+누적기: ParetoAccumulator vs 전수 파레토 프런티어, TopKAccumulator vs 전체 정렬 상위 k
+"""
+
+import numpy as np
+
+from .support import brute_force_front, ddo
+
+
+def test_pareto_accumulator_push_batch_matches_brute_force():
+    rng = np.random.default_rng(3)
+    objectives = [('price', 1), ('error', 1), ('diversity_score', -1)]
+    points = np.column_stack([
+        rng.integers(10, 40, 600) * 100.0, rng.integers(0, 20, 600) / 10, -rng.integers(0, 5, 600) * 0.25,
+    ])
+    acc = ddo.ParetoAccumulator(objectives)
+    for start in range(0, len(points), 97):
+        batch = points[start:start + 97]
+        acc.push_batch(batch, lambda r, start=start: start + r)
+
+    unique_points, first = np.unique(points, axis=0, return_index=True)
+    expected = {tuple(unique_points[i]) for i in brute_force_front(unique_points)}
+    got = [tuple(points[row]) for row in acc.results()]
+    assert len(got) == len(set(got))  # 같은 점은 한 번만
+    assert set(got) == expected
+    assert {tuple(p) for p in acc.points} == expected
+
+
+def test_pareto_accumulator_push_matches_push_batch():
+    rng = np.random.default_rng(4)
+    objectives = [('price', 1), ('error', 1)]
+    points = np.column_stack([rng.integers(1, 30, 300).astype(float), rng.integers(0, 30, 300) / 10])
+    single, batch = ddo.ParetoAccumulator(objectives), ddo.ParetoAccumulator(objectives)
+    for p in points: single.push({'price': p[0], 'error': p[1]})
+    batch.push_batch(points, lambda r: {'price': points[r, 0], 'error': points[r, 1]})
+    as_set = lambda acc: {(c['price'], c['error']) for c in acc.results()}
+    assert as_set(single) == as_set(batch)
+
+
+def test_topk_accumulator_matches_sorted_unique_head():
+    rng = np.random.default_rng(6)
+    combos = [(str(rng.choice(['A', 'B'])), tuple(sorted(rng.choice(20, 2, replace=False).tolist()))) for _ in range(400)]
+    # 같은 조합은 같은 가격/오차로 여러 번 뽑힌다
+    price_of = {c: int(rng.integers(10, 30)) * 100 for c in set(combos)}
+    error_of = {c: float(rng.integers(0, 10)) / 10 for c in set(combos)}
+    make = lambda c: {'brand': c[0], 'combo': [{'item_id': i} for i in c[1]], 'price': price_of[c], 'error': error_of[c]}
+    expected = sorted(((price_of[c], error_of[c]) for c in set(combos)))[:5]
+
+    single = ddo.TopKAccumulator(k=5)
+    for c in combos: single.push(make(c))
+    batch = ddo.TopKAccumulator(k=5)
+    for start in range(0, len(combos), 64):
+        chunk = combos[start:start + 64]
+        prices = np.array([price_of[c] for c in chunk], dtype=np.float64)
+        errors = np.array([error_of[c] for c in chunk])
+        batch.push_batch(prices, errors, lambda r, chunk=chunk: make(chunk[r]))
+
+    for acc in (single, batch):
+        got = acc.results()
+        assert [(c['price'], c['error']) for c in got] == expected
+        assert len({ddo.TopKAccumulator.key_of(c) for c in got}) == len(got)
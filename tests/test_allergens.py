@@ -0,0 +1,47 @@
+"""
+알레르기 비트마스크 인덱스 vs 기존 부분 문자열 검색
+"""
+
+import pytest
+
+from .support import ddo
+
+ALLERGY_SETS = [
+    [], ['난류'], ['우유', '대두'], ['밀', '새우', '땅콩'], ['난류', '우유', '대두', '밀', '게'],
+    ['복숭아'], ['새'], ['우유', '복숭아'], ['DAEDU', '난류'],  # 사전 밖 항목은 부분 문자열 검색
+]
+
+
+def reference_safe_ids(store, ids, allergies):
+    """비트마스크 도입 전: 소문자 알레르기 문자열이 allergens_scraped에 부분 문자열로 있으면 제외"""
+    allergies = [a.lower() for a in allergies]
+    return [i for i in ids if not any(a in store.allergen_texts[i] for a in allergies)]
+
+
+@pytest.mark.parametrize('allergies', ALLERGY_SETS)
+def test_safe_item_ids_match_substring_search(optimizer, allergies):
+    store = optimizer.store
+    for brand in store.brand_names:
+        safe = optimizer.get_safe_item_ids(brand, allergies)
+        for cat, ids in store.views[brand].items():
+            assert safe[cat].tolist() == reference_safe_ids(store, ids.tolist(), allergies)
+
+
+def test_allergen_mask_matches_substring_for_every_item(optimizer):
+    store = optimizer.store
+    for i in range(len(store)):
+        text = store.allergen_texts[i]
+        expected = sum(1 << bit for bit, allergen in enumerate(ddo.ALLERGEN_VOCAB) if allergen in text)
+        assert int(store.allergen_masks[i]) == expected
+
+
+def test_safe_ids_cache_key_is_bounded_to_vocab(menu_path):
+    optimizer = ddo.DailyDietOptimizer(menu_path, use_snapshot=False)
+    brand = optimizer.store.brand_names[0]
+    first = optimizer.get_safe_item_ids(brand, ['우유', '난류'])
+    # 순서/대소문자만 다른 요청은 같은 항목을 쓴다
+    assert optimizer.get_safe_item_ids(brand, ['난류', '우유']) is first
+    assert len(optimizer._safe_ids_cache) == 1
+    # 사전 밖 문자열은 요청마다 달라질 수 있어 캐시에 쌓지 않는다
+    for k in range(20): optimizer.get_safe_item_ids(brand, [f'unknown-{k}'])
+    assert len(optimizer._safe_ids_cache) == 1
@@ -0,0 +1,29 @@
+"""
+recommend_batch / plan_days 일괄 처리 vs 요청별 exhaustive 결과
+"""
+
+from .support import ddo, signature
+
+
+def test_batch_matches_exhaustive(optimizer, meal_requests):
+    expected = [signature(optimizer.recommend_daily_diet(engine='exhaustive', **req)) for req in meal_requests]
+    assert [signature(r) for r in optimizer.recommend_batch(meal_requests)] == expected
+    assert any(not isinstance(r, str) for r in expected)
+
+
+def test_plan_days_matches_exhaustive_plan_day(menu_path):
+    optimizer = ddo.DailyDietOptimizer(menu_path, engine='exhaustive', use_snapshot=False, seed=0)
+    user_gen = ddo.RandomUserGenerator(seed=5)
+    users = [user_gen.generate() for _ in range(8)]
+    day_signature = lambda r: (r['success'], r.get('price'), [signature([c]) for c in r.get('results', [])])
+    assert [day_signature(r) for r in ddo.plan_days(optimizer, users)] == [day_signature(ddo.plan_day(optimizer, u)) for u in users]
+
+
+def test_vectorized_batch_returns_feasible_unique_combos(optimizer, meal_requests):
+    for req, result in zip(meal_requests, optimizer.recommend_batch(meal_requests, engine='vectorized', rng=0)):
+        if isinstance(result, str): continue
+        combos = [tuple(i['item_id'] for i in c['combo']) for c in result]
+        assert len(combos) == len(set(combos))
+        for c in result:
+            assert c['brand'] not in req['excluded_brands']
+            assert c['protein'] >= req['target_prot'] * req['prot_min_factor'] - 1e-6
@@ -0,0 +1,68 @@
+"""
+benchmark_optimizer 하네스 스모크 테스트: 합성 메뉴 생성, run_size 보고 항목, main의 JSON 출력
+"""
+
+import csv
+import json
+import sys
+
+import pytest
+
+from .support import ddo
+
+import benchmark_optimizer as bench  # noqa: E402 (support가 algorithm/을 경로에 추가)
+
+ITEMS, BRANDS, USERS, SEED = 200, 3, 2, 7
+ROW_KEYS = {
+    'items', 'items_requested', 'brands', 'engine', 'planner', 'users', 'seed', 'generate_s', 'build_s', 'search_count',
+    'search_p50_ms', 'search_p95_ms', 'day_p50_ms', 'day_p95_ms', 'days_per_sec_per_core', 'success_rate',
+    'peak_rss_mb', 'store_mb',
+}
+
+
+def test_generate_menu_csv(tmp_path):
+    path = tmp_path / 'menu.csv'
+    bench.generate_menu_csv(str(path), ITEMS, BRANDS, ddo, seed=SEED)
+    with open(path, encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == ITEMS and list(rows[0]) == bench.CSV_COLUMNS
+    assert {r['store_name'] for r in rows} <= {f'Brand{b:02d}' for b in range(BRANDS)}
+    assert len({r['FOOD_CODE'] for r in rows}) == ITEMS
+
+    # 같은 시드면 같은 파일
+    again = tmp_path / 'again.csv'
+    bench.generate_menu_csv(str(again), ITEMS, BRANDS, ddo, seed=SEED)
+    assert path.read_text(encoding='utf-8') == again.read_text(encoding='utf-8')
+
+
+@pytest.mark.parametrize('planner', ['greedy', 'tiered'])
+def test_run_size_reports_all_keys(planner):
+    row = bench.run_size(ITEMS, BRANDS, USERS, SEED, 'vectorized', planner)
+    assert set(row) == ROW_KEYS
+    assert (row['items_requested'], row['brands'], row['users'], row['planner']) == (ITEMS, BRANDS, USERS, planner)
+    assert 0 < row['items'] <= ITEMS
+    assert 0.0 <= row['success_rate'] <= 1.0
+    assert 0 < row['search_p50_ms'] <= row['search_p95_ms']
+    assert 0 < row['day_p50_ms'] <= row['day_p95_ms']
+    assert row['search_count'] >= USERS and row['days_per_sec_per_core'] > 0
+    if bench.resource is not None: assert row['peak_rss_mb'] > 0
+    assert row['store_mb'] > 0
+
+
+def test_run_size_profile(capsys):
+    row = bench.run_size(ITEMS, BRANDS, USERS, SEED, 'vectorized', 'greedy', profile=True)
+    assert set(row) == ROW_KEYS | {'profile'}
+    assert row['profile']['counters']['requests'] == row['search_count']  # 워밍업은 빠진다
+    bench.print_table([row])
+    bench.print_profiles([row])
+    out = capsys.readouterr().out
+    assert f"{row['items']:,} items" in out and 'stages:' in out
+
+
+def test_main_writes_json(tmp_path, monkeypatch):
+    path = tmp_path / 'bench.json'
+    monkeypatch.setattr(sys, 'argv', ['benchmark_optimizer.py', '--items', str(ITEMS), '--brands', str(BRANDS),
+                                      '--users', str(USERS), '--seed', str(SEED), '--json', str(path)])
+    bench.main()
+    rows = json.loads(path.read_text(encoding='utf-8'))
+    assert len(rows) == 1 and set(rows[0]) == ROW_KEYS
@@ -0,0 +1,22 @@
+"""
+FoodCategorizer 정규식 분류 vs 기존 키워드 루프
+"""
+
+from .support import ddo
+
+
+def reference_category(categorizer, item_name):
+    """정규식 도입 전 FoodCategorizer.assign_category (키워드 순서대로 부분 문자열 검사)"""
+    name = item_name.replace(" ", "")
+    for cat, kws in categorizer.keywords.items():
+        if any(kw in name for kw in kws): return cat
+    return 'SIDE'
+
+
+def test_categorizer_matches_keyword_loop(optimizer):
+    categorizer = ddo.FoodCategorizer()
+    names = [optimizer.store.record(i)['menu_name'] for i in range(len(optimizer.store))]
+    names += ['치킨버거', '치킨 버거', '버거 치킨', '콜라', '초코 우유', '우유식빵', '바닐라 라떼', '김치찌개', '물냉면', '새우 칩', '알 수 없음', '']
+    expected = [reference_category(categorizer, name) for name in names]
+    assert [categorizer.assign_category(name) for name in names] == expected
+    assert list(ddo.FoodCategorizer().assign_categories(names)) == expected
@@ -0,0 +1,102 @@
+"""
+engine='table' 조합 표: exhaustive 대비 근사 품질, 백그라운드 빌드, 제외 코드가 많을 때 전수 탐색 폴백
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from .support import ddo, signature
+
+REQUEST = {'target_cal': 700, 'target_prot': 30, 'target_fat': 20, 'user_goal': '건강관리', 'prot_min_factor': 0.7, 'cal_range': 0.3}
+
+
+@pytest.fixture(scope='module')
+def table_optimizer(menu_path):
+    optimizer = ddo.DailyDietOptimizer(menu_path, use_snapshot=False, seed=0)
+    assert optimizer.warm_combo_table(wait=True) is not None
+    return optimizer
+
+
+@pytest.fixture
+def blocked_build(monkeypatch):
+    """ComboTable.build를 release가 set될 때까지 막는다 (빌드 중 상태 재현)"""
+    started, release = threading.Event(), threading.Event()
+    build = ddo.ComboTable.build
+
+    def slow_build(optimizer):
+        started.set()
+        release.wait(10)
+        return build(optimizer)
+
+    monkeypatch.setattr(ddo.ComboTable, 'build', slow_build)
+    yield started, release
+    release.set()
+
+
+def count_exhaustive(monkeypatch, optimizer):
+    calls = []
+    exhaustive = optimizer._recommend_exhaustive
+    monkeypatch.setattr(optimizer, '_recommend_exhaustive', lambda *args, **kwargs: calls.append(1) or exhaustive(*args, **kwargs))
+    return calls
+
+
+def test_table_matches_exhaustive_cheapest(table_optimizer, meal_requests):
+    """조합 표는 셀별 가지치기된 근사: 성공 여부와 최저가 조합(가격, 오차)이 같고 결과는 모두 조건을 만족해야 한다"""
+    for req in meal_requests:
+        exhaustive = table_optimizer.recommend_daily_diet(engine='exhaustive', **req)
+        table = table_optimizer.recommend_daily_diet(engine='table', **req)
+        assert isinstance(table, str) == isinstance(exhaustive, str)
+        if isinstance(table, str): continue
+        assert (table[0]['price'], round(float(table[0]['error']), 9)) == (exhaustive[0]['price'], round(float(exhaustive[0]['error']), 9))
+        for c in table:
+            assert c['brand'] not in req['excluded_brands']
+            assert req['target_cal'] * (1 - req['cal_range']) - 1e-6 <= c['calories'] <= req['target_cal'] * (1 + req['cal_range']) + 1e-6
+            assert c['protein'] >= req['target_prot'] * req['prot_min_factor'] - 1e-6
+            assert not {i['FOOD_CODE'] for i in c['combo']} & req['excluded_codes']
+
+
+def test_missing_table_is_built_in_background(menu_path, blocked_build, monkeypatch):
+    started, release = blocked_build
+    optimizer = ddo.DailyDietOptimizer(menu_path, use_snapshot=False, seed=0)
+    calls = count_exhaustive(monkeypatch, optimizer)
+
+    # 빌드가 끝나기 전 요청은 막히지 않고 exhaustive로 처리된다
+    result = optimizer.recommend_daily_diet(engine='table', **REQUEST)
+    assert started.wait(5)
+    assert optimizer.combo_table is None and len(calls) == 1
+    assert signature(result) == signature(optimizer.recommend_daily_diet(engine='exhaustive', **REQUEST))
+
+    release.set()
+    table = optimizer.warm_combo_table(wait=True)
+    assert table is not None and optimizer.get_combo_table() is table
+    optimizer.recommend_daily_diet(engine='table', **REQUEST)
+    assert len(calls) == 2  # 위의 exhaustive 호출 한 번만 늘었다
+
+
+def test_reload_during_build_discards_stale_table(menu_path, blocked_build):
+    started, release = blocked_build
+    optimizer = ddo.DailyDietOptimizer(menu_path, use_snapshot=False, seed=0)
+    assert optimizer.get_combo_table() is None
+    builder = optimizer._combo_table_builder
+    assert started.wait(5)
+
+    optimizer.reload_store(ddo.DailyDietOptimizer(menu_path, use_snapshot=False).store)
+    release.set()
+    builder.join(10)
+    assert optimizer.combo_table is None  # 이전 저장소로 만든 표는 버린다
+
+
+def test_heavy_exclusion_falls_back_to_exhaustive(table_optimizer, monkeypatch):
+    store = table_optimizer.store
+    codes = [str(c) for c in store.food_codes if c]
+    excluded = set(np.random.default_rng(0).choice(codes, int(len(codes) * ddo.COMBO_TABLE_MAX_EXCLUDED * 2), replace=False))
+    calls = count_exhaustive(monkeypatch, table_optimizer)
+
+    result = table_optimizer.recommend_daily_diet(engine='table', excluded_codes=excluded, **REQUEST)
+    assert len(calls) == 1
+    assert signature(result) == signature(table_optimizer.recommend_daily_diet(engine='exhaustive', excluded_codes=excluded, **REQUEST))
+
+    table_optimizer.recommend_daily_diet(engine='table', excluded_codes=set(sorted(excluded)[:1]), **REQUEST)
+    assert len(calls) == 2  # 제외가 적으면 표를 쓴다 (위 exhaustive 호출 한 번만 늘었다)
@@ -0,0 +1,38 @@
+"""
+다양성 점수: 카테고리 개수 닫힌 식 / 슬롯 일괄 계산 vs 기존 원-핫 벡터 쌍별 해밍 거리 평균
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from .support import ddo
+
+
+def reference_diversity(combo):
+    """개수 공식 도입 전 get_diversity_score (create_vector + calculate_hamming_distance)"""
+    if len(combo) < 2: return 0.0
+    vectors = [np.array([1 if cat == item.get('category_tag', 'ETC') else 0 for cat in ['MAIN', 'SIDE', 'DRINK', 'SNACK']]) for item in combo]
+    return np.mean([np.sum(np.abs(a - b)) for a, b in itertools.combinations(vectors, 2)])
+
+
+@pytest.mark.parametrize('size', [0, 1, 2, 3, 4, 5])
+def test_closed_form_matches_pairwise_hamming(size):
+    manager = ddo.DiversityManager()
+    tags = ['MAIN', 'SIDE', 'DRINK', 'SNACK', 'ETC', None]
+    for tags_combo in itertools.product(tags, repeat=size):
+        combo = [{'category_tag': t} if t is not None else {} for t in tags_combo]
+        assert manager.get_diversity_score(combo) == pytest.approx(reference_diversity(combo), abs=1e-12)
+
+
+def test_slot_scores_match_per_combo_score(optimizer):
+    pool = optimizer.build_candidate_pool([], set(), set())
+    combo_ids, _ = optimizer._sample_combo_ids(pool, 3000, np.random.default_rng(2))
+    scores = optimizer._slot_diversity_scores(combo_ids)
+    # 슬롯 공식은 후보 풀 구성(MAIN, SIDE, SIDE, DRINK)을 가정하고 실제 카테고리를 보지 않는다
+    store = optimizer.store
+    for r, ids in enumerate(combo_ids):
+        combo = [store.record(i) for i in ids if i >= 0]
+        assert [c['category_tag'] for c in combo] == [slot for slot, i in zip(['MAIN', 'SIDE', 'SIDE', 'DRINK'], ids) if i >= 0]
+        assert scores[r] == pytest.approx(reference_diversity(combo), abs=1e-12)
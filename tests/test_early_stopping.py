@@ -0,0 +1,81 @@
+"""
+샘플링 조기 종료: 수렴 / 불가능 / 시간 예산 판정과 stats=, samples_used 기록
+"""
+
+import pytest
+
+from .support import ddo
+
+MEAL = {'target_cal': 650, 'target_prot': 30, 'target_fat': 20, 'user_goal': '건강관리'}
+# 합성 메뉴에서 유효 조합이 수천 개 중 하나꼴인 요청 (첫 묶음은 비어 있을 수 있다)
+RARE_MEAL = {'target_cal': 428, 'target_prot': 58, 'target_fat': 29, 'user_goal': '근육증가'}
+NUM_SIMULATIONS = 400_000
+
+
+class FixedResults:
+    """results()만 흉내 내는 누적기"""
+    def __init__(self, *pairs): self.pairs = pairs
+    def results(self): return [{'price': p, 'error': e} for p, e in self.pairs]
+
+
+@pytest.mark.parametrize('engine', ['vectorized', 'sampling'])
+def test_converged_search_stops_before_budget(optimizer, engine):
+    stats = {}
+    result = optimizer.recommend_daily_diet(engine=engine, num_simulations=NUM_SIMULATIONS, rng=0, stats=stats, **MEAL)
+    assert not isinstance(result, str)
+    assert stats['stop_reason'] == 'converged'
+    assert stats['feasible'] > 0 and stats['samples'] < NUM_SIMULATIONS
+    assert {c['samples_used'] for c in result} == {stats['samples']}
+
+
+def test_infeasible_search_stops_after_rule_of_three(optimizer):
+    stats = {}
+    floor = 1e-3
+    result = optimizer.recommend_daily_diet(600, 300, 20, '건강관리', num_simulations=NUM_SIMULATIONS, rng=0, stats=stats, min_feasible_rate=floor)
+    assert isinstance(result, str)
+    assert stats['stop_reason'] == 'infeasible' and stats['feasible'] == 0
+    # 3/n < min_feasible_rate가 되는 첫 묶음에서 멈춘다
+    assert stats['samples'] <= 3 / floor + ddo.VECTOR_CHUNK_SIZE
+
+
+def test_infeasible_rule_is_off_by_default(optimizer):
+    stats = {}
+    result = optimizer.recommend_daily_diet(600, 300, 20, '건강관리', num_simulations=20000, rng=0, stats=stats, patience=None)
+    assert isinstance(result, str)
+    assert stats['stop_reason'] is None and stats['samples'] == 20000
+
+
+def test_defaults_still_solve_rare_but_feasible_request(optimizer):
+    assert not isinstance(optimizer.recommend_daily_diet(engine='exhaustive', **RARE_MEAL), str)
+    stats = {}
+    result = optimizer.recommend_daily_diet(rng=0, stats=stats, **RARE_MEAL)
+    assert not isinstance(result, str)
+    assert stats['feasible'] > 0 and stats['stop_reason'] != 'infeasible'
+
+
+def test_disabled_rules_use_every_sample(optimizer):
+    stats = {}
+    optimizer.recommend_daily_diet(num_simulations=20000, rng=0, stats=stats, patience=None, min_feasible_rate=None, **MEAL)
+    assert stats['stop_reason'] is None and stats['samples'] == 20000
+
+
+def test_time_budget_stops_after_first_chunk(optimizer):
+    stats = {}
+    optimizer.recommend_daily_diet(num_simulations=NUM_SIMULATIONS, rng=0, stats=stats, patience=None, time_budget=0, **MEAL)
+    assert stats['stop_reason'] == 'time_budget' and stats['samples'] == ddo.VECTOR_CHUNK_SIZE
+
+
+def test_stopper_counts_only_top_five_changes_as_improvement():
+    stopper = ddo.EarlyStopper(patience=100, min_feasible_rate=None)
+    assert not stopper.update(FixedResults((5, 1.0)), 60, 1, admitted=1)
+    # 새로 들어온 조합이 있어도 상위 5개(가격, 오차)가 그대로면 개선이 아니다
+    assert not stopper.update(FixedResults((5, 1.0)), 60, 1, admitted=1)
+    assert stopper.update(FixedResults((5, 1.0)), 40, 0, admitted=0)
+    assert stopper.reason == 'converged' and stopper.samples == 160
+
+    stopper = ddo.EarlyStopper(patience=100, min_feasible_rate=None)
+    stopper.update(FixedResults((5, 1.0)), 60, 1, admitted=1)
+    assert not stopper.update(FixedResults((4, 2.0), (5, 1.0)), 60, 1, admitted=1)  # 상위 5개가 바뀌면 다시 센다
+    assert not stopper.update(FixedResults((4, 2.0), (5, 1.0)), 60, 0, admitted=0)
+    assert stopper.update(FixedResults((4, 2.0), (5, 1.0)), 40, 0, admitted=0)
+    assert stopper.samples == 220
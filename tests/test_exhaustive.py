@@ -0,0 +1,91 @@
+"""
+engine='exhaustive' (분기 한정) vs 가지치기 없는 itertools.product 전수 열거 + pareto_front_indices
+다른 테스트들이 exhaustive를 기준값으로 쓰므로 가지치기 자체를 여기서 검증한다.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from .support import ddo, signature
+
+OBJECTIVE_SETS = [
+    ddo.PARETO_OBJECTIVES,
+    [('price', 1), ('error', 1)],
+    [('error', 1), ('sodium', 1), ('diversity_score', -1)],
+    [('price', 1), ('diversity_score', 1)],  # 다양성 최소화: 하한을 못 구해 가지치기 없이 탐색
+]
+
+
+def brute_force_rows(optimizer, meal):
+    """후보 풀의 모든 (메인, 사이드 0~2개, 음료 0~1개) 조합 중 영양 조건을 만족하고 재료가 겹치지 않는 행"""
+    cal_range, prot_min_factor = meal['cal_range'], meal['prot_min_factor']
+    pool = optimizer.build_candidate_pool(meal['allergies_to_avoid'], meal['excluded_codes'], meal['excluded_brands'],
+                                          cal_max=meal['target_cal'] * (1 + cal_range))
+    brands = list(pool)
+    ids, brand_idx = [], []
+    for b_idx, brand in enumerate(brands):
+        cats = pool[brand]
+        side_opts = [(-1, -1)] + [(int(s), -1) for s in cats['SIDE']] + [tuple(map(int, p)) for p in itertools.combinations_with_replacement(cats['SIDE'], 2)]
+        drink_opts = np.array([-1] + [int(d) for d in cats['DRINK']], dtype=np.int64)
+        bases = np.array([(int(m), s1, s2) for m, (s1, s2) in itertools.product(cats['MAIN'], side_opts)], dtype=np.int64)
+        # (메인, 사이드) x 음료 곱집합: 행 순서는 itertools.product(메인, 사이드, 음료)와 같다
+        combos = np.column_stack([np.repeat(bases, len(drink_opts), axis=0), np.tile(drink_opts, len(bases))])
+        ids.append(combos)
+        brand_idx.append(np.full(len(combos), b_idx))
+    ids, brand_idx = np.vstack(ids), np.concatenate(brand_idx)
+
+    totals, errors, is_sodium_valid, is_protein_min_met, is_cal_valid = optimizer.evaluate_combos_batch(
+        ids, meal['target_cal'], meal['target_prot'], meal['target_fat'], prot_min_factor, cal_range
+    )
+    rows = np.flatnonzero(is_sodium_valid & is_protein_min_met & is_cal_valid & ~optimizer.combo_overlaps(ids))
+    return pool, brands, ids, brand_idx, totals, errors, rows
+
+
+@pytest.fixture(scope='module')
+def brute_force(optimizer, meal_requests):
+    return [brute_force_rows(optimizer, meal) for meal in meal_requests]
+
+
+def reference_front(optimizer, brands, ids, brand_idx, totals, errors, rows, objectives):
+    """기준 프런티어 -> signature()와 같은 형식의 튜플 목록 (가격 -> 오차 순)"""
+    points = optimizer._objective_points(totals[rows], errors[rows], optimizer._slot_diversity_scores(ids[rows]), objectives)
+    front = [
+        (brands[brand_idx[r]], int(round(totals[r, ddo.COL_PRICE])), float(errors[r]), tuple(int(i) for i in ids[r] if i >= 0))
+        for r in rows[ddo.pareto_front_indices(points)]
+    ]
+    front.sort(key=lambda c: (c[1], c[2]))
+    return [(brand, price, round(error, 9), combo) for brand, price, error, combo in front]
+
+
+@pytest.mark.parametrize('objectives', OBJECTIVE_SETS, ids=lambda objs: '-'.join(key for key, _ in objs))
+def test_exhaustive_matches_unpruned_enumeration(optimizer, meal_requests, brute_force, objectives):
+    solved = 0
+    for meal, (pool, brands, ids, brand_idx, totals, errors, rows) in zip(meal_requests, brute_force):
+        result = optimizer._recommend_exhaustive(
+            pool, meal['target_cal'], meal['target_prot'], meal['target_fat'], meal['prot_min_factor'], meal['cal_range'], objectives
+        )
+        expected = reference_front(optimizer, brands, ids, brand_idx, totals, errors, rows, objectives)
+        # 프런티어는 같은 조합 집합이고, 가격 -> 오차 상위 5개는 같은 순서
+        assert sorted(signature(result)) == sorted(expected)
+        assert signature(optimizer.get_pareto_optimal_sets(result, objectives)) == expected[:5]
+        solved += bool(expected)
+    assert solved >= len(meal_requests) // 2  # 기준값이 대부분 비어 있으면 비교가 의미 없다
+
+
+def test_enumeration_covers_every_sampled_feasible_combo(optimizer):
+    # 샘플링 엔진은 두 번째 사이드를 독립으로 뽑으므로 같은 사이드 두 개도 전수 탐색 공간에 있어야 한다
+    target_cal, target_prot = 700, 25
+    pool = optimizer.build_candidate_pool([], set(), set())
+    sampled, _ = optimizer._sample_combo_ids(pool, 200_000, np.random.default_rng(0))
+    _, _, sodium_ok, protein_ok, cal_ok = optimizer.evaluate_combos_batch(sampled, target_cal, target_prot, 20)
+    sampled = sampled[sodium_ok & protein_ok & cal_ok]
+
+    canonical = lambda rows: {(r[0], *sorted(r[1:3]), r[3]) for r in rows.tolist()}
+    enumerated = set()
+    for cats in pool.values():
+        enumerated |= canonical(optimizer._enumerate_feasible_combos(cats['MAIN'], cats['SIDE'], cats['DRINK'], target_cal, target_prot, 0.95, 0.15))
+    doubled = sampled[(sampled[:, 1] >= 0) & (sampled[:, 1] == sampled[:, 2])]
+    assert len(doubled)
+    assert canonical(sampled) <= enumerated
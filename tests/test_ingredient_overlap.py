@@ -0,0 +1,45 @@
+"""
+재료 중복 판정: 메뉴명 비트마스크 / 조합 일괄 판정 vs 기존 키워드 Counter 검사
+"""
+
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from .support import ddo
+
+NAMES = ['참치마요 삼각김밥', '치킨 샐러드', '닭가슴살 소시지', '불고기 버거', '소고기 덮밥', '돈까스 도시락', '스팸 김밥',
+         '햄치즈 샌드위치', '새우튀김', '오징어 볶음', '제육 덮밥', '갈비 삼각김밥', '베이컨 에그', '계란말이', '명란 마요', '콜라', '바나나우유', '']
+
+
+def reference_overlap(combo):
+    """비트마스크 도입 전 check_ingredient_overlap (재료 키워드별 부분 문자열 검사 후 Counter)"""
+    if len(combo) < 2: return False
+    found = [ing for item in combo for ing in ddo.INGREDIENT_VOCAB if ing in item.get('menu_name', item.get('식품명', ''))]
+    return any(count > 1 for count in Counter(found).values())
+
+
+@pytest.mark.parametrize('size', [1, 2, 3])
+def test_name_masks_match_keyword_counter(size):
+    manager = ddo.DiversityManager()
+    for names in itertools.product(NAMES, repeat=size):
+        combo = [{'menu_name': name} for name in names]
+        assert manager.check_ingredient_overlap(combo) == reference_overlap(combo)
+
+
+def test_legacy_name_key_is_used():
+    manager = ddo.DiversityManager()
+    combo = [{'식품명': '치킨마요'}, {'식품명': '치킨너겟'}]
+    assert reference_overlap(combo)
+    assert manager.check_ingredient_overlap(combo)
+
+
+def test_combo_overlaps_match_keyword_counter(optimizer):
+    pool = optimizer.build_candidate_pool([], set(), set())
+    combo_ids, _ = optimizer._sample_combo_ids(pool, 3000, np.random.default_rng(3))
+    overlaps = optimizer.combo_overlaps(combo_ids)
+    expected = [reference_overlap([optimizer.store.record(i) for i in ids if i >= 0]) for ids in combo_ids]
+    assert overlaps.tolist() == expected
+    assert any(expected) and not all(expected)
@@ -0,0 +1,158 @@
+"""
+JointDayPlanner (plan_day(planner='joint')): 하루 계획이 MIP 제약을 모두 지키는지, 예산 상한과 웜 스타트 힌트 키
+"""
+
+import numpy as np
+import pytest
+
+from .support import ddo
+
+PROFILES = [
+    {'weight': weight, 'gender': 'M', 'goal': goal, 'target_cal': cal, 'allergies': allergies}
+    for goal in ddo.MACRO_GOAL_RATIOS
+    for cal, weight, allergies in [(1800, 70, ['난류']), (2400, 80, []), (1500, 55, ['우유', '대두'])]
+]
+BUDGET_PROFILE = {'weight': 70, 'gender': 'M', 'goal': '건강관리', 'target_cal': 1800, 'allergies': ['난류']}
+
+
+def assert_day_constraints(plan, profile, budget=None):
+    planner = ddo.JointDayPlanner
+    meals = plan['results']
+    assert plan['success'] and len(meals) == planner.MEALS_COUNT
+
+    # 합성 메뉴(3개 브랜드)에서는 브랜드 중복 금지 단계에서 해가 나온다
+    assert len({m['brand'] for m in meals}) == planner.MEALS_COUNT
+    items = [item for m in meals for item in m['combo']]
+    codes = [item['FOOD_CODE'] or item['item_id'] for item in items]
+    assert len(set(codes)) == len(codes)
+    allergy_mask = ddo.build_allergy_mask(profile['allergies'])[0]
+    assert not any(item['allergen_mask'] & allergy_mask for item in items)
+
+    target_cal = profile['target_cal']
+    calories = sum(m['calories'] for m in meals)
+    assert calories == pytest.approx(plan['calories'])
+    assert target_cal * (1 - planner.DAY_CAL_RANGE) - 1e-6 <= calories <= target_cal * (1 + planner.DAY_CAL_RANGE) + 1e-6
+
+    assert sum(m['sodium'] for m in meals) <= ddo.SODIUM_MAX_LIMIT + 1e-6
+    assert all(m['sodium'] <= ddo.SODIUM_MAX_LIMIT * 0.6 + 1e-6 for m in meals)
+
+    day_fat_max = target_cal * ddo.MACRO_GOAL_RATIOS[profile['goal']]['F'][1] * planner.FAT_RATIO_SLACK / ddo.ATWATER_F
+    assert sum(m['fat'] for m in meals) <= day_fat_max + 1e-6
+    # 가장 느슨한 단계의 단백질 하한
+    assert sum(m['protein'] for m in meals) >= plan['target_prot'] * min(f for f, _, _ in planner.TIERS) - 1e-6
+
+    assert plan['price'] == sum(m['price'] for m in meals)
+    if budget is not None: assert plan['price'] <= budget
+
+
+@pytest.mark.parametrize('profile', PROFILES, ids=lambda p: f"{p['goal']}-{p['target_cal']}")
+def test_joint_plan_satisfies_day_constraints(optimizer, profile):
+    assert_day_constraints(ddo.plan_day(optimizer, profile, planner='joint'), profile)
+
+
+@pytest.fixture(scope='module')
+def candidates(optimizer):
+    """_solve 직접 호출용: BUDGET_PROFILE의 느슨한 단계 끼니 후보 (끼니 지방 상한 없이)"""
+    planner = ddo.JointDayPlanner(optimizer, time_limit=1.0)
+    profile = BUDGET_PROFILE
+    d_prot, _, d_fat = ddo.calculate_macro_grams(profile['target_cal'], profile['goal'], profile['weight'])
+    pool = optimizer.build_candidate_pool(profile['allergies'], set(), set())
+    n = planner.MEALS_COUNT
+    combo_ids, brand_idx = planner._meal_candidates(pool, profile['target_cal'] / n, d_prot / n, d_fat / n, 0.70, 0.30)
+    solve = lambda day_cal=profile['target_cal'], **kwargs: planner._solve(
+        combo_ids, brand_idx, day_cal, d_prot, d_fat, kwargs.pop('budget', None), 0.70, True, (), **kwargs
+    )
+    totals = optimizer.store.nutrients[combo_ids].sum(axis=1, dtype=float)
+    return solve, totals
+
+
+def test_day_fat_max_binds_in_solver(candidates):
+    # plan()은 끼니 지방 상한으로 후보를 먼저 줄여 하루 지방 상한이 잘 걸리지 않으므로 _solve를 직접 푼다
+    solve, totals = candidates
+    cap = totals[solve(), ddo.COL_FAT].sum() - 1
+    capped = solve(day_fat_max=cap)
+    assert capped is not None and totals[capped, ddo.COL_FAT].sum() <= cap + 1e-6
+    assert solve(day_fat_max=0) is None
+
+
+def test_day_calorie_range_bounds_both_sides(candidates):
+    solve, totals = candidates
+    cal = np.sort(totals[:, ddo.COL_CAL])
+    n, r = ddo.JointDayPlanner.MEALS_COUNT, ddo.JointDayPlanner.DAY_CAL_RANGE
+    # 가장 가벼운 세 조합도 상한을 넘는 목표 / 가장 무거운 세 조합도 하한에 못 미치는 목표
+    assert solve(day_cal=cal[:n].sum() / (1 + r) * 0.99) is None
+    assert solve(day_cal=cal[-n:].sum() / (1 - r) * 1.01) is None
+
+
+def test_budget_caps_day_price(optimizer):
+    planner = ddo.JointDayPlanner(optimizer, time_limit=1.0)
+    unbounded = planner.plan(BUDGET_PROFILE)
+    assert_day_constraints(unbounded, BUDGET_PROFILE)
+
+    # 목적은 가격 + 편차라 상한을 조이면 더 싼 계획이 나와야 한다
+    budget = unbounded['price'] - 1
+    bounded = planner.plan(BUDGET_PROFILE, budget=budget)
+    assert_day_constraints(bounded, BUDGET_PROFILE, budget=budget)
+
+    via_plan_day = ddo.plan_day(optimizer, BUDGET_PROFILE, planner='joint', budget=budget)
+    assert_day_constraints(via_plan_day, BUDGET_PROFILE, budget=budget)
+
+
+def test_budget_too_low_fails(optimizer):
+    planner = ddo.JointDayPlanner(optimizer, time_limit=1.0)
+    assert planner.plan(BUDGET_PROFILE, budget=3000) == {"success": False, "reason": "No Feasible Day Plan"}
+    assert ddo.plan_day(optimizer, BUDGET_PROFILE, planner='joint', budget=0)['success'] is False
+
+
+def test_budget_requires_joint_planner(optimizer):
+    with pytest.raises(ValueError):
+        ddo.plan_day(optimizer, BUDGET_PROFILE, budget=10000)
+
+
+def test_joint_planner_hint_key_is_bounded_to_vocab(optimizer):
+    planner = ddo.JointDayPlanner(optimizer, time_limit=1.0)
+    profile = {'weight': 70, 'gender': 'M', 'goal': '건강관리', 'target_cal': 1800}
+    for allergies in (['난류'], ['난류', 'x-1'], ['NANRYU', '난류'], ['난류', 'x-2']):
+        planner.plan({**profile, 'allergies': allergies})
+    assert list(planner._hints) == [ddo.build_allergy_mask(['난류'])[0]]
+
+
+def test_joint_objective_no_worse_than_greedy_on_same_pool(optimizer):
+    # 후보를 브랜드당 상위 조합으로 자르므로 탐욕 루프의 선택을 후보에 넣고 같은 후보 안에서 비교한다
+    planner = ddo.JointDayPlanner(optimizer, time_limit=5.0)
+    n = planner.MEALS_COUNT
+    prot_min_factor, cal_range, _ = planner.TIERS[-1]
+    users = ddo.RandomUserGenerator(seed=3)
+    compared = 0
+    for k in range(8):
+        profile = users.generate()
+        greedy = ddo.plan_day(optimizer, profile, 'greedy', np.random.default_rng(k))
+        assert greedy['success']
+        day_cal = profile['target_cal']
+        d_prot, _, d_fat = ddo.calculate_macro_grams(day_cal, profile['goal'], profile['weight'])
+        day_fat_max = day_cal * ddo.MACRO_GOAL_RATIOS[profile['goal']]['F'][1] * planner.FAT_RATIO_SLACK / ddo.ATWATER_F
+
+        pool = optimizer.build_candidate_pool(profile['allergies'], set(), set())
+        pool_brands = list(pool)
+        combo_ids, brand_idx = planner._meal_candidates(pool, day_cal / n, d_prot / n, d_fat / n, prot_min_factor, cal_range)
+        greedy_ids = np.full((n, ddo.MAX_COMBO_SIZE), -1, dtype=np.int64)
+        for m, meal in enumerate(greedy['results']):
+            greedy_ids[m, :len(meal['combo'])] = [item['item_id'] for item in meal['combo']]
+        combo_ids = np.vstack([combo_ids, greedy_ids])
+        brand_idx = np.concatenate([brand_idx, [pool_brands.index(meal['brand']) for meal in greedy['results']]])
+
+        # 탐욕 계획이 하루 조건을 어기면 MIP의 해 공간 밖이라 비교하지 않는다
+        totals = optimizer.store.nutrients[greedy_ids].sum(axis=1, dtype=np.float64)
+        day = totals.sum(axis=0)
+        if not (abs(day[ddo.COL_CAL] - day_cal) <= day_cal * planner.DAY_CAL_RANGE and day[ddo.COL_PROT] >= d_prot * prot_min_factor
+                and day[ddo.COL_SODIUM] <= ddo.SODIUM_MAX_LIMIT and day[ddo.COL_FAT] <= day_fat_max
+                and len({meal['brand'] for meal in greedy['results']}) == n):
+            continue
+
+        hint = {tuple(ids) for ids in greedy_ids.tolist()}
+        chosen = planner._solve(combo_ids, brand_idx, day_cal, d_prot, d_fat, None, prot_min_factor, True, hint, day_fat_max)
+        assert chosen is not None
+        joint_totals = optimizer.store.nutrients[combo_ids[chosen]].sum(axis=1, dtype=np.float64)
+        assert planner.objective(joint_totals, day_cal, d_prot, d_fat) <= planner.objective(totals, day_cal, d_prot, d_fat) + 1e-6
+        compared += 1
+    assert compared >= 4
@@ -0,0 +1,107 @@
+"""
+Meal recommendation v1.py (MealRecommendationEngine) 선형 계획 모델 vs 부분집합 전수 탐색
+"""
+
+import importlib.util
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .support import ALGORITHM_DIR
+
+COLUMNS = ['price', '에너지(kcal)', '단백질(g)', '탄수화물(g)', '지방(g)', '나트륨(mg)']
+
+
+def load_v1():
+    spec = importlib.util.spec_from_file_location('meal_recommendation_v1', os.path.join(ALGORITHM_DIR, 'Meal recommendation v1.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+v1 = load_v1()
+
+
+@pytest.fixture(scope='module')
+def engine(tmp_path_factory):
+    """브랜드 두 개의 행을 섞어 둔 작은 DB (브랜드 프레임 행 순서 != 원본 행 순서)"""
+    rng = np.random.default_rng(0)
+    n = 28
+    df = pd.DataFrame({
+        'brand_name': np.where(rng.random(n) < 0.5, 'A', 'B'),
+        'cleaned_item_name': [f'item{i}' for i in range(n)],
+        'price': rng.integers(10, 60, n) * 100,
+        '에너지(kcal)': rng.uniform(250, 900, n).round(1),
+        '단백질(g)': rng.uniform(3, 40, n).round(1),
+        '탄수화물(g)': rng.uniform(10, 100, n).round(1),
+        '지방(g)': rng.uniform(3, 40, n).round(1),
+        '나트륨(mg)': rng.uniform(100, 900, n).round(0),
+    })
+    path = str(tmp_path_factory.mktemp('v1') / 'db.csv')
+    df.to_csv(path, index=False)
+    return v1.MealRecommendationEngine(path)
+
+
+def brute_force(engine, brand, budget, calorie_range, min_protein, goal):
+    """MIN_ITEMS~MAX_ITEMS개 부분집합 전부 중 제약을 만족하고 목적값이 가장 큰 (목적값, 상품명 집합)"""
+    df = engine.df[engine.df['brand_name'] == brand]
+    arrays = {key: df[col].to_numpy(dtype=np.float64) for key, col in
+              [('price', 'price'), ('calorie', '에너지(kcal)'), ('protein', '단백질(g)'), ('sodium', '나트륨(mg)')]}
+    scores = engine._objective_scores(arrays, goal)
+    names = df['cleaned_item_name'].tolist()
+    best = (-np.inf, None)
+    for k in range(engine.MIN_ITEMS, engine.MAX_ITEMS + 1):
+        for subset in itertools.combinations(range(len(df)), k):
+            s = list(subset)
+            if arrays['price'][s].sum() > budget or arrays['sodium'][s].sum() > engine.SODIUM_LIMIT: continue
+            if not calorie_range[0] <= arrays['calorie'][s].sum() <= calorie_range[1]: continue
+            if arrays['protein'][s].sum() < min_protein: continue
+            best = max(best, (scores[s].sum(), frozenset(names[i] for i in s)), key=lambda b: b[0])
+    return best
+
+
+@pytest.mark.parametrize('goal', ['다이어트', '균형', '벌크업'])
+@pytest.mark.parametrize('budget', [4000, 8000, 15000])
+def test_solution_matches_brute_force(engine, goal, budget):
+    engine.recommendations_budget = budget
+    target = engine.calorie_targets[goal]
+    calorie_range = (target * (1 - engine.CALORIE_TOLERANCE), target * (1 + engine.CALORIE_TOLERANCE))
+    for brand in engine.get_available_brands():
+        best_score, best_items = brute_force(engine, brand, budget, calorie_range, engine.protein_minimums[goal], goal)
+        result = engine._solve_with_linear_programming(brand, budget, calorie_range, engine.protein_minimums[goal], goal, verbose=False)
+        if best_items is None:
+            assert result is None
+            continue
+        # 결과 상품은 모델과 같은 (캐시된) 브랜드 프레임에서 나와야 한다
+        assert frozenset(item['cleaned_item_name'] for item in result['items']) == best_items
+        assert result['validation']['all_valid']
+        assert result['summary']['total_price'] == sum(item['price'] for item in result['items'])
+
+
+@pytest.mark.parametrize('goal', ['다이어트', '벌크업'])
+def test_sweep_matches_independent_solves(engine, goal):
+    """한 모델로 예산/허용 오차를 바꿔 가며 푼 결과 = 조건마다 새로 전수 탐색한 최적해"""
+    budgets, tolerances = [15000, 4000, 8000, 6000], [0.2, engine.CALORIE_TOLERANCE]
+    target = engine.calorie_targets[goal]
+    solved = 0
+    for brand in engine.get_available_brands():
+        sweep = engine.recommend_sweep(goal, brand, budgets, tolerances)
+        assert [(row['budget'], row['calorie_tolerance']) for row in sweep] == [(b, t) for t in tolerances for b in budgets]
+        for row in sweep:
+            calorie_range = (target * (1 - row['calorie_tolerance']), target * (1 + row['calorie_tolerance']))
+            _, best_items = brute_force(engine, brand, row['budget'], calorie_range, engine.protein_minimums[goal], goal)
+            result = row['result']
+            if best_items is None:
+                assert result is None
+                continue
+            assert frozenset(item['cleaned_item_name'] for item in result['items']) == best_items
+            assert result['summary']['total_price'] <= row['budget']
+            solved += 1
+            assert calorie_range[0] <= result['summary']['total_calories'] <= calorie_range[1]
+        # 스윕 전체가 (브랜드, 목표) 모델 하나를 재사용한다
+        assert (brand, goal) in engine._model_cache
+    assert len([key for key in engine._model_cache if key[1] == goal]) == len(engine.get_available_brands())
+    assert solved
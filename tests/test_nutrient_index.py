@@ -0,0 +1,59 @@
+"""
+NutrientIndex 구간 질의 vs 선형 탐색, 후보 풀 단품 가지치기
+"""
+
+import numpy as np
+import pytest
+
+from .support import ddo
+
+from nutrient_index import NutrientIndex  # noqa: E402 (support가 algorithm/을 경로에 추가)
+
+
+def linear_scan(points, lo, hi):
+    lo = np.array([-np.inf if v is None else v for v in lo])
+    hi = np.array([np.inf if v is None else v for v in hi])
+    return np.flatnonzero(((points >= lo) & (points <= hi)).all(axis=1))
+
+
+@pytest.mark.parametrize('block_size', [1, 16, 256])
+def test_nutrient_index_matches_linear_scan(block_size):
+    rng = np.random.default_rng(block_size)
+    points = np.column_stack([
+        rng.integers(0, 1200, 2000), rng.integers(0, 60, 2000), rng.uniform(0, 50, 2000), rng.integers(0, 2500, 2000),
+    ]).astype(np.float64)
+    index = NutrientIndex(points, block_size=block_size)
+    for _ in range(200):
+        lo = [None if rng.random() < 0.3 else float(rng.uniform(0, 1000)), None if rng.random() < 0.5 else float(rng.uniform(0, 40)), None, None]
+        hi = [None if rng.random() < 0.3 else float(rng.uniform(200, 1300)), None, None if rng.random() < 0.5 else float(rng.uniform(5, 50)),
+              None if rng.random() < 0.5 else float(rng.uniform(500, 2500))]
+        expected = linear_scan(points, lo, hi)
+        np.testing.assert_array_equal(index.query(lo, hi), expected)
+        np.testing.assert_array_equal(np.flatnonzero(index.mask(lo, hi)), expected)
+
+
+def test_nutrient_index_inclusive_bounds_and_empty():
+    points = np.array([[100, 10, 5, 300], [200, 20, 10, 600], [200, 30, 15, 900]], dtype=np.float64)
+    index = NutrientIndex(points)
+    np.testing.assert_array_equal(index.query((200, 20, None, None), (200, None, None, 900)), [1, 2])
+    assert len(index.query((300, None, None, None))) == 0
+    assert len(NutrientIndex(np.empty((0, 4))).query()) == 0
+    with pytest.raises(ValueError):
+        NutrientIndex(np.zeros((3, 2)))
+
+
+@pytest.mark.parametrize('cal_max', [300, 600, 1200])
+def test_candidate_pool_pruning_matches_linear_filter(optimizer, cal_max):
+    """cal_max 가지치기 = 가지치기 없는 후보 풀에서 단품 칼로리/나트륨 상한을 넘는 메뉴만 뺀 것"""
+    nutrients = optimizer.store.nutrients
+    full = optimizer.build_candidate_pool(['난류'], set(), set())
+    pruned = optimizer.build_candidate_pool(['난류'], set(), set(), cal_max=cal_max)
+    expected = {}
+    for brand, cats in full.items():
+        kept = {cat: ids[(nutrients[ids, ddo.COL_CAL] <= cal_max) & (nutrients[ids, ddo.COL_SODIUM] <= ddo.SODIUM_MAX_LIMIT * 0.6)]
+                for cat, ids in cats.items()}
+        if len(kept['MAIN']): expected[brand] = kept
+    assert list(pruned) == list(expected)
+    for brand in expected:
+        for cat in expected[brand]:
+            np.testing.assert_array_equal(pruned[brand][cat], expected[brand][cat])
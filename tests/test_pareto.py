@@ -0,0 +1,39 @@
+"""
+pareto_front_indices (블록 스카이라인) vs O(n^2) 전수 비교
+"""
+
+import numpy as np
+import pytest
+
+from .support import brute_force_front, ddo
+
+
+@pytest.mark.parametrize('n_objectives', [1, 2, 3, 5])
+def test_pareto_front_indices_matches_brute_force(n_objectives):
+    rng = np.random.default_rng(n_objectives)
+    for _ in range(20):
+        # 작은 정수 범위로 동률/중복 점을 섞는다
+        points = rng.integers(0, 8, size=(int(rng.integers(1, 200)), n_objectives)).astype(np.float64)
+        np.testing.assert_array_equal(ddo.pareto_front_indices(points), brute_force_front(points))
+
+
+def test_pareto_front_indices_multiple_blocks(monkeypatch):
+    monkeypatch.setattr(ddo, 'SKYLINE_BLOCK_SIZE', 16)
+    points = np.random.default_rng(7).random((500, 4))
+    np.testing.assert_array_equal(ddo.pareto_front_indices(points), brute_force_front(points))
+
+
+def test_pareto_front_indices_empty():
+    assert len(ddo.pareto_front_indices(np.empty((0, 3)))) == 0
+
+
+def test_get_pareto_optimal_sets_returns_cheapest_non_dominated(optimizer):
+    rng = np.random.default_rng(5)
+    keys = [key for key, _ in ddo.PARETO_OBJECTIVES]
+    candidates = [dict(zip(keys, (float(rng.integers(30, 60) * 100), *rng.integers(0, 6, 4) / 2))) for _ in range(300)]
+    points = np.array([[sign * c[key] for key, sign in ddo.PARETO_OBJECTIVES] for c in candidates])
+    front = [candidates[i] for i in brute_force_front(points)]
+    expected = sorted(front, key=lambda c: (c['price'], c['error']))[:5]
+    assert optimizer.get_pareto_optimal_sets(candidates) == expected
+    # limit을 풀면 비지배 조합 전부
+    assert optimizer.get_pareto_optimal_sets(candidates, limit=len(candidates)) == sorted(front, key=lambda c: (c['price'], c['error']))
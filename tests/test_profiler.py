@@ -0,0 +1,128 @@
+"""
+StageProfiler: 탈락 사유 집계, 단계별 자기 시간, to_dict / to_json / to_prometheus 내보내기
+"""
+
+import json
+import re
+import time
+
+import numpy as np
+import pytest
+
+from .support import ddo, signature
+
+import diet_recommendation_server as server  # noqa: E402 (support가 algorithm/을 경로에 추가)
+
+MEAL = {'target_cal': 650, 'target_prot': 30, 'target_fat': 20, 'user_goal': '건강관리', 'allergies_to_avoid': ['우유']}
+PROMETHEUS_LINE = re.compile(r'^(diet_optimizer_[a-z_]+)(\{(stage|reason)="([a-z_]+)"\})? (\S+)$')
+
+
+@pytest.fixture
+def profiled_optimizer(optimizer):
+    return ddo.DailyDietOptimizer(store=optimizer.store, profile=True)
+
+
+def run_one_chunk(optimizer, **kwargs):
+    """조기 종료 없이 벡터화 샘플링 한 묶음"""
+    return optimizer.recommend_daily_diet(num_simulations=ddo.VECTOR_CHUNK_SIZE, rng=0, patience=None, min_feasible_rate=None, **MEAL, **kwargs)
+
+
+def test_counts_match_recomputed_checks(profiled_optimizer):
+    run_one_chunk(profiled_optimizer)
+    data = profiled_optimizer.profiler.to_dict()
+
+    # 같은 시드로 같은 묶음을 다시 뽑아 사유별 탈락 수를 직접 센다
+    pool = profiled_optimizer.build_candidate_pool(MEAL['allergies_to_avoid'], set(), set(), cal_max=MEAL['target_cal'] * 1.15)
+    combo_ids, _ = profiled_optimizer._sample_combo_ids(pool, ddo.VECTOR_CHUNK_SIZE, np.random.default_rng(0))
+    _, _, sodium_ok, protein_ok, cal_ok = profiled_optimizer.evaluate_combos_batch(combo_ids, MEAL['target_cal'], MEAL['target_prot'], MEAL['target_fat'])
+    nutrient_ok = np.flatnonzero(sodium_ok & protein_ok & cal_ok)
+    n_feasible = len(profiled_optimizer._drop_overlaps(nutrient_ok, combo_ids))
+
+    assert data['counters'] == {'requests': 1, 'samples': ddo.VECTOR_CHUNK_SIZE, 'feasible': n_feasible, 'pruned': 0}
+    assert data['rejections']['protein'] == np.count_nonzero(~protein_ok)
+    assert data['rejections']['calories'] == np.count_nonzero(~cal_ok)
+    assert data['rejections']['sodium'] == np.count_nonzero(~sodium_ok)
+    assert data['rejections']['overlap'] == len(nutrient_ok) - n_feasible
+    assert data['rejection_ratios']['protein'] == pytest.approx(data['rejections']['protein'] / ddo.VECTOR_CHUNK_SIZE)
+    for name in ('filtering', 'sampling', 'error', 'frontier'):
+        assert data['stages'][name]['calls'] > 0
+    assert sum(s['share'] for s in data['stages'].values()) == pytest.approx(1.0)
+
+
+def test_profiling_does_not_change_results(profiled_optimizer, optimizer):
+    assert signature(run_one_chunk(profiled_optimizer)) == signature(run_one_chunk(optimizer))
+    assert optimizer.profiler is None
+
+
+def test_nested_stage_records_self_time():
+    profiler = ddo.StageProfiler()
+    with profiler.stage('sampling'):
+        time.sleep(0.02)
+        with profiler.stage('error'): time.sleep(0.1)
+    data = profiler.to_dict()['stages']
+    assert data['error']['seconds'] >= 0.1
+    assert 0.02 <= data['sampling']['seconds'] < 0.1  # 안쪽 단계 시간은 빠진다
+    assert (data['sampling']['calls'], data['error']['calls']) == (1, 1)
+    profiler.reset()
+    assert profiler.to_dict()['stages']['error'] == {'seconds': 0.0, 'calls': 0, 'share': 0.0}
+
+
+def test_exports_agree(profiled_optimizer):
+    run_one_chunk(profiled_optimizer)
+    profiler = profiled_optimizer.profiler
+    data = profiler.to_dict()
+    assert json.loads(profiler.to_json()) == data
+
+    text = profiler.to_prometheus()
+    assert text.endswith('\n')
+    samples, typed = {}, set()
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            name, kind = line.split()[2:]
+            assert kind == 'counter'
+            typed.add(name)
+            continue
+        if line.startswith('# HELP '): continue
+        match = PROMETHEUS_LINE.match(line)
+        assert match, line
+        assert match.group(1) in typed  # TYPE 줄이 먼저 나온다
+        samples[(match.group(1), match.group(4))] = float(match.group(5))
+
+    for name, stage in data['stages'].items():
+        assert samples[('diet_optimizer_stage_seconds_total', name)] == pytest.approx(stage['seconds'], rel=1e-8)
+        assert samples[('diet_optimizer_stage_calls_total', name)] == stage['calls']
+    for key, value in data['counters'].items():
+        assert samples[(f'diet_optimizer_{key}_total', None)] == value
+    for reason, n in data['rejections'].items():
+        assert samples[('diet_optimizer_rejections_total', reason)] == n
+    assert 'my_app_requests_total 1' in profiler.to_prometheus(prefix='my_app')
+
+
+def test_service_metrics_only_when_profiling(profiled_optimizer, optimizer, menu_path):
+    assert server.RecommendationService(ddo, optimizer, data_path=menu_path).metrics() is None
+    service = server.RecommendationService(ddo, profiled_optimizer, data_path=menu_path)
+    run_one_chunk(profiled_optimizer)
+    assert service.metrics() == profiled_optimizer.profiler.to_prometheus()
+    assert service.health()['profile']['counters']['requests'] == 1
+
+
+def test_exhaustive_enumeration_is_timed_and_pruning_counted(profiled_optimizer):
+    started = time.perf_counter()
+    assert not isinstance(profiled_optimizer.recommend_daily_diet(engine='exhaustive', **MEAL), str)
+    wall = time.perf_counter() - started
+    data = profiled_optimizer.profiler.to_dict()
+
+    # 열거는 제너레이터 안에서 일어나므로 next()마다 sampling 단계로 잡혀야 한다
+    assert data['stages']['sampling']['calls'] > 0 and data['stages']['sampling']['seconds'] > 0
+    assert sum(s['seconds'] for s in data['stages'].values()) >= 0.5 * wall
+
+    pool = profiled_optimizer.build_candidate_pool(MEAL['allergies_to_avoid'], set(), set(), cal_max=MEAL['target_cal'] * 1.15)
+    space = sum(ddo.combo_space_size(len(c['MAIN']), len(c['SIDE']), len(c['DRINK'])) for c in pool.values())
+    counters = data['counters']
+    assert counters['pruned'] > 0 and counters['samples'] + counters['pruned'] == space
+
+
+def test_batch_enumeration_is_timed(profiled_optimizer):
+    profiled_optimizer.recommend_batch([MEAL, {**MEAL, 'target_cal': 700}], engine='exhaustive')
+    sampling = profiled_optimizer.profiler.to_dict()['stages']['sampling']
+    assert sampling['calls'] > 0 and sampling['seconds'] > 0
@@ -0,0 +1,81 @@
+"""
+끼니 추천 결과 캐시: 양자화된 목표치 적중, rng= 우회, TTL 만료, LRU 크기 상한
+"""
+
+import pytest
+
+from .support import ddo, signature
+
+MEAL = {'target_fat': 20, 'user_goal': '건강관리', 'allergies_to_avoid': ['난류'], 'engine': 'exhaustive'}
+
+
+@pytest.fixture
+def cached_optimizer(optimizer, monkeypatch):
+    """모듈 최적화기의 저장소를 공유하고 캐시만 켠 최적화기 + 실제 탐색 호출 기록"""
+    cached = ddo.DailyDietOptimizer(store=optimizer.store, result_cache_size=8, seed=0)
+    calls = []
+    search = cached._recommend_daily_diet
+    monkeypatch.setattr(cached, '_recommend_daily_diet', lambda *args, **kwargs: calls.append(args[:3]) or search(*args, **kwargs))
+    return cached, calls
+
+
+class FakeClock:
+    def __init__(self): self.now = 1000.0
+    def __call__(self): return self.now
+
+
+def test_nearby_targets_share_one_search(cached_optimizer, optimizer):
+    cached, calls = cached_optimizer
+    first_stats, second_stats = {}, {}
+    first = cached.recommend_daily_diet(602, 31.4, stats=first_stats, **MEAL)
+    second = cached.recommend_daily_diet(598, 30.6, stats=second_stats, **MEAL)
+    assert not isinstance(first, str) and second is first
+    assert calls == [(600, 31, 20)]  # 격자에 맞춘 목표치로 한 번만 계산
+    assert (first_stats['cached'], second_stats['cached']) == (False, True)
+    assert cached.result_cache.stats()['hits'] == 1
+    # 결과는 격자 목표치로 직접 계산한 것과 같다
+    assert signature(first) == signature(optimizer.recommend_daily_diet(600, 31, **MEAL))
+
+
+def test_different_request_misses(cached_optimizer):
+    cached, calls = cached_optimizer
+    cached.recommend_daily_diet(600, 30, **MEAL)
+    cached.recommend_daily_diet(600, 30, **{**MEAL, 'allergies_to_avoid': ['우유']})
+    cached.recommend_daily_diet(600, 30, excluded_brands={cached.store.brand_names[0]}, **MEAL)
+    assert len(calls) == 3
+
+
+def test_seeded_calls_bypass_cache(cached_optimizer):
+    cached, calls = cached_optimizer
+    for _ in range(2): cached.recommend_daily_diet(600, 30, rng=0, **{**MEAL, 'engine': 'vectorized'})
+    assert len(calls) == 2 and cached.result_cache.stats()['size'] == 0
+
+
+def test_entries_expire_after_ttl(cached_optimizer, monkeypatch):
+    cached, calls = cached_optimizer
+    clock = FakeClock()
+    monkeypatch.setattr(ddo.time, 'monotonic', clock)
+    cached.recommend_daily_diet(600, 30, **MEAL)
+    clock.now += ddo.CACHE_TTL_SECONDS - 1
+    cached.recommend_daily_diet(600, 30, **MEAL)
+    assert len(calls) == 1
+    clock.now += 2
+    cached.recommend_daily_diet(600, 30, **MEAL)
+    assert len(calls) == 2
+
+
+def test_cache_is_bounded_and_evicts_least_recent():
+    cache = ddo.RecommendationCache(max_size=3, ttl=60)
+    for k in range(3): cache.put(k, k)
+    assert cache.get(0) == 0  # 0을 최근 사용으로 올린다
+    cache.put(3, 3)
+    assert cache.stats()['size'] == 3
+    assert cache.get(1) is None and [cache.get(k) for k in (0, 2, 3)] == [0, 2, 3]
+
+
+def test_reload_store_clears_cache(cached_optimizer):
+    cached, calls = cached_optimizer
+    cached.recommend_daily_diet(600, 30, **MEAL)
+    cached.reload_store(cached.store)
+    cached.recommend_daily_diet(600, 30, **MEAL)
+    assert len(calls) == 2
@@ -0,0 +1,74 @@
+"""
+diet_recommendation_server 요청 처리: 잘못된 요청 400 / 과대 본문 413 / 슬롯 대기 초과 503
+"""
+
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from .support import ddo
+
+import diet_recommendation_server as server  # noqa: E402 (support가 algorithm/을 경로에 추가)
+
+MEAL = {'target_cal': 600, 'target_prot': 30, 'target_fat': 20, 'goal': '건강관리'}
+
+
+@pytest.fixture
+def service(optimizer, menu_path):
+    return server.RecommendationService(ddo, optimizer, max_concurrency=1, queue_timeout=0.05, data_path=menu_path)
+
+
+@pytest.fixture
+def address(service):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), server.make_handler(service))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(address, path, body=b'', headers=None):
+    conn = http.client.HTTPConnection(*address, timeout=5)
+    try:
+        conn.putrequest('POST', path)
+        for key, value in (headers or {'Content-Length': str(len(body))}).items(): conn.putheader(key, value)
+        conn.endheaders()
+        if body: conn.send(body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_meal_ok(address):
+    status, payload = post(address, '/meal', json.dumps(MEAL).encode())
+    assert status == 200
+    assert payload['success'] and payload['results']
+
+
+@pytest.mark.parametrize('length', ['abc', '-1', '1.5'])
+def test_invalid_content_length_is_rejected(address, length):
+    assert post(address, '/meal', headers={'Content-Length': length})[0] == 400
+
+
+def test_oversized_body_is_rejected(address):
+    assert post(address, '/meal', headers={'Content-Length': str(server.MAX_BODY_BYTES + 1)})[0] == 413
+
+
+@pytest.mark.parametrize('body', [b'{not json', b'[1, 2]', json.dumps({**MEAL, 'allergies': '난류'}).encode(), json.dumps({'goal': '건강관리'}).encode()])
+def test_bad_request_body_is_rejected(address, body):
+    assert post(address, '/meal', body)[0] == 400
+
+
+def test_busy_server_returns_503(address, service):
+    assert service.slots.acquire(timeout=1)
+    try:
+        assert post(address, '/meal', json.dumps(MEAL).encode())[0] == 503
+    finally:
+        service.slots.release()
+    assert post(address, '/meal', json.dumps(MEAL).encode())[0] == 200
+
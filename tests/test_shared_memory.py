@@ -0,0 +1,56 @@
+"""
+MenuStore.to_shared_memory / attach_shared: 워커가 붙은 저장소가 원본과 같은 배열/결과를 내는지
+"""
+
+import numpy as np
+import pytest
+
+from .support import ddo, signature
+
+
+@pytest.fixture
+def shared(optimizer):
+    handle, segments = optimizer.store.to_shared_memory()
+    yield handle, segments
+    for shm in segments:
+        shm.close()
+        shm.unlink()
+
+
+def test_attached_store_matches_original(optimizer, shared):
+    handle, _ = shared
+    store = ddo.MenuStore.attach_shared(handle)
+    try:
+        for field in ddo.MenuStore.ARRAY_FIELDS:
+            np.testing.assert_array_equal(getattr(store, field), getattr(optimizer.store, field))
+            assert not getattr(store, field).flags.writeable
+        assert store.brand_names == optimizer.store.brand_names
+        assert store.fingerprint() == optimizer.store.fingerprint()
+        assert store.record(0) == optimizer.store.record(0)
+    finally:
+        for shm in store._segments: shm.close()
+
+
+def test_attached_store_is_zero_copy(shared):
+    handle, segments = shared
+    store = ddo.MenuStore.attach_shared(handle)
+    try:
+        # 부모 세그먼트에 쓴 값이 붙은 배열에 그대로 보인다 (복사본이 아님)
+        field = ddo.MenuStore.ARRAY_FIELDS.index('nutrients')
+        name, shape, dtype = handle['arrays']['nutrients']
+        assert segments[field].name == name
+        np.ndarray(shape, dtype=np.dtype(dtype), buffer=segments[field].buf)[0, ddo.COL_PRICE] = 12345
+        assert store.nutrients[0, ddo.COL_PRICE] == 12345
+    finally:
+        for shm in store._segments: shm.close()
+
+
+def test_worker_optimizer_on_shared_store_gives_same_results(optimizer, shared, meal_requests):
+    handle, _ = shared
+    worker = ddo.DailyDietOptimizer(store=ddo.MenuStore.attach_shared(handle), seed=0)
+    try:
+        for req in meal_requests[:6]:
+            expected = optimizer.recommend_daily_diet(engine='exhaustive', **req)
+            assert signature(worker.recommend_daily_diet(engine='exhaustive', **req)) == signature(expected)
+    finally:
+        for shm in worker.store._segments: shm.close()
@@ -0,0 +1,69 @@
+"""
+메뉴 바이너리 스냅샷: CSV 빌드와 같은 저장소, CSV 변경/버전 변경 시 무효화 후 다시 쓰기
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from .support import ddo
+
+
+@pytest.fixture
+def csv_path(menu_path, tmp_path):
+    path = str(tmp_path / 'final_nutrition_db.csv')
+    shutil.copy(menu_path, path)
+    return path
+
+
+def assert_same_store(a, b):
+    for field in ddo.MenuStore.ARRAY_FIELDS:
+        np.testing.assert_array_equal(getattr(a, field), getattr(b, field))
+    assert a.brand_names == b.brand_names
+
+
+def forbid_csv(monkeypatch):
+    def fail(self, data_path): raise AssertionError('CSV를 다시 읽었다')
+    monkeypatch.setattr(ddo.DailyDietOptimizer, '_build_store_from_csv', fail)
+
+
+def test_snapshot_round_trip(csv_path, monkeypatch):
+    snapshot = ddo.build_menu_snapshot(csv_path)
+    assert snapshot == ddo.snapshot_path_for(csv_path) and os.path.exists(snapshot)
+    expected = ddo.DailyDietOptimizer(csv_path, use_snapshot=False).store
+
+    forbid_csv(monkeypatch)
+    assert_same_store(ddo.DailyDietOptimizer(csv_path).store, expected)
+    # CSV 없이 스냅샷만 배포된 경우도 로드한다
+    os.remove(csv_path)
+    assert_same_store(ddo.DailyDietOptimizer(csv_path).store, expected)
+
+
+def test_first_start_writes_snapshot(csv_path, monkeypatch):
+    ddo.DailyDietOptimizer(csv_path)
+    assert ddo.MenuStore.load_snapshot(ddo.snapshot_path_for(csv_path), csv_path) is not None
+    forbid_csv(monkeypatch)
+    ddo.DailyDietOptimizer(csv_path)
+
+
+def test_changed_csv_invalidates_and_rewrites_snapshot(csv_path):
+    ddo.build_menu_snapshot(csv_path)
+    with open(csv_path, encoding='utf-8') as f: lines = f.readlines()
+    with open(csv_path, 'w', encoding='utf-8') as f: f.writelines(lines[:-20])  # 메뉴 일부 삭제
+    snapshot = ddo.snapshot_path_for(csv_path)
+    assert ddo.MenuStore.load_snapshot(snapshot, csv_path) is None
+
+    optimizer = ddo.DailyDietOptimizer(csv_path)
+    assert_same_store(optimizer.store, ddo.DailyDietOptimizer(csv_path, use_snapshot=False).store)
+    # 새 CSV 기준으로 다시 써 두었다
+    assert_same_store(ddo.MenuStore.load_snapshot(snapshot, csv_path), optimizer.store)
+
+
+def test_version_mismatch_invalidates_snapshot(csv_path, monkeypatch):
+    snapshot = ddo.build_menu_snapshot(csv_path)
+    monkeypatch.setattr(ddo, 'SNAPSHOT_VERSION', ddo.SNAPSHOT_VERSION + 1)
+    assert ddo.MenuStore.load_snapshot(snapshot, csv_path) is None
+    ddo.DailyDietOptimizer(csv_path)
+    assert ddo.MenuStore.load_snapshot(snapshot, csv_path) is not None
@@ -0,0 +1,68 @@
+"""
+recommend_tiered: 샘플링 한 번으로 plan_day의 3단계 재시도와 같은 단계를 고르는지
+"""
+
+import pytest
+
+from .support import ddo, signature
+
+BASE = {'target_fat': 20, 'user_goal': '건강관리', 'allergies_to_avoid': [], 'excluded_codes': set()}
+
+
+def sequential_tier(optimizer, target_cal, target_prot, excluded_brands, **kwargs):
+    """기존 방식: 단계마다 recommend_daily_diet를 다시 호출해 처음 결과가 나온 단계"""
+    for t, (prot_min_factor, cal_range, keep_brands) in enumerate(ddo.RETRY_TIERS):
+        result = optimizer.recommend_daily_diet(
+            target_cal, target_prot, excluded_brands=excluded_brands if keep_brands else set(),
+            prot_min_factor=prot_min_factor, cal_range=cal_range, **BASE, **kwargs
+        )
+        if not isinstance(result, str): return t, result
+    return None, result
+
+
+@pytest.mark.parametrize('target_cal, target_prot, exclude_all_brands', [
+    (700, 30, False),   # 첫 단계에서 해가 있음
+    (500, 80, False),   # 단백질 하한을 0.7로 낮춰야 해가 있음
+    (600, 100, False),  # 칼로리 범위는 첫 단계, 단백질은 둘째 단계
+    (600, 30, True),    # 모든 브랜드 제외 -> 브랜드 제외를 푸는 마지막 단계
+])
+def test_tiered_escalates_like_sequential_retries(optimizer, target_cal, target_prot, exclude_all_brands):
+    """샘플링 근사이므로 해가 충분히 흔한 요청으로 확인한다 (드문 단계는 놓치고 느슨한 단계로 갈 수 있다)"""
+    excluded_brands = set(optimizer.store.brand_names) if exclude_all_brands else set()
+    expected_tier, _ = sequential_tier(optimizer, target_cal, target_prot, excluded_brands, engine='exhaustive')
+    assert expected_tier is not None
+
+    result = optimizer.recommend_tiered(target_cal, target_prot, excluded_brands=excluded_brands, num_simulations=60000, rng=0, **BASE)
+    assert not isinstance(result, str)
+    assert {c['tier'] for c in result} == {expected_tier}
+    prot_min_factor, cal_range, keep_brands = ddo.RETRY_TIERS[expected_tier]
+    for c in result:
+        assert c['protein'] >= target_prot * prot_min_factor - 1e-6
+        assert target_cal * (1 - cal_range) - 1e-6 <= c['calories'] <= target_cal * (1 + cal_range) + 1e-6
+        if keep_brands: assert c['brand'] not in excluded_brands
+
+
+def test_tiered_non_vectorized_engine_is_sequential(optimizer):
+    expected_tier, expected = sequential_tier(optimizer, 500, 80, set(), engine='exhaustive')
+    result = optimizer.recommend_tiered(500, 80, engine='exhaustive', **BASE)
+    assert signature(result) == signature(expected)
+    assert {c['tier'] for c in result} == {expected_tier} and 'tier' not in expected[0]
+
+
+def test_tiered_counts_request_before_pool_building(optimizer, monkeypatch):
+    profiled = ddo.DailyDietOptimizer(store=optimizer.store, profile=True)
+
+    def failing_pool(*args, **kwargs): raise RuntimeError('pool')
+    monkeypatch.setattr(profiled, 'build_candidate_pool', failing_pool)
+    # 후보 풀 단계에서 실패한 요청도 recommend_daily_diet처럼 1건으로 센다
+    for recommend in (profiled.recommend_tiered, profiled.recommend_daily_diet):
+        with pytest.raises(RuntimeError):
+            recommend(600, 30, rng=0, **BASE)
+    assert profiled.profiler.to_dict()['counters']['requests'] == 2
+
+
+def test_tiered_infeasible_everywhere_stops_early(optimizer):
+    stats = {}
+    result = optimizer.recommend_tiered(600, 300, num_simulations=200000, rng=0, stats=stats, min_feasible_rate=1e-3, **BASE)
+    assert isinstance(result, str)
+    assert stats['stop_reason'] == 'infeasible' and stats['samples'] < 200000
@@ -0,0 +1,55 @@
+"""
+벡터화 조합 평가(evaluate_combos_batch) vs 기존 조합별 calculate_nutritional_error
+"""
+
+import numpy as np
+import pytest
+
+from .support import ddo
+
+
+def item_dict(store, item_id):
+    """저장소 값 그대로의 영양소 dict (record()는 소수 넷째 자리로 반올림해 경계 판정이 달라질 수 있다)"""
+    return {col: float(store.nutrients[item_id, k]) for k, col in enumerate(ddo.NUTRIENT_COLS)}
+
+
+def sampled_combos(optimizer, n, seed):
+    pool = optimizer.build_candidate_pool([], set(), set())
+    combo_ids, _ = optimizer._sample_combo_ids(pool, n, np.random.default_rng(seed))
+    return combo_ids
+
+
+@pytest.mark.parametrize('target_cal, target_prot, target_fat, prot_min_factor, cal_range', [
+    (600, 30, 20, 0.95, 0.15), (450, 45, 12, 0.7, 0.3), (900, 20, 35, 0.95, 0.15),
+])
+def test_batch_matches_scalar_error(optimizer, target_cal, target_prot, target_fat, prot_min_factor, cal_range):
+    combo_ids = sampled_combos(optimizer, 2000, seed=target_cal)
+    totals, errors, is_sodium_valid, is_protein_min_met, is_cal_valid = optimizer.evaluate_combos_batch(
+        combo_ids, target_cal, target_prot, target_fat, prot_min_factor, cal_range
+    )
+    goal_ratios = ddo.MACRO_GOAL_RATIOS['건강관리']
+    for r, ids in enumerate(combo_ids):
+        combo = [item_dict(optimizer.store, i) for i in ids if i >= 0]
+        error, cal, prot, carbs, fat, sodium, sodium_ok, prot_ok, cal_ok = optimizer.calculate_nutritional_error(
+            combo, target_cal, target_prot, target_fat, goal_ratios, prot_min_factor, cal_range
+        )
+        np.testing.assert_allclose(totals[r, [ddo.COL_CAL, ddo.COL_PROT, ddo.COL_CARBS, ddo.COL_FAT, ddo.COL_SODIUM]],
+                                   [cal, prot, carbs, fat, sodium], rtol=1e-12)
+        assert errors[r] == pytest.approx(error, rel=1e-9, abs=1e-12)
+        assert (is_sodium_valid[r], is_protein_min_met[r], is_cal_valid[r]) == (sodium_ok, prot_ok, cal_ok)
+
+
+def test_padding_rows_contribute_nothing(optimizer):
+    combo_ids = sampled_combos(optimizer, 500, seed=1)
+    padded = combo_ids[(combo_ids < 0).any(axis=1)]
+    assert len(padded)
+    totals = optimizer.evaluate_combos_batch(padded, 600, 30, 20)[0]
+    expected = np.array([optimizer.store.nutrients[ids[ids >= 0]].sum(axis=0, dtype=np.float64) for ids in padded])
+    np.testing.assert_allclose(totals, expected)
+
+
+def test_unknown_engine_is_rejected(optimizer, menu_path):
+    with pytest.raises(ValueError):
+        optimizer.recommend_daily_diet(600, 30, 20, '건강관리', engine='vectorised')
+    with pytest.raises(ValueError):
+        ddo.DailyDietOptimizer(menu_path, engine='vectorised', use_snapshot=False)